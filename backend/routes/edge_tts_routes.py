@@ -4,8 +4,7 @@
 # backend/routes/edge_tts_routes.py
 from flask import Blueprint, request, jsonify, Response
 import edge_tts
-import asyncio
-import io
+from backend.routes.tts_routes import tts_loop
 
 edge_tts_bp = Blueprint('edge_tts', __name__)
 
@@ -25,13 +24,14 @@ async def generate_speech_async(text, voice='es-ES-ElviraNeural', rate='+0%'):
     """Generar audio usando Edge TTS de forma asíncrona"""
     communicate = edge_tts.Communicate(text, voice, rate=rate)
     
-    # Generar audio en memoria
-    audio_data = b""
+    # Generar audio en memoria (unir al final: concatenar bytes en cada
+    # trozo copia todo lo anterior y es cuadrático)
+    chunks = []
     async for chunk in communicate.stream():
         if chunk["type"] == "audio":
-            audio_data += chunk["data"]
+            chunks.append(chunk["data"])
     
-    return audio_data
+    return b"".join(chunks)
 
 @edge_tts_bp.route('/api/edge-tts/synthesize', methods=['POST'])
 def synthesize_edge_speech():
@@ -59,26 +59,17 @@ def synthesize_edge_speech():
         # Obtener voz real de Edge TTS
         edge_voice = SPANISH_VOICES.get(voice_name, 'es-ES-ElviraNeural')
         
-        # Generar audio de forma asíncrona
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        # Generar audio en el bucle asyncio del worker
+        audio_data = tts_loop.run(generate_speech_async(text, edge_voice, rate))
         
-        try:
-            audio_data = loop.run_until_complete(
-                generate_speech_async(text, edge_voice, rate)
-            )
-            
-            return Response(
-                audio_data,
-                mimetype='audio/mpeg',
-                headers={
-                    'Content-Disposition': 'inline; filename="edge_speech.mp3"',
-                    'Cache-Control': 'no-cache'
-                }
-            )
-            
-        finally:
-            loop.close()
+        return Response(
+            audio_data,
+            mimetype='audio/mpeg',
+            headers={
+                'Content-Disposition': 'inline; filename="edge_speech.mp3"',
+                'Cache-Control': 'no-cache'
+            }
+        )
             
     except Exception as e:
         return jsonify({
@@ -1,16 +1,56 @@
 """
-Rutas para Text-to-Speech con OpenAI
+Rutas para Text-to-Speech con Edge TTS
+Las corrutinas de síntesis se ejecutan en un bucle persistente por worker;
+el audio se guarda en una caché por contenido, las peticiones idénticas en
+curso se agrupan y los documentos largos se sintetizan por fragmentos
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, send_file
 from backend.services.edge_tts import EdgeTTSService
-import asyncio
+from backend.services.synthesis_planner import SynthesisPlanner
+from backend.utils.tts_cache import TTSCache
+from backend.utils.single_flight import SingleFlight
+from backend.utils.async_loop import BackgroundLoop, LoopTimeoutError
+from backend.utils import metrics
+import os
 
 # Crear blueprint para las rutas TTS
 tts_bp = Blueprint('tts', __name__)
 
+# Audio ya sintetizado por texto, voz y velocidad: la vista previa de voz y
+# las frases repetidas del asistente no vuelven a llamar a Edge TTS.
+# TTS_CACHE_MAX_MB limita el disco; se borran los audios menos usados
+_audio_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'frontend', 'static', 'assets', 'audio')
+tts_cache = TTSCache(
+    os.path.join(_audio_dir, 'cache'),
+    '/static/assets/audio/cache',
+    max_bytes=int(float(os.environ.get('TTS_CACHE_MAX_MB', '512')) * 1024 * 1024)
+)
+metrics.register_source('tts_cache', tts_cache.stats)
+
+# Peticiones idénticas simultáneas (mismo texto, voz y velocidad) comparten
+# una sola síntesis, también entre workers mediante archivos de bloqueo
+tts_flight = SingleFlight(os.path.join(tts_cache.directory, '.locks'))
+metrics.register_source('tts_single_flight', tts_flight.stats)
+
+# Un único bucle asyncio por worker para las síntesis: los manejadores lo
+# usan con run() en lugar de crear y cerrar un bucle en cada petición.
+# TTS_TIMEOUT es el máximo en segundos de cada síntesis
+tts_loop = BackgroundLoop('tts-loop', timeout=float(os.environ.get('TTS_TIMEOUT', '60')))
+metrics.register_source('tts_loop', tts_loop.stats)
+
 # Inicializar servicios
-edge_tts = EdgeTTSService()
+edge_tts = EdgeTTSService(cache=tts_cache, flight=tts_flight)
+
+# Documentos largos: por fragmentos en paralelo (TTS_CONCURRENCY a la vez,
+# de hasta TTS_CHUNK_CHARS caracteres) unidos en un solo MP3
+tts_planner = SynthesisPlanner(
+    edge_tts,
+    concurrency=int(os.environ.get('TTS_CONCURRENCY', '4')),
+    max_chars=int(os.environ.get('TTS_CHUNK_CHARS', '2000')),
+    chunk_timeout=tts_loop.timeout
+)
+metrics.register_source('tts_planner', tts_planner.stats)
 
 # Inicializar TTS local con manejo silencioso de errores
 fallback_tts = None
@@ -50,12 +90,10 @@ def synthesize_speech():
         
         # Intentar con Edge TTS primero
         if edge_tts.is_available():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
             try:
-                result = loop.run_until_complete(edge_tts.synthesize_speech(text, voice_type, speed))
-            finally:
-                loop.close()
+                result = tts_loop.run(edge_tts.synthesize_speech(text, voice_type, speed))
+            except LoopTimeoutError as e:
+                result = {'success': False, 'error': f'Error en Edge TTS: {e}', 'fallback': True}
             
             if result['success']:
                 return jsonify({
@@ -64,7 +102,8 @@ def synthesize_speech():
                     'file_path': result.get('file_path'),
                     'provider': 'edge-tts',
                     'voice_used': result['voice_used'],
-                    'voice_name': result['voice_used']
+                    'voice_name': result['voice_used'],
+                    'cached': result.get('cached', False)
                 })
             elif not result.get('fallback', False):
                 return jsonify({
@@ -100,6 +139,71 @@ def synthesize_speech():
             'error': 'Error interno del servidor'
         }), 500
 
+def _stream_body(first, rest):
+    """Cuerpo de la respuesta: el primer trozo ya leído y el resto"""
+    try:
+        yield first
+        yield from rest
+    finally:
+        # Si el cliente corta, se cierra la síntesis y se descarta el temporal
+        rest.close()
+
+@tts_bp.route('/api/synthesize-speech/stream', methods=['GET', 'POST'])
+def stream_speech():
+    """
+    Sintetiza con Edge TTS y transmite el MP3 por trozos a medida que se
+    genera: la reproducción empieza sin esperar al audio completo. Lo
+    transmitido se guarda también en la caché de audio. Acepta POST con el
+    mismo JSON que /api/synthesize-speech o GET (?text=&voice_type=&speed=)
+    para usarla directamente como src de un <audio>
+    """
+    data = (request.get_json(silent=True) if request.method == 'POST' else request.args) or {}
+    text = (data.get('text') or '').strip()
+    if not text:
+        return jsonify({
+            'success': False,
+            'error': 'Texto requerido'
+        }), 400
+    try:
+        speed = float(data.get('speed', 1.0))
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'error': 'speed debe ser un número'
+        }), 400
+    
+    voice, rate = edge_tts.voice_and_rate(data.get('voice_type', 'mujer'), speed)
+    key = tts_cache.key(text, 'edge-tts', voice, rate)
+    entry = tts_cache.get(key)
+    if entry:
+        response = send_file(entry['path'], mimetype='audio/mpeg', conditional=True)
+        response.headers['X-TTS-Cache'] = 'hit'
+        return response
+    
+    # Esperar el primer trozo antes de responder: si Edge TTS falla de
+    # entrada, el cliente recibe un error y no un 200 sin audio
+    chunks = tts_loop.iterate(edge_tts.stream_speech(key, text, voice, rate))
+    try:
+        first = next(chunks, None)
+    except Exception as e:
+        chunks.close()
+        return jsonify({
+            'success': False,
+            'error': f'Error en Edge TTS: {str(e)}'
+        }), 502
+    if first is None:
+        return jsonify({
+            'success': False,
+            'error': 'Edge TTS no devolvió audio'
+        }), 502
+    
+    return Response(_stream_body(first, chunks), mimetype='audio/mpeg', headers={
+        'Cache-Control': 'no-store',
+        'X-TTS-Cache': 'miss',
+        # Que un proxy nginx no acumule la respuesta antes de enviarla
+        'X-Accel-Buffering': 'no'
+    })
+
 @tts_bp.route('/api/tts-info', methods=['GET'])
 def get_tts_info():
     """Obtener información sobre los servicios TTS disponibles"""
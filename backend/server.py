@@ -2,7 +2,6 @@ import sys
 import os
 import json
 import uuid
-import sqlite3
 from datetime import datetime, timedelta
 from flask import Flask, request, jsonify, render_template, session, send_from_directory
 from flask_cors import CORS
@@ -14,6 +13,12 @@ import requests
 import docx2txt
 from PyPDF2 import PdfReader
 from dotenv import load_dotenv
+from backend.utils.user_settings import DEFAULT_SETTINGS, validate_settings
+from backend.utils.migrations import run_migrations
+from backend.utils.repository import Repository, SQLiteDriver
+from backend.utils.sqlite_db import SQLiteManager
+from backend.utils.photos import read_variant, parse_variant, photo_fields, URL_HASH_LENGTH
+from backend.utils.http_cache import validator_headers, is_not_modified, not_modified_response
 
 # Cargar variables de entorno
 load_dotenv()
@@ -64,82 +69,54 @@ DB_PATH = os.path.join(os.path.dirname(__file__), 'auris.db')
 JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'auris-jwt-secret-2025')
 JWT_ACCESS_TOKEN_EXPIRES = int(os.environ.get('JWT_ACCESS_TOKEN_EXPIRES', '86400'))
 
+# Modo producción: WAL (lectores concurrentes con un escritor), una conexión
+# reutilizable por hilo y espera ante bloqueos en lugar de "database is locked"
+sqlite_db = SQLiteManager(
+    DB_PATH,
+    busy_timeout_ms=int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    statement_cache=int(os.environ.get('SQLITE_STATEMENT_CACHE', '256')),
+    pragmas={
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', '20000')),
+        'temp_store': 'MEMORY'
+    }
+)
+
 def get_db_connection():
-    """Función para obtener conexión a SQLite"""
+    """Obtener la conexión SQLite del hilo actual (close() no la cierra, la deja lista)"""
     try:
-        connection = sqlite3.connect(DB_PATH)
-        connection.row_factory = sqlite3.Row  # Para acceder por nombre de columna
-        return connection
+        return sqlite_db.get()
     except Exception as e:
         print(f"Error conectando a SQLite: {e}")
         return None
 
 def init_database():
-    """Inicializar base de datos y crear tablas si no existen"""
+    """Aplicar las migraciones de esquema pendientes (no hace nada si está al día)"""
     connection = None
-    cursor = None
     try:
         connection = get_db_connection()
         if not connection:
             return False
-            
-        cursor = connection.cursor()
-        
-        # Crear tabla de usuarios
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS Usuarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre_usuario TEXT NOT NULL UNIQUE,
-                correo_electronico TEXT NOT NULL UNIQUE,
-                contraseña TEXT NOT NULL,
-                foto_perfil TEXT DEFAULT NULL,
-                creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Crear tabla de configuraciones de usuario
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS Configuraciones_Usuario (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                usuario_id INTEGER,
-                tipo_voz TEXT DEFAULT 'mujer',
-                velocidad_lectura REAL DEFAULT 1.0,
-                tamaño_fuente TEXT DEFAULT 'medium',
-                contraste_alto BOOLEAN DEFAULT FALSE,
-                retroalimentacion_audio BOOLEAN DEFAULT TRUE,
-                actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
-            )
-        """)
         
-        # Crear tabla de documentos
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS Documentos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                usuario_id INTEGER,
-                titulo TEXT NOT NULL,
-                contenido TEXT,
-                tipo_archivo TEXT,
-                creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
-            )
-        """)
-        
-        connection.commit()
-        print("✅ Base de datos SQLite inicializada correctamente")
+        aplicadas = run_migrations(connection, 'sqlite')
+        if aplicadas:
+            print(f"✅ Base de datos SQLite migrada a la versión {aplicadas[-1]}")
+        else:
+            print("✅ Base de datos SQLite al día")
         return True
         
     except Exception as e:
         print(f"Error inicializando base de datos: {e}")
         return False
     finally:
-        if cursor:
-            cursor.close()
         if connection:
             connection.close()
 
+# Mismas consultas que app.py (MySQL), traducidas a SQLite
+repository = Repository(SQLiteDriver())
+
 # ===== RUTAS DE AUTENTICACIÓN =====
 
 @app.route('/api/register', methods=['POST'])
@@ -166,38 +143,27 @@ def register():
         return jsonify({'error': 'Correo electrónico inválido'}), 400
     
     connection = None
-    cursor = None
     try:
         connection = get_db_connection()
         if not connection:
             return jsonify({'error': 'Error de conexión a la base de datos'}), 500
-            
-        cursor = connection.cursor()
         
         # Verificar si el usuario ya existe
-        cursor.execute("SELECT id FROM Usuarios WHERE correo_electronico = ? OR nombre_usuario = ?", 
-                      (correo_electronico, nombre_usuario))
-        if cursor.fetchone():
+        if repository.user_exists(connection, correo_electronico, nombre_usuario):
             return jsonify({'error': 'El usuario o correo ya existe'}), 409
         
-        # Encriptar contraseña
+        # Encriptar contraseña (fuera de la transacción de escritura)
         hashed_password = bcrypt.hashpw(contraseña.encode('utf-8'), bcrypt.gensalt())
         
-        # Insertar nuevo usuario
-        cursor.execute("""
-            INSERT INTO Usuarios (nombre_usuario, correo_electronico, contraseña) 
-            VALUES (?, ?, ?)
-        """, (nombre_usuario, correo_electronico, hashed_password.decode('utf-8')))
-        
-        user_id = cursor.lastrowid
+        def create(connection):
+            # Insertar nuevo usuario y sus configuraciones predeterminadas
+            user_id = repository.create_user(connection, nombre_usuario, correo_electronico,
+                                             hashed_password.decode('utf-8'))
+            repository.save_settings(connection, user_id, DEFAULT_SETTINGS)
+            return user_id
         
-        # Crear configuraciones predeterminadas para el usuario
-        cursor.execute("""
-            INSERT INTO Configuraciones_Usuario (usuario_id, tipo_voz, velocidad_lectura, tamaño_fuente, contraste_alto, retroalimentacion_audio) 
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (user_id, 'mujer', 1.0, 'medium', False, True))
-        
-        connection.commit()
+        # Si la base sigue bloqueada tras el busy timeout, se reintenta
+        user_id = sqlite_db.run_write(create)
         
         return jsonify({
             'status': 'success',
@@ -209,8 +175,6 @@ def register():
         print(f"Error en registro: {e}")  # Para debugging
         return jsonify({'error': f'Error interno: {str(e)}'}), 500
     finally:
-        if cursor:
-            cursor.close()
         if connection:
             connection.close()
 
@@ -226,24 +190,17 @@ def login():
     contraseña = data['contraseña']
     
     connection = None
-    cursor = None
     try:
         connection = get_db_connection()
         if not connection:
             return jsonify({'error': 'Error de conexión a la base de datos'}), 500
-            
-        cursor = connection.cursor()
         
         # Buscar usuario
-        cursor.execute("SELECT * FROM Usuarios WHERE correo_electronico = ?", (correo_electronico,))
-        usuario = cursor.fetchone()
+        usuario_dict = repository.find_user_by_email(connection, correo_electronico)
         
-        if not usuario:
+        if not usuario_dict:
             return jsonify({'error': 'Credenciales inválidas'}), 401
         
-        # Convertir Row a dict
-        usuario_dict = dict(usuario)
-        
         # Verificar contraseña
         if not bcrypt.checkpw(contraseña.encode('utf-8'), usuario_dict['contraseña'].encode('utf-8')):
             return jsonify({'error': 'Credenciales inválidas'}), 401
@@ -256,9 +213,7 @@ def login():
         token = jwt.encode(payload, JWT_SECRET_KEY, algorithm='HS256')
         
         # Obtener configuraciones del usuario
-        cursor.execute("SELECT * FROM Configuraciones_Usuario WHERE usuario_id = ?", (usuario_dict['id'],))
-        configuraciones = cursor.fetchone()
-        configuraciones_dict = dict(configuraciones) if configuraciones else None
+        configuraciones_dict = repository.load_settings(connection, usuario_dict['id'])
         
         return jsonify({
             'status': 'success',
@@ -268,7 +223,7 @@ def login():
                 'id': usuario_dict['id'],
                 'nombre_usuario': usuario_dict['nombre_usuario'],
                 'correo_electronico': usuario_dict['correo_electronico'],
-                'foto_perfil': usuario_dict['foto_perfil']
+                **photo_fields(usuario_dict['id'], usuario_dict['foto_hash'])
             },
             'configuraciones': configuraciones_dict
         }), 200
@@ -277,8 +232,6 @@ def login():
         print(f"Error en login: {e}")  # Para debugging
         return jsonify({'error': f'Error interno: {str(e)}'}), 500
     finally:
-        if cursor:
-            cursor.close()
         if connection:
             connection.close()
 
@@ -321,36 +274,18 @@ def auth_required(f):
 def get_user_config():
     """Obtener configuración del usuario"""
     connection = None
-    cursor = None
     try:
         connection = get_db_connection()
         if not connection:
             return jsonify({'error': 'Error de conexión a la base de datos'}), 500
-            
-        cursor = connection.cursor()
         
-        # Obtener datos del usuario
-        cursor.execute("SELECT id, nombre_usuario, correo_electronico, foto_perfil FROM Usuarios WHERE id = ?", (request.user_id,))
-        usuario = cursor.fetchone()
-        usuario_dict = dict(usuario) if usuario else None
+        # Obtener datos del usuario (la foto como URL, sin los bytes)
+        usuario_dict = repository.get_user_profile(connection, request.user_id)
+        if usuario_dict:
+            usuario_dict.update(photo_fields(usuario_dict['id'], usuario_dict.pop('foto_hash')))
         
         # Obtener configuraciones
-        cursor.execute("SELECT * FROM Configuraciones_Usuario WHERE usuario_id = ?", (request.user_id,))
-        configuraciones = cursor.fetchone()
-        
-        if not configuraciones:
-            # Crear configuraciones predeterminadas si no existen
-            cursor.execute("""
-                INSERT INTO Configuraciones_Usuario (usuario_id, tipo_voz, velocidad_lectura, tamaño_fuente, contraste_alto, retroalimentacion_audio) 
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (request.user_id, 'mujer', 1.0, 'medium', False, True))
-            
-            connection.commit()
-            
-            cursor.execute("SELECT * FROM Configuraciones_Usuario WHERE usuario_id = ?", (request.user_id,))
-            configuraciones = cursor.fetchone()
-        
-        configuraciones_dict = dict(configuraciones) if configuraciones else None
+        configuraciones_dict = repository.load_settings(connection, request.user_id)
         
         return jsonify({
             'status': 'success',
@@ -361,8 +296,6 @@ def get_user_config():
     except Exception as e:
         return jsonify({'error': f'Error de base de datos: {str(e)}'}), 500
     finally:
-        if cursor:
-            cursor.close()
         if connection:
             connection.close()
 
@@ -370,46 +303,20 @@ def get_user_config():
 @auth_required
 def update_user_config():
     """Actualizar configuración del usuario"""
-    data = request.json
+    try:
+        configuraciones = validate_settings(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     connection = None
-    cursor = None
     try:
         connection = get_db_connection()
         if not connection:
             return jsonify({'error': 'Error de conexión a la base de datos'}), 500
-            
-        cursor = connection.cursor()
-        
-        # Actualizar configuraciones
-        update_fields = []
-        values = []
-        
-        if 'tipo_voz' in data:
-            update_fields.append("tipo_voz = ?")
-            values.append(data['tipo_voz'])
-        
-        if 'velocidad_lectura' in data:
-            update_fields.append("velocidad_lectura = ?")
-            values.append(float(data['velocidad_lectura']))
-        
-        if 'tamaño_fuente' in data:
-            update_fields.append("tamaño_fuente = ?")
-            values.append(data['tamaño_fuente'])
-        
-        if 'contraste_alto' in data:
-            update_fields.append("contraste_alto = ?")
-            values.append(bool(data['contraste_alto']))
         
-        if 'retroalimentacion_audio' in data:
-            update_fields.append("retroalimentacion_audio = ?")
-            values.append(bool(data['retroalimentacion_audio']))
-        
-        if update_fields:
-            values.append(request.user_id)
-            query = f"UPDATE Configuraciones_Usuario SET {', '.join(update_fields)} WHERE usuario_id = ?"
-            cursor.execute(query, values)
-            connection.commit()
+        # Fusionar las configuraciones en el documento del usuario (una sola fila)
+        sqlite_db.run_write(lambda connection: repository.save_settings(
+            connection, request.user_id, configuraciones))
         
         return jsonify({
             'status': 'success',
@@ -419,8 +326,6 @@ def update_user_config():
     except Exception as e:
         return jsonify({'error': f'Error de base de datos: {str(e)}'}), 500
     finally:
-        if cursor:
-            cursor.close()
         if connection:
             connection.close()
 
@@ -499,6 +404,40 @@ def leer_archivo():
     except Exception as e:
         return jsonify({'error': f'Error al leer el archivo: {e}'}), 500
 
+@app.route('/api/users/<int:user_id>/photo', methods=['GET'])
+def get_user_photo(user_id):
+    """Obtener una miniatura de la foto de perfil (ver app.py)"""
+    try:
+        variant = parse_variant(request.args.get('size'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    version = request.args.get('v', '')
+    
+    connection = None
+    try:
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+        
+        row = read_variant(connection.cursor(), user_id, variant, '?')
+        if not row or len(version) < URL_HASH_LENGTH or not row[0].startswith(version):
+            return jsonify({'error': 'Foto no encontrada'}), 404
+        
+        _, tipo_mime, hash_variante, datos = row
+        headers = {'Cache-Control': 'private, max-age=31536000, immutable'}
+        if is_not_modified(request, hash_variante):
+            return not_modified_response(hash_variante, None, headers)
+        
+        response = app.response_class(bytes(datos), mimetype=tipo_mime)
+        response.headers.update({**headers, **validator_headers(hash_variante)})
+        return response, 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Error de base de datos: {str(e)}'}), 500
+    finally:
+        if connection:
+            connection.close()
+
 # ===== RUTAS DE HEALTH CHECK =====
 
 @app.route('/health')
@@ -0,0 +1,308 @@
+"""
+Almacén de audio de documentos
+Los bytes del audio viven fuera de la tabla Documentos, en un almacén
+intercambiable (sistema de archivos por defecto); la base de datos solo
+guarda los metadatos en Audios_Documento
+"""
+import copy
+import hashlib
+import os
+import uuid
+from datetime import datetime
+
+from backend.utils.mp3 import duration_ms
+
+# Bloques de transmisión que se leen de la base en cada consulta (con
+# bloques de 64 KB, ventanas de 1 MB)
+DEFAULT_WINDOW_CHUNKS = 16
+
+
+class FilesystemAudioStore:
+    """Guarda cada audio como un archivo bajo un directorio raíz"""
+
+    name = 'filesystem'
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key):
+        """Ruta absoluta de una clave (sin salir del directorio raíz)"""
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise ValueError(f'Clave de audio inválida: {key}')
+        return path
+
+    def put(self, key, data):
+        """Escribe el audio de forma atómica (archivo temporal + rename)"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def size(self, key):
+        return os.path.getsize(self.path(key))
+
+    def read(self, key, start=0, length=None):
+        """Lee `length` bytes desde `start` (todo el resto si length es None)"""
+        with open(self.path(key), 'rb') as f:
+            f.seek(start)
+            return f.read() if length is None else f.read(length)
+
+    def iter_range(self, key, start, end, chunk_size):
+        """Itera en bloques el rango inclusivo [start, end] con un solo archivo abierto"""
+        with open(self.path(key), 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def for_reads(self, read_acquire):
+        """Los archivos no dependen de la conexión: el mismo almacén"""
+        return self
+
+
+class DatabaseAudioStore:
+    """Guarda el audio en la tabla Audio_Blobs, separada de Documentos"""
+
+    name = 'database'
+
+    def __init__(self, acquire, placeholder='%s', read_acquire=None, window_chunks=DEFAULT_WINDOW_CHUNKS):
+        """
+        Args:
+            acquire (callable): Devuelve una conexión; close() la libera
+            placeholder (str): Marcador de parámetros del driver
+            read_acquire (callable, optional): Conexión para lecturas (réplica);
+                si la réplica aún no tiene el audio se lee de `acquire`
+            window_chunks (int): Bloques leídos por consulta al transmitir
+        """
+        self.acquire = acquire
+        self.window_chunks = max(1, int(window_chunks))
+        self.read_acquire = read_acquire
+        self.placeholder = placeholder
+
+    def for_reads(self, read_acquire):
+        """
+        Copia del almacén que lee con `read_acquire`, p. ej. una conexión
+        ligada al usuario de la petición que siga valiendo al transmitir
+        """
+        store = copy.copy(self)
+        store.read_acquire = read_acquire
+        return store
+
+    def _fetch(self, query, params):
+        """Lee una fila, primero de la réplica y si falta de la principal"""
+        if self.read_acquire is not None:
+            row = self._execute(query, params, fetch=True, acquire=self.read_acquire)
+            if row is not None:
+                return row
+        return self._execute(query, params, fetch=True)
+
+    def _execute(self, query, params, fetch=False, commit=False, acquire=None):
+        connection = (acquire or self.acquire)()
+        if connection is None:
+            raise RuntimeError('Sin conexión a la base de datos')
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query.replace('%s', self.placeholder), params)
+            result = cursor.fetchone() if fetch else None
+            if commit:
+                connection.commit()
+            return result
+        finally:
+            cursor.close()
+            connection.close()
+
+    def put(self, key, data):
+        """Sustituye el audio de una clave en una sola transacción"""
+        connection = self.acquire()
+        if connection is None:
+            raise RuntimeError('Sin conexión a la base de datos')
+        cursor = connection.cursor()
+        try:
+            cursor.execute("DELETE FROM Audio_Blobs WHERE clave = %s".replace('%s', self.placeholder), (key,))
+            cursor.execute("INSERT INTO Audio_Blobs (clave, datos) VALUES (%s, %s)".replace('%s', self.placeholder),
+                           (key, data))
+            connection.commit()
+        except BaseException:
+            # Si falla el INSERT no se pierde el audio anterior
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+            connection.close()
+
+    def exists(self, key):
+        return self._fetch("SELECT 1 FROM Audio_Blobs WHERE clave = %s", (key,)) is not None
+
+    def size(self, key):
+        row = self._fetch("SELECT LENGTH(datos) FROM Audio_Blobs WHERE clave = %s", (key,))
+        if row is None:
+            raise FileNotFoundError(key)
+        return row[0]
+
+    def read(self, key, start=0, length=None):
+        """Lee un fragmento con SUBSTRING para no cargar el BLOB entero"""
+        if length is None:
+            length = self.size(key) - start
+        row = self._fetch("SELECT SUBSTR(datos, %s, %s) FROM Audio_Blobs WHERE clave = %s",
+                          (start + 1, length, key))
+        if row is None:
+            raise FileNotFoundError(key)
+        return bytes(row[0] or b'')
+
+    def iter_range(self, key, start, end, chunk_size):
+        """
+        Itera en bloques el rango inclusivo [start, end]. Se lee por ventanas
+        de window_chunks bloques, cada una con una consulta SUBSTR y una
+        conexión que se devuelve antes de entregar sus bloques: la memoria
+        usada no depende del tamaño del BLOB y la conexión no queda ocupada
+        mientras el cliente descarga
+        """
+        window = chunk_size * self.window_chunks
+        position = start
+        while position <= end:
+            data = memoryview(self.read(key, position, min(window, end - position + 1)))
+            if not data:
+                break
+            for offset in range(0, len(data), chunk_size):
+                yield bytes(data[offset:offset + chunk_size])
+            position += len(data)
+
+    def delete(self, key):
+        self._execute("DELETE FROM Audio_Blobs WHERE clave = %s", (key,), commit=True)
+
+
+def new_audio_key(name):
+    """
+    Clave nueva para un audio. Nunca se reutiliza una clave existente: así
+    escribir el audio no pisa el de otro documento ni el anterior del mismo,
+    que solo se borra cuando la transacción que lo sustituye se confirma
+
+    Args:
+        name (str): Prefijo legible (título o documento_<id>)
+
+    Returns:
+        str: Clave única terminada en .mp3
+    """
+    return f"{name}_{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}.mp3"
+
+
+def describe_audio(data, tipo_mime='audio/mpeg'):
+    """
+    Calcula los metadatos que se guardan en Audios_Documento
+
+    Returns:
+        dict: tamano_bytes, duracion_ms y hash_sha256
+    """
+    return {
+        'tamano_bytes': len(data),
+        'duracion_ms': duration_ms(data) if tipo_mime == 'audio/mpeg' else None,
+        'hash_sha256': hashlib.sha256(data).hexdigest()
+    }
+
+
+def save_document_audio(cursor, store, document_id, key, data, tipo_mime='audio/mpeg', placeholder='%s'):
+    """
+    Guarda el audio de un documento en el almacén y registra sus metadatos.
+    Los bytes se escriben fuera de la transacción del cursor: si esta no se
+    confirma, quien llama debe borrar la clave del almacén
+
+    Args:
+        cursor: Cursor de la conexión de la petición
+        store: Almacén donde escribir los bytes
+        document_id (int): Documento al que pertenece
+        key (str): Clave (nombre) del audio en el almacén
+        data (bytes): Contenido del audio
+        tipo_mime (str): Tipo MIME
+
+    Returns:
+        dict: Metadatos guardados
+    """
+    info = describe_audio(data, tipo_mime)
+    store.put(key, data)
+
+    p = placeholder
+    cursor.execute(f"DELETE FROM Audios_Documento WHERE documento_id = {p}", (document_id,))
+    cursor.execute(f"""
+        INSERT INTO Audios_Documento (documento_id, almacen, ubicacion, tipo_mime,
+                                      tamano_bytes, duracion_ms, hash_sha256)
+        VALUES ({p}, {p}, {p}, {p}, {p}, {p}, {p})
+    """, (document_id, store.name, key, tipo_mime,
+          info['tamano_bytes'], info['duracion_ms'], info['hash_sha256']))
+    cursor.execute(f"UPDATE Documentos SET tiene_audio = 1, actualizado_en = actualizado_en WHERE id = {p}",
+                   (document_id,))
+    return info
+
+
+def migrate_legacy_audio(connection, store, batch_size=20, placeholder='%s'):
+    """
+    Mueve al almacén el audio guardado en Documentos.archivo_audio (o en el
+    archivo nombre_archivo del directorio de audio) y vacía la columna.
+    Procesa un documento a la vez para no cargar varios BLOB en memoria;
+    puede ejecutarse varias veces.
+
+    Returns:
+        int: Documentos migrados
+    """
+    p = placeholder
+    migrated = 0
+    last_id = 0
+    cursor = connection.cursor()
+    try:
+        while True:
+            cursor.execute(f"""
+                SELECT id, nombre_archivo, tipo_mime FROM Documentos
+                WHERE tiene_audio = 0 AND (archivo_audio IS NOT NULL OR nombre_archivo IS NOT NULL)
+                  AND id > {p}
+                ORDER BY id LIMIT {int(batch_size)}
+            """, (last_id,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            for document_id, nombre_archivo, tipo_mime in rows:
+                last_id = document_id
+                key = nombre_archivo or f"documento_{document_id}.mp3"
+                tipo_mime = tipo_mime or 'audio/mpeg'
+
+                if isinstance(store, FilesystemAudioStore) and nombre_archivo and store.exists(key):
+                    # El archivo ya está en el directorio del almacén
+                    with open(store.path(key), 'rb') as f:
+                        data = f.read()
+                else:
+                    cursor.execute(f"SELECT archivo_audio FROM Documentos WHERE id = {p}", (document_id,))
+                    row = cursor.fetchone()
+                    data = row[0] if row else None
+                    if not data:
+                        continue
+
+                save_document_audio(cursor, store, document_id, key, bytes(data), tipo_mime, placeholder)
+                cursor.execute(f"""
+                    UPDATE Documentos SET archivo_audio = NULL, nombre_archivo = {p},
+                                          actualizado_en = actualizado_en
+                    WHERE id = {p}
+                """, (key, document_id))
+                connection.commit()
+                migrated += 1
+
+            if len(rows) < batch_size:
+                break
+        return migrated
+    finally:
+        cursor.close()
@@ -9,10 +9,23 @@ import asyncio
 import edge_tts
 from datetime import datetime
 
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
 class EdgeTTSService:
     """Servicio para síntesis de voz usando Edge TTS"""
     
-    def __init__(self):
+    def __init__(self, cache=None, flight=None):
+        """
+        Args:
+            cache (TTSCache, optional): Caché de audio por contenido; sin
+                ella cada síntesis genera un archivo nuevo
+            flight (SingleFlight, optional): Agrupa las síntesis idénticas
+                en curso (solo con caché)
+        """
+        self.cache = cache
+        self.flight = flight
         self.audio_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'frontend', 'static', 'assets', 'audio')
         os.makedirs(self.audio_dir, exist_ok=True)
         
@@ -32,6 +45,26 @@ class EdgeTTSService:
         """Verificar si el servicio está disponible"""
         return True  # Edge TTS siempre está disponible
     
+    def voice_and_rate(self, voice_type='mujer', speed=1.0):
+        """
+        Voz y velocidad en el formato de Edge TTS
+        
+        Returns:
+            tuple: (nombre de la voz, velocidad como porcentaje, p. ej. '+25%')
+        """
+        # Seleccionar voz según el tipo
+        voice = self.voice_mapping.get(voice_type, 'es-ES-ElviraNeural')
+        
+        # Ajustar velocidad (Edge TTS acepta formato de porcentaje)
+        speed_percent = int((speed - 1) * 100)
+        if speed_percent > 0:
+            rate = f"+{speed_percent}%"
+        elif speed_percent < 0:
+            rate = f"{speed_percent}%"
+        else:
+            rate = "+0%"
+        return voice, rate
+    
     async def synthesize_speech(self, text, voice_type='mujer', speed=1.0):
         """
         Sintetizar texto a voz usando Edge TTS
@@ -45,17 +78,10 @@ class EdgeTTSService:
             dict: Resultado con la URL del archivo de audio o error
         """
         try:
-            # Seleccionar voz según el tipo
-            voice = self.voice_mapping.get(voice_type, 'es-ES-ElviraNeural')
+            voice, rate = self.voice_and_rate(voice_type, speed)
             
-            # Ajustar velocidad (Edge TTS acepta formato de porcentaje)
-            speed_percent = int((speed - 1) * 100)
-            if speed_percent > 0:
-                rate = f"+{speed_percent}%"
-            elif speed_percent < 0:
-                rate = f"{speed_percent}%"
-            else:
-                rate = "+0%"
+            if self.cache:
+                return await self._synthesize_cached(text, voice, rate)
             
             # Generar nombre único para el archivo
             filename = f"edge_tts_{uuid.uuid4().hex[:8]}_{int(datetime.now().timestamp())}.mp3"
@@ -85,6 +111,104 @@ class EdgeTTSService:
                 'fallback': True
             }
     
+    async def _synthesize_cached(self, text, voice, rate):
+        """Sintetiza solo si el mismo texto, voz y velocidad no están en la caché"""
+        key = self.cache.key(text, 'edge-tts', voice, rate)
+        entry = self.cache.get(key)
+        cached = entry is not None
+        if not cached and self.flight:
+            # Las peticiones idénticas simultáneas esperan a la primera; si
+            # otro worker acaba de sintetizarlo, se encuentra en la caché
+            entry, cached = await self.flight.run(
+                key,
+                lambda: self._render(key, text, voice, rate),
+                check=lambda: self._cached_entry(key)
+            )
+        elif not cached:
+            entry, cached = await self._render(key, text, voice, rate)
+        
+        return {
+            'success': True,
+            'audio_url': entry['url'],
+            'file_path': entry['path'],
+            'voice_used': voice,
+            'provider': 'edge-tts',
+            'cached': cached
+        }
+    
+    async def synthesize_audio(self, text, voice, rate, use_cache=True):
+        """
+        Sintetiza un texto y devuelve los bytes MP3
+        
+        Args:
+            text (str): Texto a sintetizar
+            voice (str): Voz de Edge TTS
+            rate (str): Velocidad de Edge TTS
+            use_cache (bool): Pasar por la caché de audio si la hay; los
+                fragmentos de documentos no la usan para no desplazar las
+                frases cortas que se repiten
+        
+        Returns:
+            bytes: Audio MP3
+        """
+        if self.cache and use_cache:
+            result = await self._synthesize_cached(text, voice, rate)
+            return await asyncio.to_thread(_read_file, result['file_path'])
+        chunks = []
+        async for chunk in edge_tts.Communicate(text, voice, rate=rate).stream():
+            if chunk['type'] == 'audio':
+                chunks.append(chunk['data'])
+        return b''.join(chunks)
+    
+    async def _render(self, key, text, voice, rate):
+        """Sintetiza en un temporal y lo guarda en la caché"""
+        temp_path = self.cache.temp_path(key)
+        try:
+            await edge_tts.Communicate(text, voice, rate=rate).save(temp_path)
+            return self.cache.commit(key, temp_path), False
+        except BaseException:
+            self.cache.discard(temp_path)
+            raise
+    
+    async def stream_speech(self, key, text, voice, rate):
+        """
+        Sintetiza y entrega el MP3 a trozos según llega de Edge TTS, a la vez
+        que lo escribe en un temporal que se guarda en la caché al terminar.
+        Si el cliente corta antes, el temporal se descarta
+        
+        Args:
+            key (str, optional): Clave de caché; sin ella no se guarda nada
+            text (str): Texto a sintetizar
+            voice (str): Voz de Edge TTS
+            rate (str): Velocidad de Edge TTS
+        
+        Yields:
+            bytes: Trozos de audio MP3
+        """
+        temp_path = self.cache.temp_path(key) if self.cache and key else None
+        temp_file = open(temp_path, 'wb') if temp_path else None
+        written = 0
+        try:
+            async for chunk in edge_tts.Communicate(text, voice, rate=rate).stream():
+                if chunk['type'] != 'audio':
+                    continue
+                if temp_file:
+                    temp_file.write(chunk['data'])
+                written += len(chunk['data'])
+                yield chunk['data']
+            if temp_file and written:
+                temp_file.close()
+                self.cache.commit(key, temp_path)
+                temp_file = None
+        finally:
+            if temp_file:
+                temp_file.close()
+                self.cache.discard(temp_path)
+    
+    def _cached_entry(self, key):
+        entry = self.cache.get(key)
+        return (entry, True) if entry else None
+    
     def get_voice_info(self):
         """Obtener información sobre las voces disponibles"""
         return {
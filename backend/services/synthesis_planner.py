@@ -0,0 +1,204 @@
+"""
+Síntesis de documentos largos por fragmentos
+El texto se divide en fragmentos del tamaño que acepta el proveedor, por
+párrafos y frases; los fragmentos se sintetizan en paralelo con un límite
+de concurrencia, cada uno con sus propios reintentos, y sus frames MP3 se
+unen en orden en un único audio. El tiempo total depende del límite de
+concurrencia y no de la longitud del documento
+"""
+import asyncio
+import re
+import threading
+import time
+
+from backend.utils.mp3 import join_frames
+
+# Caracteres máximos por petición al proveedor
+DEFAULT_CHUNK_CHARS = 2000
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RETRIES = 2
+# Segundos máximos de cada intento de un fragmento
+DEFAULT_CHUNK_TIMEOUT = 60
+# Espera antes del primer reintento; se duplica en cada uno
+RETRY_BACKOFF = 0.5
+
+_PARAGRAPHS = re.compile(r'\n\s*\n')
+# Fin de frase: signo final (y comillas o paréntesis de cierre) seguido de espacio
+_SENTENCE_END = re.compile(r'[.!?…]["»”’)\]]*(\s+)')
+
+
+def _sentences(paragraph):
+    """Frases de un párrafo, con su puntuación y comillas de cierre"""
+    start = 0
+    for match in _SENTENCE_END.finditer(paragraph):
+        yield paragraph[start:match.start(1)]
+        start = match.end()
+    if start < len(paragraph):
+        yield paragraph[start:]
+
+
+def _split_long(sentence, max_chars):
+    """Parte una frase demasiado larga por comas o, si no basta, por palabras"""
+    pieces = []
+    current = ''
+    for word in re.split(r'(?<=[,;:])\s+|\s+', sentence):
+        candidate = f'{current} {word}' if current else word
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        # Una "palabra" más larga que el límite se corta sin más
+        while len(word) > max_chars:
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+        current = word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_text(text, max_chars=DEFAULT_CHUNK_CHARS):
+    """
+    Divide un texto en fragmentos de como mucho max_chars caracteres,
+    cortando preferentemente entre párrafos y, dentro de ellos, entre frases
+
+    Args:
+        text (str): Texto completo
+        max_chars (int): Tamaño máximo de cada fragmento
+
+    Returns:
+        list: Fragmentos en orden, sin vacíos
+    """
+    chunks = []
+    current = ''
+    for paragraph in _PARAGRAPHS.split(text):
+        paragraph = ' '.join(paragraph.split())
+        if not paragraph:
+            continue
+        # Un párrafo que cabe entero en el fragmento en curso va junto
+        candidate = f'{current}\n\n{paragraph}' if current else paragraph
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        # Si cabe solo, empieza fragmento nuevo; si no, se parte por frases
+        if len(paragraph) <= max_chars:
+            chunks.append(current)
+            current = paragraph
+            continue
+        for sentence in _sentences(paragraph):
+            for piece in ([sentence] if len(sentence) <= max_chars else _split_long(sentence, max_chars)):
+                candidate = f'{current} {piece}' if current else piece
+                if len(candidate) <= max_chars:
+                    current = candidate
+                else:
+                    chunks.append(current)
+                    current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class SynthesisPlanner:
+    """Sintetiza textos largos por fragmentos en paralelo"""
+
+    def __init__(self, service, concurrency=DEFAULT_CONCURRENCY, max_chars=DEFAULT_CHUNK_CHARS,
+                 retries=DEFAULT_RETRIES, chunk_timeout=DEFAULT_CHUNK_TIMEOUT):
+        """
+        Args:
+            service (EdgeTTSService): Servicio que sintetiza cada fragmento
+            concurrency (int): Fragmentos sintetizándose a la vez por documento
+            max_chars (int): Caracteres máximos por fragmento
+            retries (int): Reintentos de cada fragmento que falla
+            chunk_timeout (float): Segundos máximos de cada intento
+        """
+        self.service = service
+        self.concurrency = max(1, concurrency)
+        self.max_chars = max_chars
+        self.retries = retries
+        self.chunk_timeout = chunk_timeout
+        self._lock = threading.Lock()
+        self._stats = {'documents': 0, 'failed_documents': 0, 'chunks': 0, 'retries': 0,
+                       'failed_chunks': 0, 'last_ms': 0, 'last_chunks': 0}
+
+    def _count(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                self._stats[name] += value
+
+    async def _synthesize_chunk(self, semaphore, text, voice, rate):
+        """
+        Sintetiza un fragmento con reintentos y espera creciente. El
+        fragmento ocupa un hueco de concurrencia solo mientras llama al
+        proveedor, no durante la espera entre intentos. No pasa por la caché
+        de audio: el audio del documento ya se guarda en su almacén
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    return await asyncio.wait_for(
+                        self.service.synthesize_audio(text, voice, rate, use_cache=False), self.chunk_timeout)
+            except Exception as e:
+                if attempt == self.retries:
+                    self._count(failed_chunks=1)
+                    raise
+                self._count(retries=1)
+                print(f"⚠️ Reintentando fragmento de síntesis ({attempt + 1}/{self.retries}): {e}")
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    async def synthesize(self, text, voice_type='mujer', speed=1.0):
+        """
+        Sintetiza un texto completo
+
+        Args:
+            text (str): Texto del documento
+            voice_type (str): Tipo de voz ('mujer' o 'hombre')
+            speed (float): Velocidad de lectura
+
+        Returns:
+            bytes: Audio MP3 del texto completo
+
+        Raises:
+            ValueError: Si el texto está vacío
+            La excepción del fragmento que falló tras agotar sus reintentos
+        """
+        chunks = split_text(text, self.max_chars)
+        if not chunks:
+            raise ValueError('El texto no puede estar vacío')
+        voice, rate = self.service.voice_and_rate(voice_type, speed)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        start = time.perf_counter()
+
+        tasks = [asyncio.ensure_future(self._synthesize_chunk(semaphore, chunk, voice, rate)) for chunk in chunks]
+        try:
+            parts = await asyncio.gather(*tasks)
+        except BaseException:
+            # Un fragmento falló del todo: el resto ya no sirve
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._count(failed_documents=1)
+            raise
+
+        audio = parts[0] if len(parts) == 1 else join_frames(parts)
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+        with self._lock:
+            self._stats['documents'] += 1
+            self._stats['chunks'] += len(chunks)
+            self._stats['last_ms'] = elapsed_ms
+            self._stats['last_chunks'] = len(chunks)
+        return audio
+
+    def stats(self):
+        """
+        Obtiene estadísticas de la síntesis por fragmentos
+
+        Returns:
+            dict: Documentos y fragmentos sintetizados, reintentos, fallos y
+            duración del último documento
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['concurrency'] = self.concurrency
+        stats['max_chars'] = self.max_chars
+        return stats
@@ -0,0 +1,195 @@
+"""
+Bucle asyncio persistente en un hilo de fondo
+Los manejadores de Flask son síncronos; en lugar de crear y cerrar un bucle
+en cada petición, cada worker mantiene un único bucle en un hilo propio y le
+envía las corrutinas con un tiempo máximo. Lo que vive en el bucle (sesiones
+HTTP, cachés de DNS de los clientes de TTS) se conserva entre peticiones
+"""
+import asyncio
+import concurrent.futures
+import os
+import threading
+
+DEFAULT_TIMEOUT = 60
+
+# Cada cuánto se mide el retraso del bucle (segundos)
+LAG_INTERVAL = 1.0
+
+
+class LoopTimeoutError(TimeoutError):
+    """La corrutina no terminó en el tiempo máximo y se canceló"""
+
+
+_END = object()
+
+
+async def _next_item(agen):
+    """Siguiente elemento de un generador asíncrono, o _END si ha terminado"""
+    try:
+        return await agen.__anext__()
+    except StopAsyncIteration:
+        return _END
+
+
+class BackgroundLoop:
+    """Bucle de eventos en un hilo daemon, arrancado en el primer uso"""
+
+    def __init__(self, name, timeout=DEFAULT_TIMEOUT):
+        """
+        Args:
+            name (str): Nombre del hilo
+            timeout (float): Segundos máximos por defecto de cada corrutina
+        """
+        self.name = name
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self._stats = {'submitted': 0, 'completed': 0, 'errors': 0, 'timeouts': 0, 'closed': 0,
+                       'restarts': 0}
+        self._lag = {'lag_ms': 0.0, 'max_lag_ms': 0.0, 'tasks': 0}
+
+    def _ensure_started(self):
+        """Arranca el hilo si no existe (o si el proceso es un fork del que lo creó)"""
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return self._loop
+            if self._pid is not None:
+                self._stats['restarts'] += 1
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            thread = threading.Thread(target=self._run, args=(loop, ready), name=self.name, daemon=True)
+            thread.start()
+            ready.wait()
+            self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            return loop
+
+    def _run(self, loop, ready):
+        asyncio.set_event_loop(loop)
+        loop.create_task(self._monitor())
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    async def _monitor(self):
+        """Mide cuánto tarda el bucle en despertar respecto a lo previsto"""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            lag = max(0.0, (loop.time() - start - LAG_INTERVAL) * 1000)
+            # El monitor también es una tarea: no se cuenta
+            tasks = len(asyncio.all_tasks(loop)) - 1
+            with self._lock:
+                self._lag['lag_ms'] = round(lag, 2)
+                self._lag['max_lag_ms'] = round(max(self._lag['max_lag_ms'], lag), 2)
+                self._lag['tasks'] = tasks
+
+    def submit(self, coro):
+        """
+        Envía una corrutina al bucle sin esperar
+
+        Returns:
+            concurrent.futures.Future: Resultado de la corrutina
+        """
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def _wait(self, future, timeout):
+        """Espera un resultado del bucle; si no llega a tiempo, cancela la corrutina"""
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise LoopTimeoutError(f'La operación superó {timeout} s')
+
+    def run(self, coro, timeout=None):
+        """
+        Ejecuta una corrutina en el bucle y espera su resultado
+
+        Args:
+            coro: Corrutina a ejecutar
+            timeout (float, optional): Segundos máximos; por defecto los del bucle
+
+        Returns:
+            Resultado de la corrutina
+
+        Raises:
+            LoopTimeoutError: Si no termina a tiempo (la corrutina se cancela)
+            La excepción que lance la corrutina
+        """
+        self._count('submitted')
+        try:
+            result = self._wait(self.submit(coro), timeout)
+        except LoopTimeoutError:
+            self._count('timeouts')
+            raise
+        except BaseException:
+            self._count('errors')
+            raise
+        self._count('completed')
+        return result
+
+    def iterate(self, agen, timeout=None):
+        """
+        Recorre desde un hilo síncrono un generador asíncrono que se ejecuta
+        en el bucle, por ejemplo para transmitir una respuesta a trozos
+
+        Args:
+            agen: Generador asíncrono
+            timeout (float, optional): Segundos máximos de espera por cada
+                elemento; por defecto los del bucle
+
+        Yields:
+            Los elementos del generador
+
+        Raises:
+            LoopTimeoutError: Si un elemento no llega a tiempo
+        """
+        self._count('submitted')
+        outcome = 'errors'
+        try:
+            while True:
+                item = self._wait(self.submit(_next_item(agen)), timeout)
+                if item is _END:
+                    outcome = 'completed'
+                    return
+                yield item
+        except LoopTimeoutError:
+            outcome = 'timeouts'
+            raise
+        except GeneratorExit:
+            # El consumidor dejó de leer (p. ej. el cliente cortó)
+            outcome = 'closed'
+            raise
+        finally:
+            self._count(outcome)
+            if outcome != 'completed':
+                # Error o cliente desconectado: cerrar el generador en el
+                # bucle para que libere lo que tenga abierto
+                try:
+                    self.submit(agen.aclose()).result(LAG_INTERVAL)
+                except Exception:
+                    pass
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        """
+        Obtiene estadísticas del bucle
+
+        Returns:
+            dict: Corrutinas enviadas, terminadas, con error, canceladas por
+            tiempo y transmisiones cortadas por el cliente, en curso, tareas
+            vivas y retraso del bucle (último y máximo)
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(self._lag)
+            stats['running'] = self._loop is not None and self._thread.is_alive()
+        stats['in_flight'] = (stats['submitted'] - stats['completed'] - stats['errors'] - stats['timeouts']
+                              - stats['closed'])
+        return stats
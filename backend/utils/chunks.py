@@ -0,0 +1,277 @@
+"""
+Texto de documentos largos guardado en fragmentos ordenados
+Cada fragmento es una página (PDF) o un grupo de párrafos, con su posición,
+su página y su desplazamiento en el texto completo. Así el lector puede
+pedir una ventana de fragmentos sin leer el documento entero, el texto no
+tiene el límite de 64 KB de la columna TEXT y al editar solo se reescriben
+los fragmentos que cambian
+"""
+import hashlib
+import re
+
+from backend.utils.compression import FORMAT_PLAIN
+
+# Marca de formato_contenido para documentos guardados en fragmentos
+FORMAT_CHUNKS = 'fragmentos'
+
+# Separador entre páginas en el texto completo
+PAGE_SEPARATOR = '\n\n'
+
+# Tamaño de los fragmentos en caracteres. Un fragmento se cierra tras un
+# párrafo "ancla" (elegido por el hash de su texto) una vez superado el
+# mínimo, o al llegar al máximo: al insertar texto solo cambian los
+# fragmentos cercanos y los siguientes conservan sus límites
+CHUNK_MIN_CHARS = 2000
+CHUNK_MAX_CHARS = 8000
+ANCHOR_EVERY = 4
+
+# Documentos con más caracteres que esto (o con páginas) se fragmentan
+CHUNK_THRESHOLD = CHUNK_MAX_CHARS
+
+DEFAULT_WINDOW = 20
+MAX_WINDOW = 100
+
+_PARAGRAPH = re.compile(r'[^\n]*(?:\n+|$)')
+
+
+def _values(row, names):
+    """
+    Valores de una fila en el orden de names, tanto de cursores de tuplas
+    como de diccionarios (las vistas de app.py usan dictionary=True)
+    """
+    return tuple(row[name] for name in names) if isinstance(row, dict) else tuple(row)
+
+
+def chunk_hash(texto):
+    """SHA-256 del texto de un fragmento"""
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def join_pages(paginas):
+    """Texto completo de un documento a partir de sus páginas"""
+    return PAGE_SEPARATOR.join(paginas)
+
+
+def should_chunk(contenido, paginas=None):
+    """Indica si el documento se guarda en fragmentos"""
+    return bool(paginas) or len(contenido or '') > CHUNK_THRESHOLD
+
+
+def _hard_split(texto, limit):
+    """Corta un párrafo enorme en trozos de hasta `limit` caracteres, por espacios"""
+    parts = []
+    while len(texto) > limit:
+        cut = texto.rfind(' ', limit // 2, limit)
+        cut = limit if cut == -1 else cut + 1
+        parts.append(texto[:cut])
+        texto = texto[cut:]
+    if texto:
+        parts.append(texto)
+    return parts
+
+
+def _split_text(texto, min_chars=CHUNK_MIN_CHARS, max_chars=CHUNK_MAX_CHARS):
+    """Agrupa los párrafos de un texto en fragmentos de límites estables"""
+    chunks = []
+    current = ''
+    for paragraph in _PARAGRAPH.findall(texto):
+        if not paragraph:
+            continue
+        for piece in _hard_split(paragraph, max_chars):
+            if current and len(current) + len(piece) > max_chars:
+                chunks.append(current)
+                current = ''
+            current += piece
+            anchor = int(hashlib.md5(piece.encode('utf-8')).hexdigest()[:8], 16) % ANCHOR_EVERY == 0
+            if len(current) >= min_chars and anchor:
+                chunks.append(current)
+                current = ''
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_chunks(contenido, paginas=None):
+    """
+    Divide un documento en fragmentos
+
+    Args:
+        contenido (str): Texto completo (se ignora si hay páginas)
+        paginas (list, optional): Texto de cada página, tal como lo extrajo
+            leer_archivo; cada página empieza un fragmento nuevo
+
+    Returns:
+        list: Diccionarios con posicion, pagina, inicio, texto y hash. La
+        concatenación de los textos es exactamente el texto completo
+    """
+    if paginas:
+        pieces = []
+        for number, page in enumerate(paginas, start=1):
+            text = page + (PAGE_SEPARATOR if number < len(paginas) else '')
+            pieces.extend((number, part) for part in _split_text(text) or [''])
+    else:
+        pieces = [(None, part) for part in _split_text(contenido or '')]
+
+    chunks = []
+    inicio = 0
+    for posicion, (pagina, texto) in enumerate(pieces):
+        chunks.append({
+            'posicion': posicion,
+            'pagina': pagina,
+            'inicio': inicio,
+            'texto': texto,
+            'hash': chunk_hash(texto)
+        })
+        inicio += len(texto)
+    return chunks
+
+
+def prepare_body(contenido, paginas, codec):
+    """
+    Decide cómo guardar el texto de un documento
+
+    Returns:
+        tuple: (formato, texto, datos, fragmentos). Los documentos largos o
+        con páginas van en fragmentos (formato 'fragmentos', texto y datos
+        None); el resto en línea, comprimido o no según el codec
+    """
+    if should_chunk(contenido, paginas):
+        return FORMAT_CHUNKS, None, None, split_chunks(contenido, paginas)
+    formato, texto, datos = codec.encode(contenido)
+    return formato, texto, datos, []
+
+
+def parse_window(offset, limit):
+    """
+    Interpreta ?offset= y ?limit= de la lectura por fragmentos
+
+    Raises:
+        ValueError: Si no son enteros válidos
+    """
+    try:
+        offset = int(offset) if offset is not None else 0
+        limit = int(limit) if limit is not None else DEFAULT_WINDOW
+    except ValueError:
+        raise ValueError('offset y limit deben ser números enteros')
+    if offset < 0:
+        raise ValueError('offset no puede ser negativo')
+    return offset, max(1, min(limit, MAX_WINDOW))
+
+
+def write_chunks(cursor, document_id, chunks, codec, placeholder='%s'):
+    """
+    Guarda los fragmentos de un documento reescribiendo solo los que cambian
+
+    Los fragmentos con el mismo texto que uno ya guardado conservan su fila
+    (si se movieron solo se actualiza su posición); los nuevos se insertan y
+    los que sobran se borran
+
+    Args:
+        cursor: Cursor de la conexión (sin commit)
+        document_id (int): Id del documento
+        chunks (list): Resultado de split_chunks
+        codec (BodyCodec): Codec para comprimir el texto de cada fragmento
+        placeholder (str): Marcador de parámetros del driver
+
+    Returns:
+        dict: Fragmentos insertados, movidos, sin cambios y borrados
+    """
+    p = placeholder
+    cursor.execute(f"""
+        SELECT id, posicion, pagina, inicio, hash_sha256 FROM Fragmentos_Documento
+        WHERE documento_id = {p}
+    """, (document_id,))
+    existing = {}
+    for row in cursor.fetchall():
+        row_id, posicion, pagina, inicio, hash_sha256 = _values(
+            row, ('id', 'posicion', 'pagina', 'inicio', 'hash_sha256'))
+        existing.setdefault(hash_sha256, []).append((row_id, posicion, pagina, inicio))
+
+    result = {'inserted': 0, 'moved': 0, 'unchanged': 0, 'deleted': 0}
+    for chunk in chunks:
+        candidates = existing.get(chunk['hash'])
+        if candidates:
+            # Preferir la fila que ya está en la misma posición
+            match = next((c for c in candidates if c[1] == chunk['posicion']), candidates[0])
+            candidates.remove(match)
+            row_id, posicion, pagina, inicio = match
+            if (posicion, pagina, inicio) == (chunk['posicion'], chunk['pagina'], chunk['inicio']):
+                result['unchanged'] += 1
+            else:
+                cursor.execute(f"""
+                    UPDATE Fragmentos_Documento SET posicion = {p}, pagina = {p}, inicio = {p} WHERE id = {p}
+                """, (chunk['posicion'], chunk['pagina'], chunk['inicio'], row_id))
+                result['moved'] += 1
+            continue
+        formato, texto, datos = codec.encode(chunk['texto'])
+        cursor.execute(f"""
+            INSERT INTO Fragmentos_Documento
+                (documento_id, posicion, pagina, inicio, longitud, hash_sha256, formato, texto, datos)
+            VALUES ({p}, {p}, {p}, {p}, {p}, {p}, {p}, {p}, {p})
+        """, (document_id, chunk['posicion'], chunk['pagina'], chunk['inicio'], len(chunk['texto']),
+              chunk['hash'], formato, texto, datos))
+        result['inserted'] += 1
+
+    stale = [c[0] for candidates in existing.values() for c in candidates]
+    for row_id in stale:
+        cursor.execute(f"DELETE FROM Fragmentos_Documento WHERE id = {p}", (row_id,))
+    result['deleted'] = len(stale)
+    return result
+
+
+def delete_chunks(cursor, document_id, placeholder='%s'):
+    """Borra los fragmentos de un documento (al volver a guardarlo en línea)"""
+    cursor.execute(f"DELETE FROM Fragmentos_Documento WHERE documento_id = {placeholder}", (document_id,))
+
+
+def read_window(cursor, document_id, codec, offset=0, limit=DEFAULT_WINDOW, placeholder='%s'):
+    """
+    Lee una ventana de fragmentos en orden
+
+    Args:
+        cursor: Cursor de la conexión
+        document_id (int): Id del documento
+        codec (BodyCodec): Codec para descomprimir
+        offset (int): Posición del primer fragmento
+        limit (int): Número de fragmentos
+
+    Returns:
+        list: Diccionarios con posicion, pagina, inicio y texto
+    """
+    p = placeholder
+    cursor.execute(f"""
+        SELECT posicion, pagina, inicio, formato, texto, datos FROM Fragmentos_Documento
+        WHERE documento_id = {p} AND posicion >= {p} AND posicion < {p}
+        ORDER BY posicion
+    """, (document_id, offset, offset + limit))
+    chunks = []
+    for row in cursor.fetchall():
+        posicion, pagina, inicio, formato, texto, datos = _values(
+            row, ('posicion', 'pagina', 'inicio', 'formato', 'texto', 'datos'))
+        chunks.append({
+            'posicion': posicion,
+            'pagina': pagina,
+            'inicio': inicio,
+            'texto': codec.decode(formato, texto, datos)
+        })
+    return chunks
+
+
+def read_text(cursor, document_id, codec, placeholder='%s'):
+    """Texto completo de un documento guardado en fragmentos"""
+    return ''.join(chunk['texto'] for chunk in read_window(cursor, document_id, codec, 0, 2 ** 31 - 1,
+                                                           placeholder))
+
+
+def load_text(cursor, document_id, formato, contenido, datos, codec, placeholder='%s'):
+    """
+    Texto completo de un documento sea cual sea su forma de guardado
+
+    Args:
+        formato (str): formato_contenido del documento
+        contenido (str): Columna contenido
+        datos (bytes): Columna contenido_comprimido
+    """
+    if formato == FORMAT_CHUNKS:
+        return read_text(cursor, document_id, codec, placeholder)
+    return codec.decode(formato or FORMAT_PLAIN, contenido, datos)
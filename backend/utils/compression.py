@@ -0,0 +1,309 @@
+"""
+Compresión del texto de los documentos en la base de datos
+El texto extraído de PDF y DOCX se comprime muy bien. Por encima de un
+umbral se guarda comprimido en contenido_comprimido, y formato_contenido
+indica cómo leerlo ('texto', 'zlib' o 'zstd'); al leer se descomprime sin
+que las rutas lo noten
+"""
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMAT_PLAIN = 'texto'
+FORMAT_ZLIB = 'zlib'
+FORMAT_ZSTD = 'zstd'
+
+DEFAULT_THRESHOLD = 4096
+
+# Si comprimido ocupa más de esta fracción del original no compensa
+MAX_USEFUL_RATIO = 0.9
+
+
+class BodyCodec:
+    """Comprime y descomprime el texto de los documentos y mide el coste"""
+
+    def __init__(self, algorithm=FORMAT_ZLIB, threshold=DEFAULT_THRESHOLD, level=None):
+        """
+        Args:
+            algorithm (str): 'zlib', 'zstd' o 'texto' (no comprimir)
+            threshold (int): Bytes UTF-8 a partir de los que se comprime
+            level (int, optional): Nivel de compresión del algoritmo
+        """
+        if algorithm == FORMAT_ZSTD and zstandard is None:
+            print("⚠️ zstandard no está instalado; se usa zlib para comprimir documentos")
+            algorithm = FORMAT_ZLIB
+        if algorithm not in (FORMAT_PLAIN, FORMAT_ZLIB, FORMAT_ZSTD):
+            raise ValueError(f'Algoritmo de compresión desconocido: {algorithm}')
+        self.algorithm = algorithm
+        self.threshold = threshold
+        self.level = level
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {
+            'encoded': 0,
+            'compressed': 0,
+            'stored_plain': 0,
+            'bytes_in': 0,
+            'bytes_out': 0,
+            'encode_seconds': 0.0,
+            'decoded': 0,
+            'decompressed': 0,
+            'decode_seconds': 0.0
+        }
+
+    def _zstd(self):
+        # Los (de)compresores de zstandard no se comparten entre hilos
+        if getattr(self._local, 'zstd', None) is None:
+            level = self.level if self.level is not None else 3
+            self._local.zstd = (zstandard.ZstdCompressor(level=level), zstandard.ZstdDecompressor())
+        return self._local.zstd
+
+    def compress(self, raw, algorithm=None):
+        """Comprime bytes con el algoritmo indicado (por defecto el del codec)"""
+        algorithm = algorithm or self.algorithm
+        if algorithm == FORMAT_ZSTD:
+            return self._zstd()[0].compress(raw)
+        return zlib.compress(raw, self.level if self.level is not None else 6)
+
+    def decompress(self, formato, datos):
+        """
+        Descomprime bytes según su marca de formato
+
+        Raises:
+            RuntimeError: Si el formato no se puede leer en este proceso
+        """
+        if formato == FORMAT_ZLIB:
+            return zlib.decompress(datos)
+        if formato == FORMAT_ZSTD:
+            if zstandard is None:
+                raise RuntimeError('El documento está comprimido con zstd y zstandard no está instalado')
+            return self._zstd()[1].decompress(datos)
+        raise RuntimeError(f'Formato de contenido desconocido: {formato}')
+
+    def encode(self, contenido):
+        """
+        Prepara el texto para guardarlo
+
+        Args:
+            contenido (str): Texto completo
+
+        Returns:
+            tuple: (formato, texto, datos). Si se comprime, texto es None y
+            datos los bytes comprimidos; si no, datos es None
+        """
+        if contenido is None:
+            return FORMAT_PLAIN, None, None
+        raw = contenido.encode('utf-8')
+        if self.algorithm == FORMAT_PLAIN or len(raw) < self.threshold:
+            self._record(raw, None, 0.0)
+            return FORMAT_PLAIN, contenido, None
+
+        started = time.perf_counter()
+        datos = self.compress(raw)
+        elapsed = time.perf_counter() - started
+        if len(datos) > len(raw) * MAX_USEFUL_RATIO:
+            self._record(raw, None, elapsed)
+            return FORMAT_PLAIN, contenido, None
+        self._record(raw, datos, elapsed)
+        return self.algorithm, None, datos
+
+    def decode(self, formato, contenido, datos):
+        """
+        Recupera el texto guardado
+
+        Args:
+            formato (str): Valor de formato_contenido
+            contenido (str): Columna contenido
+            datos (bytes): Columna contenido_comprimido
+
+        Returns:
+            str: Texto completo
+        """
+        if not formato or formato == FORMAT_PLAIN or datos is None:
+            with self._lock:
+                self._stats['decoded'] += 1
+            return contenido
+        started = time.perf_counter()
+        texto = self.decompress(formato, bytes(datos)).decode('utf-8')
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats['decoded'] += 1
+            self._stats['decompressed'] += 1
+            self._stats['decode_seconds'] += elapsed
+        return texto
+
+    def _record(self, raw, datos, elapsed):
+        with self._lock:
+            self._stats['encoded'] += 1
+            self._stats['encode_seconds'] += elapsed
+            if datos is None:
+                self._stats['stored_plain'] += 1
+            else:
+                self._stats['compressed'] += 1
+                self._stats['bytes_in'] += len(raw)
+                self._stats['bytes_out'] += len(datos)
+
+    def stats(self):
+        """
+        Obtiene estadísticas de compresión
+
+        Returns:
+            dict: Documentos comprimidos, relación de compresión y tiempos
+            medios de compresión y descompresión
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        encode_seconds = stats.pop('encode_seconds')
+        decode_seconds = stats.pop('decode_seconds')
+        stats['ratio'] = round(stats['bytes_out'] / stats['bytes_in'], 3) if stats['bytes_in'] else None
+        stats['bytes_saved'] = stats['bytes_in'] - stats['bytes_out']
+        stats['avg_encode_ms'] = round(encode_seconds * 1000 / stats['compressed'], 3) if stats['compressed'] else 0.0
+        stats['avg_decode_ms'] = round(decode_seconds * 1000 / stats['decompressed'], 3) if stats['decompressed'] else 0.0
+        stats['algorithm'] = self.algorithm
+        stats['threshold'] = self.threshold
+        return stats
+
+
+class CompressionJob:
+    """
+    Comprime en segundo plano los documentos guardados antes de activar la
+    compresión, por lotes y sin cambiar actualizado_en ni el hash
+    """
+
+    def __init__(self, acquire, codec, batch_size=50, pause=0.2, dialect='mysql'):
+        """
+        Args:
+            acquire (callable): Devuelve una conexión (close() la libera)
+            codec (BodyCodec): Codec con el que comprimir
+            batch_size (int): Documentos por transacción
+            pause (float): Segundos de espera entre lotes
+            dialect (str): 'mysql' o 'sqlite'
+        """
+        self.acquire = acquire
+        self.codec = codec
+        self.batch_size = batch_size
+        self.pause = pause
+        self.dialect = dialect
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {'running': False, 'finished': False, 'batches': 0, 'documents': 0,
+                       'skipped': 0, 'bytes_before': 0, 'bytes_after': 0, 'errors': 0}
+
+    def start(self):
+        """Lanza el trabajo en un hilo de fondo (una sola vez por proceso)"""
+        if self.codec.algorithm == FORMAT_PLAIN or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='compresion-documentos', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Pide al trabajo que termine tras el lote actual"""
+        self._stop.set()
+
+    def _set(self, **values):
+        with self._lock:
+            self._stats.update(values)
+
+    def run(self):
+        """
+        Comprime todos los documentos pendientes
+
+        Returns:
+            int: Documentos comprimidos
+        """
+        self._set(running=True)
+        connection = None
+        locked = False
+        try:
+            connection = self.acquire()
+            if not connection:
+                return 0
+            cursor = connection.cursor()
+            try:
+                # Con varios workers solo uno hace el trabajo
+                if self.dialect == 'mysql':
+                    cursor.execute("SELECT GET_LOCK('auris_compresion', 0)")
+                    locked = cursor.fetchone()[0] == 1
+                    if not locked:
+                        return 0
+                return self._run_batches(connection, cursor)
+            finally:
+                if locked:
+                    cursor.execute("SELECT RELEASE_LOCK('auris_compresion')")
+                    cursor.fetchone()
+                cursor.close()
+        except Exception as e:
+            with self._lock:
+                self._stats['errors'] += 1
+            print(f"⚠️ Error comprimiendo documentos: {e}")
+            return 0
+        finally:
+            self._set(running=False)
+            if connection:
+                connection.close()
+
+    def _run_batches(self, connection, cursor):
+        p = '%s' if self.dialect == 'mysql' else '?'
+        keep_timestamp = ', actualizado_en = actualizado_en' if self.dialect == 'mysql' else ''
+        last_id = 0
+        total = 0
+        while not self._stop.is_set():
+            cursor.execute(f"""
+                SELECT id, contenido, hash_contenido FROM Documentos
+                WHERE id > {p} AND formato_contenido = '{FORMAT_PLAIN}' AND contenido IS NOT NULL
+                  AND tamano_contenido * 4 >= {p}
+                ORDER BY id LIMIT {int(self.batch_size)}
+            """, (last_id, self.codec.threshold))
+            rows = cursor.fetchall()
+            if not rows:
+                self._set(finished=True)
+                break
+            updates = []
+            skipped = before = after = 0
+            for document_id, contenido, hash_contenido in rows:
+                formato, texto, datos = self.codec.encode(contenido)
+                if datos is None:
+                    skipped += 1
+                    continue
+                before += len(contenido.encode('utf-8'))
+                after += len(datos)
+                updates.append((formato, datos, document_id, hash_contenido))
+            if updates:
+                # La condición sobre el hash evita pisar un documento que se
+                # haya actualizado mientras tanto
+                same = '<=>' if self.dialect == 'mysql' else 'IS'
+                cursor.executemany(f"""
+                    UPDATE Documentos
+                    SET formato_contenido = {p}, contenido_comprimido = {p}, contenido = NULL{keep_timestamp}
+                    WHERE id = {p} AND formato_contenido = '{FORMAT_PLAIN}' AND hash_contenido {same} {p}
+                """, updates)
+            connection.commit()
+            last_id = rows[-1][0]
+            total += len(updates)
+            with self._lock:
+                self._stats['batches'] += 1
+                self._stats['documents'] += len(updates)
+                self._stats['skipped'] += skipped
+                self._stats['bytes_before'] += before
+                self._stats['bytes_after'] += after
+            time.sleep(self.pause)
+        if total:
+            print(f"✅ {total} documentos comprimidos con {self.codec.algorithm}")
+        return total
+
+    def stats(self):
+        """
+        Obtiene el progreso del trabajo
+
+        Returns:
+            dict: Documentos comprimidos, bytes antes y después y estado
+        """
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,301 @@
+"""
+Pool de conexiones a la base de datos
+Mantiene conexiones abiertas entre peticiones en lugar de abrir una nueva
+(conexión TCP + autenticación) en cada ruta
+"""
+import os
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeoutError(Exception):
+    """No se obtuvo una conexión libre dentro del tiempo de espera"""
+
+
+class PooledCursor:
+    """Cursor que marca la conexión como dañada si falla a nivel de conexión"""
+
+    def __init__(self, connection, cursor):
+        self._connection = connection
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, *args, **kwargs):
+        try:
+            return self._cursor.execute(*args, **kwargs)
+        except Exception as e:
+            self._connection.report_error(e)
+            raise
+
+    def executemany(self, *args, **kwargs):
+        try:
+            return self._cursor.executemany(*args, **kwargs)
+        except Exception as e:
+            self._connection.report_error(e)
+            raise
+
+
+class PooledConnection:
+    """
+    Conexión prestada por el pool
+    Se usa igual que la conexión original; close() la devuelve al pool
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        self.uses = 0
+        self.broken = False
+        self.checked_out = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    @property
+    def raw(self):
+        """Conexión original del driver"""
+        return self._raw
+
+    def cursor(self, *args, **kwargs):
+        return PooledCursor(self, self._raw.cursor(*args, **kwargs))
+
+    def report_error(self, error):
+        """Marca la conexión para descarte si el error es de conexión"""
+        if self._pool.is_fatal_error(error):
+            self.broken = True
+
+    def mark_broken(self):
+        """Fuerza el descarte de la conexión al devolverla"""
+        self.broken = True
+
+    def close(self):
+        """Devolver la conexión al pool"""
+        if self.checked_out:
+            self._pool.release(self)
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones de tamaño fijo, seguro entre hilos
+
+    Las conexiones se crean bajo demanda hasta `size`, se verifican al
+    prestarse si llevan inactivas más de `ping_after` segundos y se reciclan
+    tras `max_uses` préstamos, `max_lifetime` segundos o un error de conexión.
+    El pool se reinicia tras un fork (cada worker de gunicorn tiene el suyo).
+    """
+
+    def __init__(self, factory, size=5, max_uses=1000, max_lifetime=3600,
+                 ping_after=30, timeout=10, ping=None, reset=None,
+                 is_fatal_error=None, name='default'):
+        """
+        Args:
+            factory (callable): Crea una conexión nueva del driver
+            size (int): Número máximo de conexiones abiertas por proceso
+            max_uses (int): Préstamos antes de reciclar una conexión
+            max_lifetime (float): Segundos de vida máxima de una conexión
+            ping_after (float): Inactividad tras la cual se verifica al prestar
+            timeout (float): Espera máxima por una conexión libre
+            ping (callable): Recibe la conexión original y devuelve si está viva
+            reset (callable): Limpia el estado de la conexión al devolverla
+            is_fatal_error (callable): Indica si un error invalida la conexión
+            name (str): Nombre para logs y métricas
+        """
+        self.factory = factory
+        self.size = max(1, int(size))
+        self.max_uses = max_uses
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+        self.timeout = timeout
+        self.ping = ping
+        self.reset = reset
+        self.is_fatal_error = is_fatal_error or (lambda error: False)
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._init_state()
+
+    def _init_state(self):
+        self._pid = os.getpid()
+        self._idle = deque()
+        self._open = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._stats = {
+            'acquired': 0,
+            'created': 0,
+            'recycled': 0,
+            'discarded_broken': 0,
+            'failed_health_checks': 0,
+            'timeouts': 0,
+            'wait_time_total_ms': 0.0,
+            'wait_time_max_ms': 0.0,
+            'peak_in_use': 0
+        }
+
+    def _check_fork(self):
+        # Las conexiones heredadas del proceso padre no se cierran: el socket
+        # es compartido y cerrarlo aquí cortaría la conexión del padre
+        if self._pid != os.getpid():
+            self._init_state()
+
+    def acquire(self, timeout=None):
+        """
+        Presta una conexión del pool
+
+        Args:
+            timeout (float, optional): Espera máxima; por defecto la del pool
+
+        Returns:
+            PooledConnection: Conexión lista para usar
+
+        Raises:
+            PoolTimeoutError: Si no hay conexión libre a tiempo
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            conn = None
+            create = False
+            with self._cond:
+                self._check_fork()
+                while not self._idle and self._open >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"Pool '{self.name}' sin conexiones libres tras {timeout}s")
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+                if self._idle:
+                    conn = self._idle.pop()
+                else:
+                    self._open += 1
+                    create = True
+                self._in_use += 1
+
+            try:
+                if create:
+                    conn = PooledConnection(self, self.factory())
+                    with self._cond:
+                        self._stats['created'] += 1
+                elif not self._is_healthy(conn):
+                    self._discard(conn, counter='failed_health_checks')
+                    continue
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+
+            waited_ms = (time.monotonic() - started) * 1000
+            with self._cond:
+                self._stats['acquired'] += 1
+                self._stats['wait_time_total_ms'] += waited_ms
+                self._stats['wait_time_max_ms'] = max(self._stats['wait_time_max_ms'], waited_ms)
+                self._stats['peak_in_use'] = max(self._stats['peak_in_use'], self._in_use)
+
+            conn.uses += 1
+            conn.checked_out = True
+            conn.last_used_at = time.monotonic()
+            return conn
+
+    def _is_healthy(self, conn):
+        now = time.monotonic()
+        if self.max_lifetime and now - conn.created_at > self.max_lifetime:
+            return False
+        if self.ping and now - conn.last_used_at > self.ping_after:
+            try:
+                return bool(self.ping(conn.raw))
+            except Exception:
+                return False
+        return True
+
+    def release(self, conn):
+        """Devuelve una conexión al pool (o la descarta si debe reciclarse)"""
+        conn.checked_out = False
+        conn.last_used_at = time.monotonic()
+
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+
+        if not conn.broken and self.reset:
+            try:
+                self.reset(conn.raw)
+            except Exception:
+                conn.broken = True
+
+        if conn.broken:
+            self._discard(conn, counter='discarded_broken', in_use=True)
+        elif self.max_uses and conn.uses >= self.max_uses:
+            self._discard(conn, counter='recycled', in_use=True)
+        else:
+            with self._cond:
+                self._in_use -= 1
+                self._idle.append(conn)
+                self._cond.notify()
+
+    def _discard(self, conn, counter, in_use=True):
+        try:
+            conn.raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._open -= 1
+            if in_use:
+                self._in_use -= 1
+            self._stats[counter] += 1
+            self._cond.notify()
+
+    def close_all(self):
+        """Cierra las conexiones inactivas (las prestadas se cierran al devolverse)"""
+        with self._cond:
+            self._check_fork()
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for conn in idle:
+            try:
+                conn.raw.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        """
+        Obtiene estadísticas del pool
+
+        Returns:
+            dict: Tamaño, uso, tiempos de espera y contadores de reciclaje
+        """
+        with self._cond:
+            self._check_fork()
+            stats = dict(self._stats)
+            stats.update({
+                'name': self.name,
+                'size': self.size,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'waiting': self._waiting,
+                'utilization': round(self._in_use / self.size, 3)
+            })
+        acquired = stats['acquired']
+        stats['wait_time_avg_ms'] = round(stats['wait_time_total_ms'] / acquired, 3) if acquired else 0.0
+        stats['wait_time_total_ms'] = round(stats['wait_time_total_ms'], 3)
+        stats['wait_time_max_ms'] = round(stats['wait_time_max_ms'], 3)
+        return stats
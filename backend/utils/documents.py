@@ -0,0 +1,147 @@
+"""
+Utilidades para el listado de documentos: extractos, proyección de campos
+y cursores de paginación
+"""
+import base64
+import hashlib
+import json
+from datetime import datetime
+
+# Longitud del extracto que se guarda con cada documento
+EXCERPT_LENGTH = 200
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Campos que se pueden pedir con ?fields= y la expresión SQL de cada uno
+LIST_FIELDS = {
+    'id': 'id',
+    'titulo': 'titulo',
+    'extracto': 'extracto',
+    'tamano': 'tamano_contenido AS tamano',
+    'hash': 'hash_contenido AS hash',
+    'has_audio': 'tiene_audio AS has_audio',
+    'nombre_archivo': 'nombre_archivo',
+    'tipo_mime': 'tipo_mime',
+    'creado_en': 'creado_en',
+    'actualizado_en': 'actualizado_en',
+    'contenido': 'contenido'
+}
+
+# Sin ?fields= se devuelve todo menos el contenido completo
+DEFAULT_LIST_FIELDS = [field for field in LIST_FIELDS if field != 'contenido']
+
+
+def make_excerpt(contenido):
+    """
+    Calcula el extracto y el tamaño que se guardan junto al documento
+
+    Args:
+        contenido (str): Texto completo del documento
+
+    Returns:
+        tuple: (extracto, tamaño en caracteres)
+    """
+    if not contenido:
+        return None, 0
+    return contenido[:EXCERPT_LENGTH], len(contenido)
+
+
+def content_hash(titulo, contenido):
+    """
+    Hash SHA-256 del título y el contenido, calculado al escribir el
+    documento y usado como validador (ETag)
+
+    Returns:
+        str: Hash en hexadecimal
+    """
+    digest = hashlib.sha256((titulo or '').encode('utf-8'))
+    digest.update(b'\0')
+    digest.update((contenido or '').encode('utf-8'))
+    return digest.hexdigest()
+
+
+def backfill_content_hashes(connection, dialect, batch_size=200):
+    """
+    Calcula hash_contenido de los documentos que aún no lo tienen
+
+    Returns:
+        int: Documentos actualizados
+    """
+    p = '%s' if dialect == 'mysql' else '?'
+    keep_timestamp = ', actualizado_en = actualizado_en' if dialect == 'mysql' else ''
+    updated = 0
+    cursor = connection.cursor()
+    try:
+        while True:
+            cursor.execute(f"""
+                SELECT id, titulo, contenido FROM Documentos
+                WHERE hash_contenido IS NULL LIMIT {int(batch_size)}
+            """)
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            cursor.executemany(
+                f"UPDATE Documentos SET hash_contenido = {p}{keep_timestamp} WHERE id = {p}",
+                [(content_hash(titulo, contenido), document_id) for document_id, titulo, contenido in rows])
+            connection.commit()
+            updated += len(rows)
+        return updated
+    finally:
+        cursor.close()
+
+
+def parse_fields(value):
+    """
+    Interpreta el parámetro ?fields=
+
+    Args:
+        value (str): Lista de campos separados por comas o None
+
+    Returns:
+        list: Campos pedidos, en el orden de LIST_FIELDS
+
+    Raises:
+        ValueError: Si se pide un campo desconocido
+    """
+    if not value:
+        return list(DEFAULT_LIST_FIELDS)
+    requested = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = requested - set(LIST_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos desconocidos: {', '.join(sorted(unknown))}")
+    return [field for field in LIST_FIELDS if field in requested]
+
+
+def parse_limit(value):
+    """Interpreta ?limit= dentro de los límites permitidos"""
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit debe ser un número entero')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(actualizado_en, document_id):
+    """Crea un cursor opaco a partir del último documento de la página"""
+    if isinstance(actualizado_en, datetime):
+        actualizado_en = actualizado_en.isoformat()
+    raw = json.dumps([actualizado_en, document_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Recupera (actualizado_en, id) de un cursor
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        actualizado_en, document_id = json.loads(raw)
+        return datetime.fromisoformat(actualizado_en), int(document_id)
+    except Exception:
+        raise ValueError('Cursor inválido')
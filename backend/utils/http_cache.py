@@ -0,0 +1,74 @@
+"""
+Validadores HTTP (ETag fuerte y Last-Modified) y respuestas 304
+"""
+import hashlib
+from datetime import timezone
+
+from flask import Response
+from werkzeug.http import http_date, is_resource_modified
+
+
+def make_etag(*parts):
+    """
+    Calcula un ETag a partir de valores ya conocidos (hashes guardados,
+    identificadores, parámetros de la consulta) sin tocar el contenido
+
+    Returns:
+        str: Valor del ETag sin comillas
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def validator_headers(etag, last_modified=None):
+    """Cabeceras ETag (fuerte) y Last-Modified"""
+    headers = {'ETag': f'"{etag}"'}
+    if last_modified:
+        headers['Last-Modified'] = http_date(last_modified)
+    return headers
+
+
+def is_not_modified(request, etag, last_modified=None):
+    """
+    Indica si la copia del cliente sigue vigente según If-None-Match o, si
+    no lo envía, If-Modified-Since
+
+    Returns:
+        bool: True si se puede responder 304
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if not request.if_none_match and not request.if_modified_since:
+        return False
+    return not is_resource_modified(request.environ, etag=etag, last_modified=last_modified)
+
+
+def not_modified_response(etag, last_modified=None, headers=None):
+    """Respuesta 304 con los mismos validadores que la respuesta completa"""
+    headers = {**(headers or {}), **validator_headers(etag, last_modified)}
+    response = Response(status=304, headers=headers)
+    del response.headers['Content-Type']
+    return response
+
+
+def if_range_matches(request, etag, last_modified=None):
+    """
+    Evalúa If-Range: el rango solo se aplica si el validador coincide;
+    si no, se envía el recurso completo
+
+    Returns:
+        bool: True si no hay If-Range o si coincide
+    """
+    if_range = request.if_range
+    if not if_range.etag and not if_range.date:
+        return True
+    if if_range.etag:
+        return if_range.etag == etag
+    if last_modified is None:
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return if_range.date >= last_modified.replace(microsecond=0)
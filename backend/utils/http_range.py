@@ -0,0 +1,146 @@
+"""
+Respuestas HTTP por rangos (Range / 206) transmitidas en bloques
+"""
+import uuid
+
+from flask import Response
+
+# Tamaño de cada bloque leído del almacén al transmitir
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Más rangos que esto en una sola petición se trata como abuso y se ignora
+MAX_RANGES = 16
+
+
+class RangeNotSatisfiable(Exception):
+    """Ninguno de los rangos pedidos cae dentro del recurso"""
+
+
+def parse_range_header(header, size):
+    """
+    Interpreta una cabecera Range de bytes
+
+    Args:
+        header (str): Valor de la cabecera (p. ej. 'bytes=0-99,200-')
+        size (int): Tamaño total del recurso
+
+    Returns:
+        list: Rangos (inicio, fin) inclusivos, o None si la cabecera no es
+        válida o no es de bytes (se responde con el recurso completo)
+
+    Raises:
+        RangeNotSatisfiable: Si ningún rango es satisfacible
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec:
+        return None
+
+    parts = [part.strip() for part in spec.split(',') if part.strip()]
+    if not parts or len(parts) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for part in parts:
+        first, dash, last = part.partition('-')
+        if not dash:
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else size - 1
+                if start < 0 or (last and end < start):
+                    return None
+            else:
+                # Sufijo: los últimos N bytes
+                length = int(last)
+                if length <= 0:
+                    continue
+                start = max(size - length, 0)
+                end = size - 1
+        except ValueError:
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    # Unir rangos solapados o contiguos
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def range_response(request, size, reader, mimetype, headers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                   allow_ranges=True):
+    """
+    Construye la respuesta de un recurso binario respetando Range
+
+    Args:
+        request: Petición de Flask
+        size (int): Tamaño total del recurso
+        reader (callable): reader(inicio, fin, chunk_size) devuelve un
+            iterador de bloques de bytes del rango inclusivo [inicio, fin]
+        mimetype (str): Tipo MIME del recurso
+        headers (dict, optional): Cabeceras adicionales
+        chunk_size (int): Tamaño de bloque
+        allow_ranges (bool): False para ignorar Range (If-Range no coincide)
+
+    Returns:
+        Response: 200 con el recurso completo, 206 con uno o varios rangos
+        (multipart/byteranges) o 416 si el rango no es satisfacible
+    """
+    headers = dict(headers or {})
+    headers['Accept-Ranges'] = 'bytes'
+
+    try:
+        ranges = parse_range_header(request.headers.get('Range'), size) if size and allow_ranges else None
+    except RangeNotSatisfiable:
+        headers['Content-Range'] = f'bytes */{size}'
+        return Response(status=416, headers=headers)
+
+    if request.method == 'HEAD':
+        ranges = None
+
+    if not ranges:
+        headers['Content-Length'] = str(size)
+        body = reader(0, size - 1, chunk_size) if size and request.method != 'HEAD' else []
+        return Response(body, status=200, mimetype=mimetype, headers=headers, direct_passthrough=True)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        headers['Content-Length'] = str(end - start + 1)
+        return Response(reader(start, end, chunk_size), status=206, mimetype=mimetype,
+                        headers=headers, direct_passthrough=True)
+
+    boundary = uuid.uuid4().hex
+    part_headers = [
+        (f'--{boundary}\r\nContent-Type: {mimetype}\r\n'
+         f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n').encode('ascii')
+        for start, end in ranges
+    ]
+    closing = f'\r\n--{boundary}--\r\n'.encode('ascii')
+    length = sum(len(part) for part in part_headers) + len(closing) + 2 * (len(ranges) - 1)
+    length += sum(end - start + 1 for start, end in ranges)
+
+    def generate():
+        for index, (start, end) in enumerate(ranges):
+            if index:
+                yield b'\r\n'
+            yield part_headers[index]
+            yield from reader(start, end, chunk_size)
+        yield closing
+
+    headers['Content-Length'] = str(length)
+    return Response(generate(), status=206, headers=headers, direct_passthrough=True,
+                    content_type=f'multipart/byteranges; boundary={boundary}')
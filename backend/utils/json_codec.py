@@ -0,0 +1,195 @@
+"""
+Codificación rápida de las respuestas JSON
+Con orjson instalado las respuestas se serializan en C; si no, se usa el
+módulo json de la biblioteca estándar con el mismo resultado. Fechas,
+Decimal y bytes se convierten al serializar, así que las rutas no tienen
+que recorrer las filas para prepararlas. Los listados grandes se codifican
+por partes (transferencia chunked) en lugar de en un único bloque, y los
+clientes que lo pidan con Accept: application/msgpack reciben MessagePack
+(si msgpack está instalado)
+"""
+import base64
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from flask import Response, request
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, 'application/x-msgpack')
+
+# Bytes que se acumulan antes de enviar una parte de una respuesta por partes
+CHUNK_BUFFER_SIZE = 64 * 1024
+
+
+def _default(value):
+    """Tipos que ni orjson ni json serializan por sí mismos"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode('ascii')
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f'Objeto de tipo {type(value).__name__} no serializable a JSON')
+
+
+def dumps(obj):
+    """
+    Serializa a JSON compacto
+
+    Returns:
+        bytes: JSON en UTF-8
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    """Interpreta JSON (str o bytes)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _msgpack_default(value):
+    # Los bytes ya van como binario; el resto igual que en JSON
+    if isinstance(value, memoryview):
+        return bytes(value)
+    return _default(value)
+
+
+def pack(obj):
+    """
+    Serializa a MessagePack
+
+    Raises:
+        RuntimeError: Si msgpack no está instalado
+    """
+    if msgpack is None:
+        raise RuntimeError('msgpack no está instalado')
+    return msgpack.packb(obj, default=_msgpack_default, use_bin_type=True)
+
+
+class FastJSONProvider(JSONProvider):
+    """Proveedor JSON de Flask (jsonify, request.json) basado en dumps/loads"""
+
+    mimetype = JSON_MIMETYPE
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
+
+def response_format():
+    """
+    Formato de respuesta que prefiere el cliente según Accept
+
+    Returns:
+        str: 'msgpack' o 'json' (por defecto, o si msgpack no está instalado)
+    """
+    if msgpack is None:
+        return 'json'
+    best = request.accept_mimetypes.best_match((JSON_MIMETYPE,) + MSGPACK_MIMETYPES, default=JSON_MIMETYPE)
+    return 'msgpack' if best in MSGPACK_MIMETYPES else 'json'
+
+
+def encode_body(payload, fmt):
+    """
+    Serializa una respuesta en el formato negociado
+
+    Returns:
+        tuple: (bytes, mimetype)
+    """
+    if fmt == 'msgpack':
+        return pack(payload), MSGPACK_MIMETYPE
+    return dumps(payload), JSON_MIMETYPE
+
+
+def make_response(payload, fmt=None, status=200):
+    """Respuesta JSON o MessagePack según lo que acepte el cliente"""
+    fmt = fmt or response_format()
+    body, mimetype = encode_body(payload, fmt)
+    response = Response(body, status=status, mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
+
+
+def iter_json_object(fields, array_key, items, trailer=None):
+    """
+    Genera un objeto JSON por partes: primero `fields`, después la lista
+    `array_key` elemento a elemento y al final los campos de trailer()
+
+    Args:
+        fields (dict): Campos conocidos antes de la lista
+        array_key (str): Nombre del campo de la lista
+        items (iterable): Elementos de la lista; se consumen de uno en uno
+        trailer (callable, optional): Devuelve los campos que se conocen al
+            terminar la lista
+
+    Yields:
+        bytes: Partes de CHUNK_BUFFER_SIZE bytes como mínimo (salvo la última)
+    """
+    buffer = bytearray(b'{')
+    for key, value in fields.items():
+        buffer += dumps(key) + b':' + dumps(value) + b','
+    buffer += dumps(array_key) + b':['
+    first = True
+    for item in items:
+        if not first:
+            buffer += b','
+        buffer += dumps(item)
+        first = False
+        if len(buffer) >= CHUNK_BUFFER_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b']'
+    for key, value in (trailer() if trailer else {}).items():
+        buffer += b',' + dumps(key) + b':' + dumps(value)
+    buffer += b'}'
+    yield bytes(buffer)
+
+
+def chunked_response(fields, array_key, items, trailer=None, fmt=None, status=200):
+    """
+    Respuesta con una lista grande codificada por partes
+
+    En JSON el cuerpo se codifica y se envía en partes de CHUNK_BUFFER_SIZE
+    bytes, así no se construye además una copia entera de la respuesta
+    codificada. No es una lectura en streaming de la base de datos: los
+    elementos ya están en memoria (la vista los lee y prepara antes de
+    devolver, con el cursor abierto) y se recorren cuando la conexión ya
+    volvió al pool, así que no pueden leer de la base. La memoria sigue
+    creciendo con el tamaño de la página. MessagePack necesita el tamaño de
+    la lista al principio, así que en ese formato se codifica entera
+    """
+    fmt = fmt or response_format()
+    if fmt == 'msgpack':
+        payload = dict(fields)
+        payload[array_key] = list(items)
+        payload.update(trailer() if trailer else {})
+        return make_response(payload, fmt, status)
+    response = Response(iter_json_object(fields, array_key, items, trailer),
+                        status=status, mimetype=JSON_MIMETYPE)
+    response.vary.add('Accept')
+    return response
@@ -0,0 +1,315 @@
+"""
+Caché versionada de las páginas del listado de documentos
+Cada usuario tiene un contador de versión que sube de forma atómica al
+guardar, editar o borrar un documento. Las páginas ya serializadas se
+guardan con la clave (usuario, versión, parámetros), así que no hace falta
+invalidarlas: tras una escritura la versión cambia y las antiguas dejan de
+pedirse. Hay dos niveles: una LRU en el proceso y un almacén compartido
+entre workers (directorio local o Redis)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def _initial_version():
+    # Un contador nuevo (o perdido) empieza en el instante actual en ms, así
+    # nunca repite una versión anterior aunque el almacén se vacíe
+    return int(time.time() * 1000)
+
+
+def encode_entry(entry):
+    """Serializa una página cacheada: cabecera JSON + cuerpo"""
+    header = {key: value for key, value in entry.items() if key != 'body'}
+    return json.dumps(header, separators=(',', ':')).encode('utf-8') + b'\n' + entry['body']
+
+
+def decode_entry(raw):
+    """Recupera una página cacheada serializada con encode_entry"""
+    header, _, body = raw.partition(b'\n')
+    entry = json.loads(header)
+    entry['body'] = body
+    return entry
+
+
+class MemoryVersionStore:
+    """Versiones y páginas solo en este proceso (un único worker)"""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def version(self, user_id):
+        with self._lock:
+            return self._versions.setdefault(user_id, _initial_version())
+
+    def bump(self, user_id):
+        with self._lock:
+            version = self._versions.get(user_id, _initial_version()) + 1
+            self._versions[user_id] = version
+            return version
+
+    def get_page(self, user_id, version, key):
+        return None
+
+    def set_page(self, user_id, version, key, raw, ttl):
+        pass
+
+
+class FileVersionStore:
+    """
+    Versiones y páginas en un directorio compartido por los workers de la
+    misma máquina. El contador se incrementa con un bloqueo fcntl sobre su
+    archivo; las páginas se escriben con reemplazo atómico. Las páginas
+    contienen documentos de los usuarios: el directorio es 0700 y los
+    archivos 0600, solo accesibles para el usuario del servidor
+    """
+
+    name = 'file'
+
+    def __init__(self, root):
+        """
+        Args:
+            root (str): Directorio de la caché
+
+        Raises:
+            PermissionError: Si el directorio ya existe y es de otro usuario
+        """
+        self.root = root
+        os.makedirs(root, mode=0o700, exist_ok=True)
+        if hasattr(os, 'geteuid') and os.stat(root).st_uid != os.geteuid():
+            # En un directorio temporal compartido otro usuario podría
+            # haberlo creado antes para leer o plantar páginas
+            raise PermissionError(f'El directorio de la caché {root} pertenece a otro usuario')
+        os.chmod(root, 0o700)
+        os.makedirs(os.path.join(root, 'versiones'), mode=0o700, exist_ok=True)
+        os.makedirs(os.path.join(root, 'paginas'), mode=0o700, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _version_path(self, user_id):
+        return os.path.join(self.root, 'versiones', f'{int(user_id)}')
+
+    def _page_dir(self, user_id):
+        return os.path.join(self.root, 'paginas', f'{int(user_id)}')
+
+    def version(self, user_id):
+        try:
+            with open(self._version_path(user_id), 'rb') as f:
+                return int(f.read() or 0) or self.bump(user_id)
+        except FileNotFoundError:
+            return self.bump(user_id)
+
+    def bump(self, user_id):
+        path = self._version_path(user_id)
+        with self._lock:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                current = int(os.read(fd, 32) or 0)
+                version = current + 1 if current else _initial_version()
+                # Escritura en el sitio con la misma longitud o mayor: los
+                # lectores sin bloqueo ven el valor anterior o el nuevo
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.write(fd, str(version).encode('ascii'))
+                os.ftruncate(fd, len(str(version)))
+            finally:
+                os.close(fd)
+        self._purge(user_id, version)
+        return version
+
+    def _purge(self, user_id, version):
+        """Borra las páginas de versiones anteriores del usuario"""
+        directory = self._page_dir(user_id)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return
+        prefix = f'{version}-'
+        for name in names:
+            if not name.startswith(prefix):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    def get_page(self, user_id, version, key):
+        path = os.path.join(self._page_dir(user_id), f'{version}-{key}')
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None
+        expires_at, _, raw = raw.partition(b'\n')
+        if float(expires_at) < time.time():
+            return None
+        return raw
+
+    def set_page(self, user_id, version, key, raw, ttl):
+        directory = self._page_dir(user_id)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        path = os.path.join(directory, f'{version}-{key}')
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+            f.write(f'{time.time() + ttl:.3f}\n'.encode('ascii') + raw)
+        os.replace(tmp, path)
+
+
+class RedisVersionStore:
+    """Versiones (INCR) y páginas (SETEX) en Redis, compartidas entre máquinas"""
+
+    name = 'redis'
+
+    def __init__(self, client, prefix='auris:docs'):
+        self.client = client
+        self.prefix = prefix
+
+    def _version_key(self, user_id):
+        return f'{self.prefix}:v:{int(user_id)}'
+
+    def version(self, user_id):
+        value = self.client.get(self._version_key(user_id))
+        return int(value) if value is not None else self.bump(user_id)
+
+    def bump(self, user_id):
+        key = self._version_key(user_id)
+        self.client.set(key, _initial_version(), nx=True)
+        return int(self.client.incr(key))
+
+    def get_page(self, user_id, version, key):
+        return self.client.get(f'{self.prefix}:p:{int(user_id)}:{version}:{key}')
+
+    def set_page(self, user_id, version, key, raw, ttl):
+        self.client.setex(f'{self.prefix}:p:{int(user_id)}:{version}:{key}', int(ttl), raw)
+
+
+class ListCache:
+    """Caché de dos niveles de páginas del listado, por usuario y versión"""
+
+    def __init__(self, store, max_entries=512, ttl=300):
+        """
+        Args:
+            store: MemoryVersionStore, FileVersionStore o RedisVersionStore
+            max_entries (int): Páginas en la LRU del proceso
+            ttl (float): Segundos de validez de una página
+        """
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'stores': 0,
+                       'bumps': 0, 'evictions': 0, 'errors': 0}
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    @staticmethod
+    def page_key(*parts):
+        """Clave corta a partir de los parámetros que definen la página"""
+        return hashlib.sha256('\0'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+
+    def version(self, user_id):
+        """
+        Versión actual de la biblioteca del usuario
+
+        Returns:
+            int: Versión, o None si el almacén compartido no responde
+        """
+        try:
+            return self.store.version(user_id)
+        except Exception as e:
+            self._count('errors')
+            print(f"⚠️ Caché del listado no disponible: {e}")
+            return None
+
+    def get(self, user_id, version, key):
+        """
+        Obtiene una página cacheada
+
+        Returns:
+            dict: body (bytes JSON), etag y last_modified, o None
+        """
+        if version is None:
+            return None
+        local_key = (user_id, version, key)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(local_key)
+            if cached and cached[1] > now:
+                self._entries.move_to_end(local_key)
+                self._stats['local_hits'] += 1
+                return cached[0]
+        try:
+            raw = self.store.get_page(user_id, version, key)
+        except Exception:
+            raw = None
+            self._count('errors')
+        if raw is None:
+            self._count('misses')
+            return None
+        entry = decode_entry(raw)
+        self._remember(local_key, entry)
+        self._count('shared_hits')
+        return entry
+
+    def set(self, user_id, version, key, entry):
+        """Guarda una página calculada con la versión leída antes de la consulta"""
+        if version is None:
+            return
+        self._remember((user_id, version, key), entry)
+        try:
+            self.store.set_page(user_id, version, key, encode_entry(entry), self.ttl)
+        except Exception:
+            self._count('errors')
+        self._count('stores')
+
+    def _remember(self, local_key, entry):
+        with self._lock:
+            self._entries[local_key] = (entry, time.monotonic() + self.ttl)
+            self._entries.move_to_end(local_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def bump(self, user_id):
+        """Sube la versión del usuario tras una escritura confirmada"""
+        try:
+            self.store.bump(user_id)
+            self._count('bumps')
+        except Exception as e:
+            self._count('errors')
+            print(f"⚠️ No se pudo invalidar el listado del usuario {user_id}: {e}")
+        # Las entradas locales del usuario ya no se volverán a pedir
+        with self._lock:
+            for local_key in [k for k in self._entries if k[0] == user_id]:
+                del self._entries[local_key]
+
+    def stats(self):
+        """
+        Obtiene estadísticas de la caché
+
+        Returns:
+            dict: Aciertos en el proceso y en el almacén compartido, fallos,
+            tasa de aciertos e invalidaciones
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['local_hits'] + stats['shared_hits']) / lookups, 3) if lookups else 0.0
+        stats['backend'] = self.store.name
+        stats['max_entries'] = self.max_entries
+        stats['ttl'] = self.ttl
+        return stats
@@ -0,0 +1,66 @@
+"""
+Registro de métricas internas del proceso
+Cada componente (pool de conexiones, cachés, servicios) registra una función
+que devuelve sus estadísticas y /api/metrics las expone juntas, solo a
+quien presente el token de METRICS_TOKEN
+"""
+import hmac
+import os
+import threading
+
+# Cabecera con la que se presenta el token de métricas
+TOKEN_HEADER = 'X-Metrics-Token'
+
+_sources = {}
+_lock = threading.Lock()
+
+
+def register_source(name, collector):
+    """
+    Registra una fuente de métricas
+
+    Args:
+        name (str): Nombre de la sección en la respuesta
+        collector (callable): Función sin argumentos que devuelve un dict
+    """
+    with _lock:
+        _sources[name] = collector
+
+
+def collect():
+    """
+    Obtiene las métricas de todas las fuentes registradas
+
+    Returns:
+        dict: Métricas agrupadas por fuente
+    """
+    with _lock:
+        sources = list(_sources.items())
+
+    result = {'pid': os.getpid()}
+    for name, collector in sources:
+        try:
+            result[name] = collector()
+        except Exception as e:
+            result[name] = {'error': str(e)}
+    return result
+
+
+def is_enabled():
+    """Las métricas solo se exponen si METRICS_TOKEN está configurado"""
+    return bool(os.environ.get('METRICS_TOKEN'))
+
+
+def is_authorized(request):
+    """
+    Comprueba el token de métricas de una petición
+
+    Args:
+        request: Petición de Flask
+
+    Returns:
+        bool: True si la cabecera X-Metrics-Token coincide con METRICS_TOKEN
+    """
+    token = os.environ.get('METRICS_TOKEN', '')
+    supplied = request.headers.get(TOKEN_HEADER, '')
+    return bool(token) and hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
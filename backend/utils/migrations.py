@@ -0,0 +1,641 @@
+"""
+Migraciones versionadas del esquema de base de datos
+Cada migración tiene un número de versión; la tabla Esquema_Migraciones
+registra las aplicadas y al arrancar solo se ejecutan las pendientes.
+Las mismas migraciones se aplican a MySQL (app.py) y SQLite (server.py).
+
+Uso desde la línea de comandos:
+    python -m backend.utils.migrations --plan mysql     # Mostrar el plan
+    python -m backend.utils.migrations --verify         # Probar el plan en SQLite en memoria
+    python -m backend.utils.migrations --sqlite ruta.db # Aplicar a una base SQLite
+    python -m backend.utils.migrations --mysql          # Aplicar a MySQL (variables DB_*)
+"""
+import argparse
+import os
+import sys
+
+from backend.utils.user_settings import migrate_legacy_settings
+from backend.utils.documents import backfill_content_hashes
+from backend.utils.search import backfill_search_index
+from backend.utils.photos import migrate_legacy_photos
+
+DIALECTS = ('mysql', 'sqlite')
+
+
+class SQL:
+    """Sentencia fija, con texto distinto por dialecto si hace falta"""
+
+    def __init__(self, mysql, sqlite=None):
+        self.statements = {'mysql': mysql, 'sqlite': mysql if sqlite is None else sqlite}
+
+    def describe(self, dialect):
+        return ' '.join(self.statements[dialect].split())
+
+    def apply(self, connection, cursor, dialect):
+        cursor.execute(self.statements[dialect])
+
+
+class AddColumn:
+    """Añade una columna si la tabla aún no la tiene"""
+
+    def __init__(self, table, column, mysql, sqlite=None):
+        self.table = table
+        self.column = column
+        self.definitions = {'mysql': mysql, 'sqlite': mysql if sqlite is None else sqlite}
+
+    def describe(self, dialect):
+        return f"ALTER TABLE {self.table} ADD COLUMN {self.column} {self.definitions[dialect]} (si no existe)"
+
+    def apply(self, connection, cursor, dialect):
+        if not column_exists(cursor, dialect, self.table, self.column):
+            cursor.execute(f"ALTER TABLE {self.table} ADD COLUMN {self.column} {self.definitions[dialect]}")
+
+
+class CreateIndex:
+    """Crea un índice si no existe"""
+
+    def __init__(self, name, table, columns, unique=False):
+        self.name = name
+        self.table = table
+        self.columns = columns
+        self.unique = unique
+
+    def describe(self, dialect):
+        return self._sql() + ' (si no existe)'
+
+    def _sql(self):
+        unique = 'UNIQUE ' if self.unique else ''
+        return f"CREATE {unique}INDEX {self.name} ON {self.table} ({', '.join(self.columns)})"
+
+    def apply(self, connection, cursor, dialect):
+        if not index_exists(cursor, dialect, self.table, self.name):
+            cursor.execute(self._sql())
+
+
+class Call:
+    """Ejecuta una función Python (migraciones de datos)"""
+
+    def __init__(self, func, description):
+        self.func = func
+        self.description = description
+
+    def describe(self, dialect):
+        return self.description
+
+    def apply(self, connection, cursor, dialect):
+        self.func(connection, dialect)
+
+
+def column_exists(cursor, dialect, table, column):
+    """Indica si una tabla tiene una columna"""
+    if dialect == 'mysql':
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """, (table, column))
+        return cursor.fetchone()[0] > 0
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cursor.fetchall())
+
+
+def index_exists(cursor, dialect, table, name):
+    """Indica si existe un índice en una tabla"""
+    if dialect == 'mysql':
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        """, (table, name))
+        return cursor.fetchone()[0] > 0
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND name = ?",
+                   (table, name))
+    return cursor.fetchone()[0] > 0
+
+
+def _widen_audio_column(connection, dialect):
+    """Las tablas creadas por el antiguo init_database() usaban BLOB (64 KB)"""
+    if dialect != 'mysql':
+        return
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT DATA_TYPE FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Documentos' AND COLUMN_NAME = 'archivo_audio'
+        """)
+        row = cursor.fetchone()
+        if row and row[0].lower() != 'longblob':
+            cursor.execute("ALTER TABLE Documentos MODIFY COLUMN archivo_audio LONGBLOB")
+    finally:
+        cursor.close()
+
+
+# Lista ordenada de migraciones. No modificar migraciones ya publicadas:
+# añadir una nueva con el siguiente número de versión.
+MIGRATIONS = [
+    (1, 'esquema_inicial', [
+        SQL("""
+            CREATE TABLE IF NOT EXISTS Usuarios (
+                id INT PRIMARY KEY AUTO_INCREMENT,
+                nombre_usuario VARCHAR(50) NOT NULL UNIQUE,
+                correo_electronico VARCHAR(50) NOT NULL UNIQUE,
+                contraseña VARCHAR(255) NOT NULL,
+                foto_perfil BLOB,
+                creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )
+        """, """
+            CREATE TABLE IF NOT EXISTS Usuarios (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre_usuario TEXT NOT NULL UNIQUE,
+                correo_electronico TEXT NOT NULL UNIQUE,
+                contraseña TEXT NOT NULL,
+                foto_perfil BLOB,
+                creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """),
+        SQL("""
+            CREATE TABLE IF NOT EXISTS Documentos (
+                id INT PRIMARY KEY AUTO_INCREMENT,
+                usuario_id INT,
+                titulo VARCHAR(50) NOT NULL,
+                contenido TEXT,
+                archivo_audio LONGBLOB,
+                nombre_archivo VARCHAR(255),
+                tipo_mime VARCHAR(100) DEFAULT 'audio/mpeg',
+                creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
+            )
+        """, """
+            CREATE TABLE IF NOT EXISTS Documentos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                usuario_id INTEGER,
+                titulo TEXT NOT NULL,
+                contenido TEXT,
+                archivo_audio BLOB,
+                nombre_archivo TEXT,
+                tipo_mime TEXT DEFAULT 'audio/mpeg',
+                creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
+            )
+        """),
+        SQL("""
+            CREATE TABLE IF NOT EXISTS Preferencias_Usuario (
+                usuario_id INT PRIMARY KEY,
+                version SMALLINT NOT NULL DEFAULT 1,
+                datos JSON NOT NULL,
+                actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
+            )
+        """, """
+            CREATE TABLE IF NOT EXISTS Preferencias_Usuario (
+                usuario_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 1,
+                datos TEXT NOT NULL,
+                actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
+            )
+        """),
+        SQL("""
+            CREATE TABLE IF NOT EXISTS Audio_a_Texto (
+                id INT PRIMARY KEY AUTO_INCREMENT,
+                usuario_id INT,
+                archivo_audio BLOB NOT NULL,
+                texto_transcrito TEXT,
+                creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
+            )
+        """, """
+            CREATE TABLE IF NOT EXISTS Audio_a_Texto (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                usuario_id INTEGER,
+                archivo_audio BLOB NOT NULL,
+                texto_transcrito TEXT,
+                creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
+            )
+        """),
+        SQL("""
+            CREATE TABLE IF NOT EXISTS Historial_Transcripciones (
+                id INT PRIMARY KEY AUTO_INCREMENT,
+                usuario_id INT,
+                documento_id INT,
+                texto_transcrito TEXT,
+                creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE,
+                FOREIGN KEY (documento_id) REFERENCES Documentos(id) ON DELETE CASCADE
+            )
+        """, """
+            CREATE TABLE IF NOT EXISTS Historial_Transcripciones (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                usuario_id INTEGER,
+                documento_id INTEGER,
+                texto_transcrito TEXT,
+                creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE,
+                FOREIGN KEY (documento_id) REFERENCES Documentos(id) ON DELETE CASCADE
+            )
+        """)
+    ]),
+    (2, 'columnas_audio_documentos', [
+        # Bases creadas por el antiguo init_database() no tenían estas columnas
+        AddColumn('Documentos', 'archivo_audio', 'LONGBLOB', 'BLOB'),
+        AddColumn('Documentos', 'nombre_archivo', 'VARCHAR(255)', 'TEXT'),
+        AddColumn('Documentos', 'tipo_mime', "VARCHAR(100) DEFAULT 'audio/mpeg'", "TEXT DEFAULT 'audio/mpeg'"),
+        Call(_widen_audio_column, 'Ampliar Documentos.archivo_audio a LONGBLOB (solo MySQL)')
+    ]),
+    (3, 'preferencias_desde_esquema_antiguo', [
+        Call(migrate_legacy_settings, 'Copiar Configuraciones_Usuario a Preferencias_Usuario')
+    ]),
+    (4, 'indices_documentos', [
+        # Listado de la biblioteca: WHERE usuario_id = ? ORDER BY actualizado_en
+        CreateIndex('idx_documentos_usuario_actualizado', 'Documentos', ['usuario_id', 'actualizado_en']),
+        # Comprobación de propiedad: WHERE id = ? AND usuario_id = ?
+        CreateIndex('idx_documentos_id_usuario', 'Documentos', ['id', 'usuario_id'])
+    ]),
+    (5, 'extracto_documentos', [
+        # El listado devuelve extracto y tamaño sin leer el contenido completo
+        AddColumn('Documentos', 'extracto', 'VARCHAR(255)', 'TEXT'),
+        AddColumn('Documentos', 'tamano_contenido', 'INT NOT NULL DEFAULT 0', 'INTEGER NOT NULL DEFAULT 0'),
+        SQL("""
+            UPDATE Documentos
+            SET extracto = LEFT(contenido, 200), tamano_contenido = CHAR_LENGTH(contenido),
+                actualizado_en = actualizado_en
+            WHERE extracto IS NULL AND contenido IS NOT NULL
+        """, """
+            UPDATE Documentos
+            SET extracto = substr(contenido, 1, 200), tamano_contenido = length(contenido)
+            WHERE extracto IS NULL AND contenido IS NOT NULL
+        """)
+    ]),
+    (6, 'almacen_audio', [
+        # El audio sale de Documentos: la fila solo guarda si tiene audio y
+        # los metadatos viven en Audios_Documento
+        AddColumn('Documentos', 'tiene_audio', 'TINYINT(1) NOT NULL DEFAULT 0', 'INTEGER NOT NULL DEFAULT 0'),
+        SQL("""
+            CREATE TABLE IF NOT EXISTS Audios_Documento (
+                documento_id INT PRIMARY KEY,
+                almacen VARCHAR(20) NOT NULL,
+                ubicacion VARCHAR(255) NOT NULL,
+                tipo_mime VARCHAR(100) DEFAULT 'audio/mpeg',
+                tamano_bytes BIGINT NOT NULL,
+                duracion_ms INT,
+                hash_sha256 CHAR(64) NOT NULL,
+                creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (documento_id) REFERENCES Documentos(id) ON DELETE CASCADE
+            )
+        """, """
+            CREATE TABLE IF NOT EXISTS Audios_Documento (
+                documento_id INTEGER PRIMARY KEY,
+                almacen TEXT NOT NULL,
+                ubicacion TEXT NOT NULL,
+                tipo_mime TEXT DEFAULT 'audio/mpeg',
+                tamano_bytes INTEGER NOT NULL,
+                duracion_ms INTEGER,
+                hash_sha256 TEXT NOT NULL,
+                creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (documento_id) REFERENCES Documentos(id) ON DELETE CASCADE
+            )
+        """),
+        # Almacén opcional dentro de la base de datos (AUDIO_STORE=database)
+        SQL("""
+            CREATE TABLE IF NOT EXISTS Audio_Blobs (
+                clave VARCHAR(255) PRIMARY KEY,
+                datos LONGBLOB NOT NULL
+            )
+        """, """
+            CREATE TABLE IF NOT EXISTS Audio_Blobs (
+                clave TEXT PRIMARY KEY,
+                datos BLOB NOT NULL
+            )
+        """)
+    ]),
+    (7, 'hash_documentos', [
+        # Validador (ETag) de cada documento, calculado al escribirlo
+        AddColumn('Documentos', 'hash_contenido', 'CHAR(64)', 'TEXT'),
+        Call(backfill_content_hashes, 'Calcular hash_contenido de los documentos existentes')
+    ]),
+    (8, 'busqueda_documentos', [
+        # Índice de texto completo en su propia tabla: la búsqueda no depende
+        # de cómo se guarde Documentos.contenido
+        SQL("""
+            CREATE TABLE IF NOT EXISTS Busqueda_Documentos (
+                documento_id INT PRIMARY KEY,
+                usuario_id INT NOT NULL,
+                titulo VARCHAR(50) NOT NULL,
+                contenido MEDIUMTEXT NOT NULL,
+                INDEX idx_busqueda_usuario (usuario_id),
+                FULLTEXT INDEX ft_busqueda_titulo (titulo),
+                FULLTEXT INDEX ft_busqueda_texto (titulo, contenido),
+                FOREIGN KEY (documento_id) REFERENCES Documentos(id) ON DELETE CASCADE
+            ) ENGINE=InnoDB
+        """, """
+            CREATE VIRTUAL TABLE IF NOT EXISTS Busqueda_Documentos USING fts5(
+                titulo, contenido, usuario_id UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """),
+        Call(backfill_search_index, 'Indexar los documentos existentes en Busqueda_Documentos')
+    ]),
+    (9, 'compresion_contenido', [
+        # Texto largo comprimido; formato_contenido indica cómo leerlo. Los
+        # documentos existentes los comprime CompressionJob en segundo plano
+        AddColumn('Documentos', 'formato_contenido', "VARCHAR(10) NOT NULL DEFAULT 'texto'",
+                  "TEXT NOT NULL DEFAULT 'texto'"),
+        AddColumn('Documentos', 'contenido_comprimido', 'LONGBLOB', 'BLOB')
+    ]),
+    (10, 'fragmentos_documentos', [
+        # Documentos largos o con páginas: el texto va en fragmentos ordenados
+        # (formato_contenido = 'fragmentos') y se lee por ventanas
+        SQL("""
+            CREATE TABLE IF NOT EXISTS Fragmentos_Documento (
+                id BIGINT PRIMARY KEY AUTO_INCREMENT,
+                documento_id INT NOT NULL,
+                posicion INT NOT NULL,
+                pagina INT,
+                inicio INT NOT NULL,
+                longitud INT NOT NULL,
+                hash_sha256 CHAR(64) NOT NULL,
+                formato VARCHAR(10) NOT NULL DEFAULT 'texto',
+                texto MEDIUMTEXT,
+                datos MEDIUMBLOB,
+                INDEX idx_fragmentos_documento_posicion (documento_id, posicion),
+                FOREIGN KEY (documento_id) REFERENCES Documentos(id) ON DELETE CASCADE
+            )
+        """, """
+            CREATE TABLE IF NOT EXISTS Fragmentos_Documento (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                documento_id INTEGER NOT NULL,
+                posicion INTEGER NOT NULL,
+                pagina INTEGER,
+                inicio INTEGER NOT NULL,
+                longitud INTEGER NOT NULL,
+                hash_sha256 TEXT NOT NULL,
+                formato TEXT NOT NULL DEFAULT 'texto',
+                texto TEXT,
+                datos BLOB,
+                FOREIGN KEY (documento_id) REFERENCES Documentos(id) ON DELETE CASCADE
+            )
+        """),
+        CreateIndex('idx_fragmentos_documento_posicion', 'Fragmentos_Documento', ['documento_id', 'posicion']),
+        AddColumn('Documentos', 'total_fragmentos', 'INT NOT NULL DEFAULT 0', 'INTEGER NOT NULL DEFAULT 0'),
+        AddColumn('Documentos', 'total_paginas', 'INT', 'INTEGER')
+    ]),
+    (11, 'sincronizacion_documentos', [
+        # Sincronización incremental (/api/documents/sync): cada escritura
+        # toma el siguiente número del contador del usuario y los borrados
+        # quedan como lápidas hasta que se purgan
+        AddColumn('Documentos', 'eliminado_en', 'TIMESTAMP NULL DEFAULT NULL', 'TIMESTAMP'),
+        AddColumn('Documentos', 'version_sync', 'BIGINT NOT NULL DEFAULT 0', 'INTEGER NOT NULL DEFAULT 0'),
+        AddColumn('Usuarios', 'version_biblioteca', 'BIGINT NOT NULL DEFAULT 0', 'INTEGER NOT NULL DEFAULT 0'),
+        AddColumn('Usuarios', 'sync_purgado', 'BIGINT NOT NULL DEFAULT 0', 'INTEGER NOT NULL DEFAULT 0'),
+        SQL("""
+            UPDATE Documentos SET version_sync = id, actualizado_en = actualizado_en WHERE version_sync = 0
+        """, """
+            UPDATE Documentos SET version_sync = id WHERE version_sync = 0
+        """),
+        SQL("""
+            UPDATE Usuarios SET version_biblioteca = (
+                SELECT COALESCE(MAX(d.version_sync), 0) FROM Documentos d WHERE d.usuario_id = Usuarios.id
+            ), actualizado_en = actualizado_en
+        """, """
+            UPDATE Usuarios SET version_biblioteca = (
+                SELECT COALESCE(MAX(d.version_sync), 0) FROM Documentos d WHERE d.usuario_id = Usuarios.id
+            )
+        """),
+        CreateIndex('idx_documentos_usuario_sync', 'Documentos', ['usuario_id', 'version_sync'])
+    ]),
+    (12, 'fotos_perfil', [
+        # Miniaturas pregeneradas de la foto de perfil; Usuarios.foto_perfil
+        # queda obsoleta y login/configuración solo leen foto_hash
+        SQL("""
+            CREATE TABLE IF NOT EXISTS Fotos_Perfil (
+                usuario_id INT NOT NULL,
+                variante VARCHAR(10) NOT NULL,
+                tipo_mime VARCHAR(50) NOT NULL,
+                ancho INT NOT NULL,
+                alto INT NOT NULL,
+                tamano_bytes INT NOT NULL,
+                hash_sha256 CHAR(64) NOT NULL,
+                datos MEDIUMBLOB NOT NULL,
+                creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (usuario_id, variante),
+                FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
+            )
+        """, """
+            CREATE TABLE IF NOT EXISTS Fotos_Perfil (
+                usuario_id INTEGER NOT NULL,
+                variante TEXT NOT NULL,
+                tipo_mime TEXT NOT NULL,
+                ancho INTEGER NOT NULL,
+                alto INTEGER NOT NULL,
+                tamano_bytes INTEGER NOT NULL,
+                hash_sha256 TEXT NOT NULL,
+                datos BLOB NOT NULL,
+                creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (usuario_id, variante),
+                FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
+            )
+        """),
+        AddColumn('Usuarios', 'foto_hash', 'CHAR(64)', 'TEXT'),
+        Call(migrate_legacy_photos, 'Generar las miniaturas de las fotos de Usuarios.foto_perfil')
+    ])
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _ensure_version_table(cursor, dialect):
+    if dialect == 'mysql':
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS Esquema_Migraciones (
+                version INT PRIMARY KEY,
+                nombre VARCHAR(100) NOT NULL,
+                aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS Esquema_Migraciones (
+                version INTEGER PRIMARY KEY,
+                nombre TEXT NOT NULL,
+                aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+
+def current_version(connection, dialect):
+    """
+    Obtiene la versión de esquema aplicada
+
+    Returns:
+        int: Última versión registrada (0 si la base está vacía)
+    """
+    cursor = connection.cursor()
+    try:
+        _ensure_version_table(cursor, dialect)
+        cursor.execute("SELECT MAX(version) FROM Esquema_Migraciones")
+        row = cursor.fetchone()
+        return row[0] or 0
+    finally:
+        cursor.close()
+
+
+def plan(dialect, from_version=0):
+    """
+    Describe las migraciones pendientes sin ejecutarlas
+
+    Args:
+        dialect (str): 'mysql' o 'sqlite'
+        from_version (int): Versión ya aplicada
+
+    Returns:
+        list: Tuplas (versión, nombre, [descripción de cada paso])
+    """
+    return [
+        (version, name, [step.describe(dialect) for step in steps])
+        for version, name, steps in MIGRATIONS
+        if version > from_version
+    ]
+
+
+def run_migrations(connection, dialect, target=None):
+    """
+    Aplica las migraciones pendientes en orden
+
+    Cada paso es idempotente, así que si una migración falla a mitad
+    (en MySQL el DDL no es transaccional) puede volver a ejecutarse.
+
+    Args:
+        connection: Conexión abierta
+        dialect (str): 'mysql' o 'sqlite'
+        target (int, optional): Versión hasta la que migrar
+
+    Returns:
+        list: Versiones aplicadas en esta ejecución
+    """
+    if dialect not in DIALECTS:
+        raise ValueError(f'Dialecto no soportado: {dialect}')
+    target = LATEST_VERSION if target is None else target
+
+    applied = []
+    cursor = connection.cursor()
+    locked = False
+    try:
+        version = current_version(connection, dialect)
+        if version >= target:
+            return applied
+
+        # Varios workers pueden arrancar a la vez: solo uno migra
+        if dialect == 'mysql':
+            cursor.execute("SELECT GET_LOCK('auris_migraciones', 60)")
+            locked = cursor.fetchone()[0] == 1
+            if not locked:
+                raise RuntimeError('No se obtuvo el bloqueo de migraciones')
+            version = current_version(connection, dialect)
+
+        placeholder = '%s' if dialect == 'mysql' else '?'
+        for number, name, steps in MIGRATIONS:
+            if number <= version or number > target:
+                continue
+            for step in steps:
+                step.apply(connection, cursor, dialect)
+            cursor.execute(
+                f"INSERT INTO Esquema_Migraciones (version, nombre) VALUES ({placeholder}, {placeholder})",
+                (number, name))
+            connection.commit()
+            applied.append(number)
+            print(f"✅ Migración {number} ({name}) aplicada")
+        return applied
+    finally:
+        if locked:
+            cursor.execute("SELECT RELEASE_LOCK('auris_migraciones')")
+            cursor.fetchone()
+        cursor.close()
+
+
+def verify_sqlite():
+    """
+    Aplica todas las migraciones a una base SQLite en memoria y comprueba
+    que una segunda ejecución no hace nada
+
+    Returns:
+        bool: True si el plan se aplica correctamente
+    """
+    import sqlite3
+
+    connection = sqlite3.connect(':memory:')
+    try:
+        applied = run_migrations(connection, 'sqlite')
+        if applied != [number for number, _, _ in MIGRATIONS]:
+            return False
+        if run_migrations(connection, 'sqlite'):
+            return False
+        cursor = connection.cursor()
+        for _, _, steps in MIGRATIONS:
+            for step in steps:
+                if isinstance(step, CreateIndex) and not index_exists(cursor, 'sqlite', step.table, step.name):
+                    return False
+                if isinstance(step, AddColumn) and not column_exists(cursor, 'sqlite', step.table, step.column):
+                    return False
+        return current_version(connection, 'sqlite') == LATEST_VERSION
+    finally:
+        connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Migraciones del esquema de Auris')
+    parser.add_argument('--plan', choices=DIALECTS, help='Mostrar el plan completo para un dialecto')
+    parser.add_argument('--verify', action='store_true', help='Verificar el plan en SQLite en memoria')
+    parser.add_argument('--sqlite', metavar='RUTA', help='Aplicar las migraciones a una base SQLite')
+    parser.add_argument('--mysql', action='store_true', help='Aplicar las migraciones a MySQL (variables DB_*)')
+    args = parser.parse_args(argv)
+
+    if args.plan:
+        for version, name, steps in plan(args.plan):
+            print(f"{version:>3} {name}")
+            for description in steps:
+                print(f"      - {description}")
+        return 0
+
+    if args.verify:
+        ok = verify_sqlite()
+        print("✅ Plan de migraciones verificado en SQLite" if ok else "❌ El plan de migraciones falló")
+        return 0 if ok else 1
+
+    if args.sqlite:
+        import sqlite3
+        connection = sqlite3.connect(args.sqlite)
+        try:
+            run_migrations(connection, 'sqlite')
+        finally:
+            connection.close()
+        return 0
+
+    if args.mysql:
+        import mysql.connector
+        connection = mysql.connector.connect(
+            host=os.environ.get('DB_HOST', 'localhost'),
+            user=os.environ.get('DB_USER', 'root'),
+            password=os.environ.get('DB_PASSWORD', 'Auris2025.'),
+            database=os.environ.get('DB_NAME', 'Auris'),
+            charset='utf8mb4',
+            autocommit=True
+        )
+        try:
+            run_migrations(connection, 'mysql')
+        finally:
+            connection.close()
+        return 0
+
+    parser.print_help()
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
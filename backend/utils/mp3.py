@@ -0,0 +1,118 @@
+"""
+Lectura mínima de cabeceras MP3: duración y unión de frames
+"""
+
+# Tasas de bits (kbps) de Layer III según versión MPEG
+_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+}
+
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG 1
+    2: [22050, 24000, 16000],  # MPEG 2
+    0: [11025, 12000, 8000]    # MPEG 2.5
+}
+
+
+def _skip_id3(data):
+    """Devuelve la posición tras la etiqueta ID3v2 inicial, si existe"""
+    if len(data) >= 10 and data[:3] == b'ID3':
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def _parse_header(data, pos):
+    """
+    Interpreta la cabecera de frame en `pos`
+
+    Returns:
+        tuple: (longitud del frame en bytes, muestras por frame, frecuencia) o None
+    """
+    if pos + 4 > len(data):
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_index = (b2 >> 4) & 0x0F
+    sample_index = (b2 >> 2) & 0x03
+    padding = (b2 >> 1) & 0x01
+
+    # Solo Layer III (el formato que generan los servicios TTS)
+    if version_bits == 1 or layer_bits != 1 or bitrate_index in (0, 15) or sample_index == 3:
+        return None
+
+    mpeg1 = version_bits == 3
+    bitrate = _BITRATES[1 if mpeg1 else 2][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][sample_index]
+    samples = 1152 if mpeg1 else 576
+    length = (samples // 8) * bitrate // sample_rate + padding
+    return length, samples, sample_rate
+
+
+def iter_frames(data):
+    """
+    Recorre los frames de audio de un MP3
+
+    Yields:
+        tuple: (inicio, fin, muestras, frecuencia) de cada frame
+    """
+    pos = _skip_id3(data)
+    end = len(data)
+    # Una etiqueta ID3v1 al final no es audio
+    if end >= 128 and data[end - 128:end - 125] == b'TAG':
+        end -= 128
+
+    while pos < end:
+        header = _parse_header(data, pos)
+        if header is None:
+            # Resincronizar con la siguiente cabecera válida
+            pos = data.find(b'\xff', pos + 1, end)
+            if pos < 0:
+                return
+            continue
+        length, samples, sample_rate = header
+        if pos + length > end:
+            return
+        yield pos, pos + length, samples, sample_rate
+        pos += length
+
+
+def duration_ms(data):
+    """
+    Calcula la duración de un MP3 sumando sus frames
+
+    Args:
+        data (bytes): Contenido del archivo
+
+    Returns:
+        int: Duración en milisegundos (0 si no se reconocen frames)
+    """
+    total = 0.0
+    for _, _, samples, sample_rate in iter_frames(data):
+        total += samples / sample_rate
+    return int(total * 1000)
+
+
+def join_frames(parts):
+    """
+    Une varios MP3 en uno solo conservando únicamente sus frames de audio
+    (sin etiquetas ID3 intermedias que algunos reproductores tratan como ruido)
+
+    Args:
+        parts (iterable): Contenidos MP3 en orden
+
+    Returns:
+        bytes: MP3 unido
+    """
+    output = bytearray()
+    for data in parts:
+        view = memoryview(data)
+        for start, end, _, _ in iter_frames(data):
+            output += view[start:end]
+    return bytes(output)
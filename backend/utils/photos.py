@@ -0,0 +1,178 @@
+"""
+Fotos de perfil en miniaturas pregeneradas
+Al subir una foto se generan una vez, con Pillow, las variantes small,
+medium y large (cuadradas, WebP) y se guardan en Fotos_Perfil. Login y
+configuración solo devuelven la URL y el hash; los bytes se sirven desde
+/api/users/<id>/photo con ETag y caché larga, porque la URL lleva el hash
+"""
+import base64
+import hashlib
+import io
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Lado en píxeles de cada variante
+VARIANTS = {'small': 64, 'medium': 192, 'large': 512}
+DEFAULT_VARIANT = 'medium'
+
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+# Límite de píxeles de la imagen original (evita bombas de descompresión)
+MAX_SOURCE_PIXELS = 40_000_000
+
+OUTPUT_FORMAT = 'WEBP'
+OUTPUT_MIME = 'image/webp'
+OUTPUT_QUALITY = 82
+
+# Caracteres del hash que van en la URL (?v=): cambian con cada foto nueva
+URL_HASH_LENGTH = 16
+
+
+def parse_variant(value):
+    """
+    Interpreta ?size= de la ruta de la foto
+
+    Raises:
+        ValueError: Si no es una variante conocida
+    """
+    variant = value or DEFAULT_VARIANT
+    if variant not in VARIANTS:
+        raise ValueError(f"size debe ser uno de: {', '.join(VARIANTS)}")
+    return variant
+
+
+def make_thumbnails(data):
+    """
+    Genera las variantes de una foto subida
+
+    Args:
+        data (bytes): Imagen original (JPEG, PNG, WebP, GIF...)
+
+    Returns:
+        tuple: (hash SHA-256 del original, dict variante -> diccionario con
+        datos, tipo_mime, ancho, alto y hash)
+
+    Raises:
+        ValueError: Si la imagen es demasiado grande o no se puede leer
+    """
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise ValueError(f'La foto no puede superar {MAX_UPLOAD_BYTES // (1024 * 1024)} MB')
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width * image.height > MAX_SOURCE_PIXELS:
+                raise ValueError('La foto tiene demasiados píxeles')
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise ValueError('El archivo no es una imagen válida')
+
+    thumbnails = {}
+    for variant, side in VARIANTS.items():
+        thumbnail = ImageOps.fit(image, (side, side), Image.LANCZOS)
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, OUTPUT_FORMAT, quality=OUTPUT_QUALITY, method=4)
+        datos = buffer.getvalue()
+        thumbnails[variant] = {
+            'datos': datos,
+            'tipo_mime': OUTPUT_MIME,
+            'ancho': side,
+            'alto': side,
+            'hash': hashlib.sha256(datos).hexdigest()
+        }
+    return hashlib.sha256(data).hexdigest(), thumbnails
+
+
+def store_photo(cursor, user_id, foto_hash, thumbnails, placeholder='%s'):
+    """Reemplaza las variantes de la foto del usuario (sin commit)"""
+    p = placeholder
+    cursor.execute(f"DELETE FROM Fotos_Perfil WHERE usuario_id = {p}", (user_id,))
+    for variant, thumbnail in thumbnails.items():
+        cursor.execute(f"""
+            INSERT INTO Fotos_Perfil
+                (usuario_id, variante, tipo_mime, ancho, alto, tamano_bytes, hash_sha256, datos)
+            VALUES ({p}, {p}, {p}, {p}, {p}, {p}, {p}, {p})
+        """, (user_id, variant, thumbnail['tipo_mime'], thumbnail['ancho'], thumbnail['alto'],
+              len(thumbnail['datos']), thumbnail['hash'], thumbnail['datos']))
+    cursor.execute(f"UPDATE Usuarios SET foto_hash = {p}, foto_perfil = NULL WHERE id = {p}", (foto_hash, user_id))
+
+
+def delete_photo(cursor, user_id, placeholder='%s'):
+    """Quita la foto del usuario (sin commit)"""
+    p = placeholder
+    cursor.execute(f"DELETE FROM Fotos_Perfil WHERE usuario_id = {p}", (user_id,))
+    cursor.execute(f"UPDATE Usuarios SET foto_hash = NULL, foto_perfil = NULL WHERE id = {p}", (user_id,))
+
+
+def read_variant(cursor, user_id, variant, placeholder='%s'):
+    """
+    Lee una variante de la foto del usuario
+
+    Returns:
+        tuple: (foto_hash, tipo_mime, hash de la variante, datos), o None
+    """
+    p = placeholder
+    cursor.execute(f"""
+        SELECT u.foto_hash, f.tipo_mime, f.hash_sha256, f.datos
+        FROM Usuarios u
+        JOIN Fotos_Perfil f ON f.usuario_id = u.id AND f.variante = {p}
+        WHERE u.id = {p}
+    """, (variant, user_id))
+    return cursor.fetchone()
+
+
+def photo_url(user_id, foto_hash, variant=DEFAULT_VARIANT):
+    """URL versionada de una variante de la foto, o None si no hay foto"""
+    if not foto_hash:
+        return None
+    return f'/api/users/{user_id}/photo?size={variant}&v={foto_hash[:URL_HASH_LENGTH]}'
+
+
+def photo_fields(user_id, foto_hash):
+    """Campos de la foto en las respuestas de login y configuración"""
+    variants = {variant: photo_url(user_id, foto_hash, variant) for variant in VARIANTS}
+    return {
+        'foto_perfil': photo_url(user_id, foto_hash),
+        'foto_hash': foto_hash,
+        'fotos': variants if foto_hash else None
+    }
+
+
+def migrate_legacy_photos(connection, dialect, batch_size=50):
+    """
+    Genera las variantes de las fotos guardadas en Usuarios.foto_perfil y
+    vacía esa columna. Las que no se pueden leer se descartan
+
+    Returns:
+        int: Fotos convertidas
+    """
+    p = '%s' if dialect == 'mysql' else '?'
+    cursor = connection.cursor()
+    converted = 0
+    last_id = 0
+    try:
+        while True:
+            cursor.execute(f"""
+                SELECT id, foto_perfil FROM Usuarios
+                WHERE id > {p} AND foto_perfil IS NOT NULL
+                ORDER BY id LIMIT {int(batch_size)}
+            """, (last_id,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            for user_id, foto in rows:
+                try:
+                    foto = foto.encode('utf-8') if isinstance(foto, str) else bytes(foto)
+                    # Algunas fotos antiguas se guardaron como data URL
+                    if foto.startswith(b'data:'):
+                        foto = base64.b64decode(foto.partition(b',')[2])
+                    foto_hash, thumbnails = make_thumbnails(foto)
+                except ValueError as e:
+                    print(f"⚠️ Foto de perfil del usuario {user_id} descartada: {e}")
+                    cursor.execute(f"UPDATE Usuarios SET foto_perfil = NULL WHERE id = {p}", (user_id,))
+                    continue
+                store_photo(cursor, user_id, foto_hash, thumbnails, p)
+                converted += 1
+            connection.commit()
+            last_id = rows[-1][0]
+        return converted
+    finally:
+        cursor.close()
@@ -0,0 +1,280 @@
+"""
+Capa de acceso a datos compartida por app.py (MySQL) y server.py (SQLite)
+Cada consulta se escribe una sola vez con marcadores '?'; el driver la
+traduce a su dialecto una vez, reutiliza la sentencia preparada y devuelve
+las filas como diccionarios con los mismos tipos en ambos motores
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from backend.utils.user_settings import (DEFAULT_SETTINGS, SETTINGS_DOCUMENT_VERSION,
+                                         encode_settings_document, decode_settings_document)
+
+# Consultas por nombre. Un dict por dialecto cuando el SQL difiere
+STATEMENTS = {
+    'user_exists': """
+        SELECT id FROM Usuarios WHERE correo_electronico = ? OR nombre_usuario = ? LIMIT 1
+    """,
+    'user_by_email': """
+        SELECT id, nombre_usuario, correo_electronico, contraseña, foto_hash
+        FROM Usuarios WHERE correo_electronico = ?
+    """,
+    'user_profile': """
+        SELECT id, nombre_usuario, correo_electronico, foto_hash FROM Usuarios WHERE id = ?
+    """,
+    'create_user': """
+        INSERT INTO Usuarios (nombre_usuario, correo_electronico, contraseña) VALUES (?, ?, ?)
+    """,
+    'settings': """
+        SELECT version, datos FROM Preferencias_Usuario WHERE usuario_id = ?
+    """,
+    # Fusión del documento de configuraciones en una sola sentencia
+    'upsert_settings': {
+        'mysql': """
+            INSERT INTO Preferencias_Usuario (usuario_id, version, datos)
+            VALUES (?, ?, ?)
+            ON DUPLICATE KEY UPDATE datos = JSON_MERGE_PATCH(datos, VALUES(datos)),
+                                    version = VALUES(version)
+        """,
+        'sqlite': """
+            INSERT INTO Preferencias_Usuario (usuario_id, version, datos)
+            VALUES (?, ?, ?)
+            ON CONFLICT(usuario_id) DO UPDATE SET datos = json_patch(datos, excluded.datos),
+                                                  version = excluded.version
+        """
+    }
+}
+
+
+def map_row(description, row):
+    """
+    Convierte una fila en diccionario con tipos homogéneos entre motores:
+    bytearray pasa a bytes y las marcas de tiempo de SQLite (texto en
+    columnas *_en) pasan a datetime como en MySQL
+
+    Args:
+        description: cursor.description de la consulta
+        row: Fila devuelta por el driver
+
+    Returns:
+        dict: Columna -> valor
+    """
+    mapped = {}
+    for column, value in zip(description, row):
+        name = column[0]
+        if isinstance(value, bytearray):
+            value = bytes(value)
+        elif isinstance(value, str) and name.endswith('_en'):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                pass
+        mapped[name] = value
+    return mapped
+
+
+class Driver:
+    """Ejecuta las consultas de STATEMENTS sobre una conexión del motor"""
+
+    dialect = None
+    placeholder = '?'
+
+    def __init__(self, statements=None):
+        self.statements = statements or STATEMENTS
+        self._compiled = {}
+        self._lock = threading.Lock()
+        self._stats = {'executions': 0, 'prepared': 0, 'reused': 0}
+
+    def sql(self, name):
+        """Texto de una consulta en el dialecto del driver (traducido una vez)"""
+        sql = self._compiled.get(name)
+        if sql is None:
+            statement = self.statements[name]
+            if isinstance(statement, dict):
+                statement = statement[self.dialect]
+            sql = ' '.join(statement.split())
+            if self.placeholder != '?':
+                sql = sql.replace('?', self.placeholder)
+            self._compiled[name] = sql
+        return sql
+
+    def _cursor(self, connection, sql):
+        """Devuelve (cursor, cerrar_al_terminar)"""
+        return connection.cursor(), True
+
+    def _count(self, key):
+        with self._lock:
+            self._stats['executions'] += 1
+            self._stats[key] += 1
+
+    def _run(self, connection, name, params, fetch):
+        sql = self.sql(name)
+        cursor, close = self._cursor(connection, sql)
+        try:
+            cursor.execute(sql, tuple(params))
+            if fetch:
+                rows = cursor.fetchall()
+                return [map_row(cursor.description, row) for row in rows]
+            return cursor.rowcount, cursor.lastrowid
+        finally:
+            if close:
+                cursor.close()
+
+    def query(self, connection, name, params=()):
+        """
+        Ejecuta una consulta de lectura
+
+        Returns:
+            list: Filas como diccionarios
+        """
+        return self._run(connection, name, params, fetch=True)
+
+    def query_one(self, connection, name, params=()):
+        """Primera fila de la consulta o None"""
+        rows = self.query(connection, name, params)
+        return rows[0] if rows else None
+
+    def execute(self, connection, name, params=()):
+        """
+        Ejecuta una sentencia de escritura (sin commit)
+
+        Returns:
+            tuple: (filas afectadas, último id insertado)
+        """
+        return self._run(connection, name, params, fetch=False)
+
+    def stats(self):
+        """
+        Obtiene estadísticas de ejecución
+
+        Returns:
+            dict: Ejecuciones y sentencias preparadas nuevas y reutilizadas
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['dialect'] = self.dialect
+        stats['statements'] = len(self._compiled)
+        return stats
+
+
+class SQLiteDriver(Driver):
+    """
+    SQLite guarda en la propia conexión una caché de sentencias preparadas
+    indexada por el texto SQL (parámetro cached_statements de connect), así
+    que basta con usar siempre el mismo texto para cada consulta. Para las
+    estadísticas, el primer uso de cada texto en una conexión cuenta como
+    preparada y los siguientes como reutilizadas (si la caché de sqlite3
+    descarta una sentencia, su nueva preparación no se ve desde aquí)
+    """
+
+    dialect = 'sqlite'
+    placeholder = '?'
+
+    def _cursor(self, connection, sql):
+        seen = getattr(connection, '_seen_statements', None)
+        if seen is None:
+            seen = set()
+            try:
+                connection._seen_statements = seen
+            except AttributeError:
+                # sqlite3.Connection sin envolver: no se puede recordar
+                self._count('prepared')
+                return connection.cursor(), True
+        if sql in seen:
+            self._count('reused')
+        else:
+            seen.add(sql)
+            self._count('prepared')
+        return connection.cursor(), True
+
+
+class MySQLDriver(Driver):
+    """
+    Usa cursores preparados de mysql.connector (protocolo binario), uno por
+    consulta y conexión, guardados en la conexión del pool con límite LRU
+    """
+
+    dialect = 'mysql'
+    placeholder = '%s'
+
+    def __init__(self, statements=None, cache_size=64):
+        super().__init__(statements)
+        self.cache_size = cache_size
+
+    def _cursor(self, connection, sql):
+        cache = getattr(connection, '_prepared_statements', None)
+        if cache is None:
+            cache = OrderedDict()
+            try:
+                connection._prepared_statements = cache
+            except AttributeError:
+                # Conexión sin atributos propios: cursor preparado de un solo uso
+                self._count('prepared')
+                return connection.cursor(prepared=True), True
+
+        cursor = cache.get(sql)
+        if cursor is not None:
+            cache.move_to_end(sql)
+            self._count('reused')
+            return cursor, False
+
+        cursor = connection.cursor(prepared=True)
+        cache[sql] = cursor
+        while len(cache) > self.cache_size:
+            _, evicted = cache.popitem(last=False)
+            try:
+                evicted.close()
+            except Exception:
+                pass
+        self._count('prepared')
+        return cursor, False
+
+
+class Repository:
+    """Operaciones de datos de la aplicación, independientes del motor"""
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    # ----- Usuarios -----
+
+    def user_exists(self, connection, correo_electronico, nombre_usuario):
+        """Indica si ya hay un usuario con ese correo o nombre"""
+        return self.driver.query_one(connection, 'user_exists', (correo_electronico, nombre_usuario)) is not None
+
+    def create_user(self, connection, nombre_usuario, correo_electronico, contraseña_hash):
+        """
+        Inserta un usuario (sin commit)
+
+        Returns:
+            int: Id del nuevo usuario
+        """
+        _, user_id = self.driver.execute(connection, 'create_user',
+                                         (nombre_usuario, correo_electronico, contraseña_hash))
+        return user_id
+
+    def find_user_by_email(self, connection, correo_electronico):
+        """Usuario con su hash de contraseña, o None"""
+        return self.driver.query_one(connection, 'user_by_email', (correo_electronico,))
+
+    def get_user_profile(self, connection, user_id):
+        """Datos públicos del usuario (la foto solo como foto_hash), o None"""
+        return self.driver.query_one(connection, 'user_profile', (user_id,))
+
+    # ----- Configuraciones -----
+
+    def load_settings(self, connection, user_id):
+        """
+        Configuraciones tipadas del usuario (valores por defecto si no tiene)
+
+        Returns:
+            dict: Configuraciones
+        """
+        row = self.driver.query_one(connection, 'settings', (user_id,))
+        return decode_settings_document(row['version'], row['datos']) if row else dict(DEFAULT_SETTINGS)
+
+    def save_settings(self, connection, user_id, configuraciones):
+        """Fusiona configuraciones en el documento del usuario (sin commit)"""
+        self.driver.execute(connection, 'upsert_settings',
+                            (user_id, SETTINGS_DOCUMENT_VERSION, encode_settings_document(configuraciones)))
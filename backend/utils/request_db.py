@@ -0,0 +1,111 @@
+"""
+Conexión a la base de datos con alcance de petición
+La conexión se toma del pool solo cuando la ruta la necesita, puede
+liberarse antes de operaciones lentas (síntesis de voz, descargas) y se
+devuelve automáticamente al terminar la petición
+"""
+import threading
+import time
+from flask import g
+
+
+class RequestDB:
+    """Maneja una conexión perezosa por petición de Flask"""
+
+    def __init__(self, acquire, app=None, slow_hold_ms=1000, name='db'):
+        """
+        Args:
+            acquire (callable): Devuelve una conexión del pool o None
+            app (Flask, optional): Aplicación a la que registrarse
+            slow_hold_ms (float): Umbral para avisar de retenciones largas
+            name (str): Nombre usado en la cabecera Server-Timing
+        """
+        self.acquire = acquire
+        self.slow_hold_ms = slow_hold_ms
+        self.name = name
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'checkouts': 0,
+            'held_ms_total': 0.0,
+            'held_ms_max': 0.0,
+            'slow_holds': 0
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registra los hooks de fin de petición"""
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def get(self):
+        """
+        Obtiene la conexión de la petición, tomándola del pool si hace falta
+
+        Returns:
+            Conexión del pool o None si no se pudo conectar
+        """
+        connection = g.get('_db_connection')
+        if connection is None:
+            connection = self.acquire()
+            if connection is None:
+                return None
+            g._db_connection = connection
+            g._db_checked_out_at = time.perf_counter()
+            g._db_checkouts = g.get('_db_checkouts', 0) + 1
+        return connection
+
+    def release(self):
+        """Devuelve la conexión al pool; una llamada posterior a get() toma otra"""
+        connection = g.pop('_db_connection', None)
+        if connection is None:
+            return
+        held_ms = (time.perf_counter() - g.pop('_db_checked_out_at')) * 1000
+        g._db_held_ms = g.get('_db_held_ms', 0.0) + held_ms
+        connection.close()
+
+    def held_ms(self):
+        """Milisegundos que la petición actual ha retenido conexiones"""
+        held = g.get('_db_held_ms', 0.0)
+        checked_out_at = g.get('_db_checked_out_at')
+        if checked_out_at is not None:
+            held += (time.perf_counter() - checked_out_at) * 1000
+        return held
+
+    def _after_request(self, response):
+        if g.get('_db_checkouts'):
+            self.release()
+            response.headers.add('Server-Timing', f'{self.name}-held;dur={self.held_ms():.1f}')
+        return response
+
+    def _teardown_request(self, exc):
+        checkouts = g.get('_db_checkouts')
+        if not checkouts:
+            return
+        self.release()
+        held_ms = g.get('_db_held_ms', 0.0)
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['checkouts'] += checkouts
+            self._stats['held_ms_total'] += held_ms
+            self._stats['held_ms_max'] = max(self._stats['held_ms_max'], held_ms)
+            if held_ms > self.slow_hold_ms:
+                self._stats['slow_holds'] += 1
+        if held_ms > self.slow_hold_ms:
+            print(f"⚠️ Petición retuvo conexión a BD {held_ms:.0f} ms")
+
+    def stats(self):
+        """
+        Obtiene estadísticas de retención de conexiones por petición
+
+        Returns:
+            dict: Totales, media y máximo de milisegundos retenidos
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        requests = stats['requests']
+        stats['held_ms_avg'] = round(stats['held_ms_total'] / requests, 3) if requests else 0.0
+        stats['held_ms_total'] = round(stats['held_ms_total'], 3)
+        stats['held_ms_max'] = round(stats['held_ms_max'], 3)
+        return stats
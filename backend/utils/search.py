@@ -0,0 +1,268 @@
+"""
+Búsqueda de texto completo en la biblioteca de cada usuario
+El texto se indexa en Busqueda_Documentos: en MySQL una tabla con índices
+FULLTEXT y en SQLite una tabla virtual FTS5. Se mantiene al guardar,
+actualizar y borrar documentos, así que buscar no recorre Documentos
+"""
+import html
+import re
+
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 50
+MAX_SEARCH_OFFSET = 1000
+MAX_QUERY_TERMS = 10
+
+# Caracteres alrededor de la coincidencia que se devuelven como fragmento
+SNIPPET_LENGTH = 240
+SNIPPET_CONTEXT = 60
+
+# Peso del título frente al contenido al ordenar por relevancia
+TITLE_WEIGHT = 2.0
+
+# Marcas de coincidencia que devuelve snippet() de FTS5; se sustituyen por
+# <mark> después de escapar el texto
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+_TOKEN = re.compile(r'"([^"]*)"|(\w+)', re.UNICODE)
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def parse_query(text):
+    """
+    Separa la búsqueda en frases (entre comillas) y palabras
+
+    Args:
+        text (str): Texto escrito por el usuario
+
+    Returns:
+        list: Tuplas (tipo, texto) con tipo 'phrase' o 'word', en minúsculas
+
+    Raises:
+        ValueError: Si no hay ninguna palabra que buscar
+    """
+    terms = []
+    for phrase, word in _TOKEN.findall(text or ''):
+        if phrase:
+            words = _WORD.findall(phrase.lower())
+            if len(words) > 1:
+                terms.append(('phrase', ' '.join(words)))
+            elif words:
+                terms.append(('word', words[0]))
+        elif word:
+            terms.append(('word', word.lower()))
+    # Quitar repetidos conservando el orden
+    terms = list(dict.fromkeys(terms))[:MAX_QUERY_TERMS]
+    if not terms:
+        raise ValueError('La búsqueda debe contener al menos una palabra')
+    return terms
+
+
+def mysql_boolean_query(terms):
+    """Consulta IN BOOLEAN MODE: todas las palabras (como prefijo) y frases"""
+    return ' '.join(f'+"{text}"' if kind == 'phrase' else f'+{text}*' for kind, text in terms)
+
+
+def fts5_query(terms):
+    """Consulta MATCH de FTS5: todas las palabras (como prefijo) y frases"""
+    return ' '.join(f'"{text}"' if kind == 'phrase' else f'"{text}"*' for kind, text in terms)
+
+
+def parse_offset(value):
+    """Interpreta ?offset= de la búsqueda"""
+    if value is None:
+        return 0
+    try:
+        offset = int(value)
+    except ValueError:
+        raise ValueError('offset debe ser un número entero')
+    if offset < 0 or offset > MAX_SEARCH_OFFSET:
+        raise ValueError(f'offset debe estar entre 0 y {MAX_SEARCH_OFFSET}')
+    return offset
+
+
+def parse_search_limit(value):
+    """Interpreta ?limit= de la búsqueda dentro de los límites permitidos"""
+    if value is None:
+        return DEFAULT_SEARCH_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit debe ser un número entero')
+    return max(1, min(limit, MAX_SEARCH_PAGE_SIZE))
+
+
+def index_document(cursor, document_id, usuario_id, titulo, contenido, dialect='mysql'):
+    """
+    Indexa (o reindexa) un documento en la misma transacción que lo escribe
+
+    Args:
+        cursor: Cursor de la conexión
+        document_id (int): Id del documento
+        usuario_id (int): Dueño del documento
+        titulo (str): Título
+        contenido (str): Texto completo
+        dialect (str): 'mysql' o 'sqlite'
+    """
+    if dialect == 'mysql':
+        cursor.execute("""
+            INSERT INTO Busqueda_Documentos (documento_id, usuario_id, titulo, contenido)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE usuario_id = VALUES(usuario_id), titulo = VALUES(titulo),
+                                    contenido = VALUES(contenido)
+        """, (document_id, usuario_id, titulo, contenido or ''))
+    else:
+        cursor.execute("DELETE FROM Busqueda_Documentos WHERE rowid = ?", (document_id,))
+        cursor.execute("""
+            INSERT INTO Busqueda_Documentos (rowid, titulo, contenido, usuario_id)
+            VALUES (?, ?, ?, ?)
+        """, (document_id, titulo, contenido or '', usuario_id))
+
+
+def remove_document(cursor, document_id, dialect='mysql'):
+    """Quita un documento del índice (FTS5 no tiene claves foráneas en cascada)"""
+    if dialect == 'mysql':
+        cursor.execute("DELETE FROM Busqueda_Documentos WHERE documento_id = %s", (document_id,))
+    else:
+        cursor.execute("DELETE FROM Busqueda_Documentos WHERE rowid = ?", (document_id,))
+
+
+def backfill_search_index(connection, dialect, batch_size=200):
+    """
+    Indexa los documentos que aún no están en Busqueda_Documentos
+
+    Returns:
+        int: Documentos indexados
+    """
+    key = 'documento_id' if dialect == 'mysql' else 'rowid'
+    p = '%s' if dialect == 'mysql' else '?'
+    indexed = 0
+    last_id = 0
+    cursor = connection.cursor()
+    try:
+        while True:
+            cursor.execute(f"""
+                SELECT d.id, d.usuario_id, d.titulo, d.contenido FROM Documentos d
+                WHERE d.id > {p}
+                  AND NOT EXISTS (SELECT 1 FROM Busqueda_Documentos b WHERE b.{key} = d.id)
+                ORDER BY d.id LIMIT {int(batch_size)}
+            """, (last_id,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            for document_id, usuario_id, titulo, contenido in rows:
+                index_document(cursor, document_id, usuario_id, titulo, contenido, dialect)
+            connection.commit()
+            indexed += len(rows)
+            last_id = rows[-1][0]
+        return indexed
+    finally:
+        cursor.close()
+
+
+def _highlight_pattern(terms):
+    parts = []
+    for kind, text in terms:
+        if kind == 'phrase':
+            parts.append(r'\s+'.join(re.escape(word) for word in text.split()))
+        else:
+            parts.append(re.escape(text) + r'\w*')
+    return re.compile(r'(?<!\w)(' + '|'.join(parts) + ')', re.IGNORECASE | re.UNICODE)
+
+
+def _render_snippet(text, pattern=None):
+    """Escapa el fragmento y marca las coincidencias con <mark>"""
+    if pattern is not None:
+        text = pattern.sub(lambda m: f'{_MARK_START}{m.group(0)}{_MARK_END}', text)
+    text = html.escape(text)
+    return text.replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+def _trim_window(window, starts_at_beginning, reaches_end):
+    """Recorta el fragmento a palabras completas y añade puntos suspensivos"""
+    window = ' '.join(window.split())
+    if not starts_at_beginning and ' ' in window:
+        window = '…' + window.split(' ', 1)[1]
+    if not reaches_end and ' ' in window:
+        window = window.rsplit(' ', 1)[0] + '…'
+    return window
+
+
+def search_documents(connection, dialect, usuario_id, text, limit=DEFAULT_SEARCH_PAGE_SIZE, offset=0):
+    """
+    Busca en los documentos de un usuario, ordenados por relevancia
+
+    Args:
+        connection: Conexión abierta
+        dialect (str): 'mysql' o 'sqlite'
+        usuario_id (int): Dueño de los documentos
+        text (str): Búsqueda del usuario
+        limit (int): Resultados por página
+        offset (int): Resultados a saltar
+
+    Returns:
+        tuple: (resultados, hay_más). Cada resultado tiene id, titulo,
+        snippet (HTML escapado con <mark>), score, has_audio y actualizado_en
+
+    Raises:
+        ValueError: Si la búsqueda no contiene palabras
+    """
+    terms = parse_query(text)
+    cursor = connection.cursor()
+    try:
+        if dialect == 'mysql':
+            query = mysql_boolean_query(terms)
+            # El fragmento se recorta en la base alrededor de la primera
+            # aparición del primer término: no se trae el contenido completo
+            cursor.execute(f"""
+                SELECT b.documento_id, d.titulo, d.tiene_audio, d.actualizado_en,
+                       MATCH(b.titulo) AGAINST (%s IN BOOLEAN MODE) * {TITLE_WEIGHT}
+                         + MATCH(b.titulo, b.contenido) AGAINST (%s IN BOOLEAN MODE) AS score,
+                       GREATEST(1, LOCATE(%s, b.contenido) - {SNIPPET_CONTEXT}) AS inicio,
+                       SUBSTRING(b.contenido, GREATEST(1, LOCATE(%s, b.contenido) - {SNIPPET_CONTEXT}),
+                                 {SNIPPET_LENGTH}) AS fragmento,
+                       CHAR_LENGTH(b.contenido) AS longitud
+                FROM Busqueda_Documentos b
+                JOIN Documentos d ON d.id = b.documento_id
+                WHERE b.usuario_id = %s AND MATCH(b.titulo, b.contenido) AGAINST (%s IN BOOLEAN MODE)
+                ORDER BY score DESC, b.documento_id DESC
+                LIMIT %s OFFSET %s
+            """, (query, query, terms[0][1], terms[0][1], usuario_id, query, limit + 1, offset))
+            pattern = _highlight_pattern(terms)
+            results = []
+            for document_id, titulo, tiene_audio, actualizado_en, score, inicio, fragmento, longitud in cursor.fetchall():
+                fragmento = fragmento or ''
+                window = _trim_window(fragmento, inicio <= 1, inicio - 1 + len(fragmento) >= (longitud or 0))
+                results.append({
+                    'id': document_id,
+                    'titulo': titulo,
+                    'snippet': _render_snippet(window, pattern),
+                    'score': round(float(score), 4),
+                    'has_audio': bool(tiene_audio),
+                    'actualizado_en': actualizado_en
+                })
+        else:
+            tokens = max(8, SNIPPET_LENGTH // 7)
+            cursor.execute(f"""
+                SELECT b.rowid, d.titulo, d.tiene_audio, d.actualizado_en,
+                       -bm25(Busqueda_Documentos, {TITLE_WEIGHT}, 1.0, 0.0) AS score,
+                       snippet(Busqueda_Documentos, 1, char(2), char(3), '…', {tokens}) AS fragmento
+                FROM Busqueda_Documentos b
+                JOIN Documentos d ON d.id = b.rowid
+                WHERE Busqueda_Documentos MATCH ? AND b.usuario_id = ?
+                ORDER BY score DESC, b.rowid DESC
+                LIMIT ? OFFSET ?
+            """, (fts5_query(terms), usuario_id, limit + 1, offset))
+            results = [{
+                'id': document_id,
+                'titulo': titulo,
+                'snippet': _render_snippet(' '.join((fragmento or '').split())),
+                'score': round(float(score), 4),
+                'has_audio': bool(tiene_audio),
+                'actualizado_en': actualizado_en
+            } for document_id, titulo, tiene_audio, actualizado_en, score, fragmento in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+    has_more = len(results) > limit
+    return results[:limit], has_more
@@ -0,0 +1,242 @@
+"""
+Agrupación de peticiones idénticas en curso (single-flight)
+Si llegan a la vez varias peticiones con la misma clave, solo la primera
+ejecuta el trabajo y las demás esperan su resultado, o su error. Entre
+workers la coordinación va por un archivo de bloqueo: el segundo worker
+espera al primero y después encuentra el resultado ya hecho (por ejemplo
+en la caché de audio) o el error que acaba de producirse
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_TIMEOUT = 120
+
+# Segundos durante los que un error de otro worker se comparte en vez de
+# repetir la llamada
+DEFAULT_ERROR_TTL = 5
+
+
+class SingleFlightError(RuntimeError):
+    """Error de la misma operación producido en otro worker o cancelado"""
+
+
+class _FileLock:
+    """
+    Bloqueo exclusivo fcntl sobre un archivo por clave, con espera limitada.
+    El archivo se borra al liberar; quien lo abrió antes de que se borrara
+    lo detecta (el inodo ya no es el de la ruta) y vuelve a intentarlo
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                while True:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.monotonic() >= deadline:
+                            raise TimeoutError('Tiempo de espera agotado esperando a otro worker')
+                        time.sleep(0.05)
+                try:
+                    current = os.stat(self.path).st_ino
+                except FileNotFoundError:
+                    current = None
+                if current == os.fstat(fd).st_ino:
+                    self._fd = fd
+                    return
+            except BaseException:
+                os.close(fd)
+                raise
+            # El dueño anterior borró el archivo al liberar: abrir el nuevo
+            os.close(fd)
+
+    def release(self):
+        if self._fd is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class SingleFlight:
+    """Ejecuta una sola vez a la vez cada operación con la misma clave"""
+
+    def __init__(self, lock_dir=None, timeout=DEFAULT_TIMEOUT, error_ttl=DEFAULT_ERROR_TTL):
+        """
+        Args:
+            lock_dir (str, optional): Directorio de bloqueos compartido por
+                los workers; sin él solo se agrupa dentro del proceso
+            timeout (float): Segundos máximos de espera por otra petición
+            error_ttl (float): Segundos que se reutiliza un error de otro worker
+        """
+        self.lock_dir = lock_dir if fcntl else None
+        self.timeout = timeout
+        self.error_ttl = error_ttl
+        if self.lock_dir:
+            os.makedirs(os.path.join(self.lock_dir, 'errores'), exist_ok=True)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {'leaders': 0, 'coalesced': 0, 'worker_coalesced': 0, 'shared_errors': 0,
+                       'calls': 0, 'errors': 0, 'in_flight': 0}
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._stats[name] += value
+
+    async def run(self, key, factory, check=None):
+        """
+        Ejecuta factory() salvo que ya haya una ejecución en curso con la
+        misma clave, en cuyo caso espera su resultado
+
+        Args:
+            key (str): Clave de la operación
+            factory (callable): Devuelve la corrutina que hace el trabajo
+            check (callable, optional): Devuelve el resultado si ya existe
+                (lo hizo otro worker) o None; se consulta con el bloqueo
+                entre workers tomado
+
+        Returns:
+            Resultado de factory() o de check()
+
+        Raises:
+            La misma excepción que la ejecución compartida
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self._stats['leaders'] += 1
+                self._stats['in_flight'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            # shield: si este cliente deja de esperar, el resto sigue esperando
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+
+        try:
+            result = await self._lead(key, factory, check)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # Se canceló quien hacía el trabajo (p. ej. por un tiempo
+            # máximo): los que esperaban reciben un error, no la cancelación
+            future.set_exception(SingleFlightError('La operación compartida se canceló'))
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._stats['in_flight'] -= 1
+
+    async def _lead(self, key, factory, check):
+        if not self.lock_dir:
+            return await self._call(key, factory)
+
+        lock = _FileLock(os.path.join(self.lock_dir, f'{key}.lock'))
+        await self._acquire(lock)
+        try:
+            error = self._read_error(key)
+            if error:
+                self._count('shared_errors')
+                raise SingleFlightError(error)
+            if check:
+                result = check()
+                if result is not None:
+                    self._count('worker_coalesced')
+                    return result
+            return await self._call(key, factory)
+        finally:
+            lock.release()
+
+    async def _acquire(self, lock):
+        """
+        Toma el bloqueo entre workers en un hilo, sin parar el bucle. Si
+        quien espera se cancela, el hilo sigue y el bloqueo se libera en
+        cuanto lo consigue, para no dejarlo tomado
+        """
+        acquiring = asyncio.ensure_future(asyncio.to_thread(lock.acquire, self.timeout))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            acquiring.add_done_callback(
+                lambda task: lock.release() if not task.cancelled() and task.exception() is None else None)
+            raise
+
+    async def _call(self, key, factory):
+        self._count('calls')
+        try:
+            return await factory()
+        except Exception as e:
+            self._count('errors')
+            self._write_error(key, e)
+            raise
+
+    def _error_path(self, key):
+        return os.path.join(self.lock_dir, 'errores', key)
+
+    def _write_error(self, key, error):
+        if not self.lock_dir:
+            return
+        try:
+            with open(self._error_path(key), 'w', encoding='utf-8') as f:
+                json.dump({'error': str(error), 'at': time.time(), 'pid': os.getpid()}, f)
+        except OSError:
+            pass
+
+    def _read_error(self, key):
+        path = self._error_path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('pid') == os.getpid():
+            # Las peticiones de este proceso ya recibieron el error por el
+            # futuro; si se vuelve a pedir es un reintento y debe llegar al proveedor
+            return None
+        if time.time() - data.get('at', 0) > self.error_ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return data.get('error')
+
+    def stats(self):
+        """
+        Obtiene estadísticas de agrupación
+
+        Returns:
+            dict: Ejecuciones reales, peticiones que esperaron a otra (en el
+            proceso y entre workers), errores compartidos y en curso
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        requests = stats['leaders'] + stats['coalesced']
+        stats['dedup_rate'] = round((requests - stats['calls']) / requests, 3) if requests else 0.0
+        stats['cross_worker'] = self.lock_dir is not None
+        return stats
@@ -0,0 +1,170 @@
+"""
+Conexiones SQLite para producción
+Una conexión reutilizable por hilo, configurada con WAL, synchronous=NORMAL,
+mmap, caché de páginas, caché de sentencias y espera ante bloqueos, en lugar
+de abrir la base en cada petición con el journal por defecto
+"""
+import os
+import sqlite3
+import threading
+import time
+
+# Valores por defecto (configurables por variables de entorno en server.py)
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Negativo: tamaño en KiB en lugar de número de páginas
+    'cache_size': -20000,
+    'temp_store': 'MEMORY'
+}
+
+
+def is_locked_error(error):
+    """Errores de SQLite por bloqueo que tiene sentido reintentar"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+
+class ThreadConnection:
+    """
+    Conexión del hilo actual; se usa como la de sqlite3, pero close() no la
+    cierra: deshace la transacción pendiente y la deja lista para reutilizar
+    """
+
+    def __init__(self, raw, manager):
+        self._raw = raw
+        self._manager = manager
+        self.created_at = time.monotonic()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    @property
+    def raw(self):
+        """Conexión original de sqlite3"""
+        return self._raw
+
+    def close(self):
+        if self._raw.in_transaction:
+            self._raw.rollback()
+            self._manager._count('rollbacks_on_release')
+
+
+class SQLiteManager:
+    """Administra una conexión SQLite por hilo y por proceso"""
+
+    def __init__(self, path, busy_timeout_ms=5000, statement_cache=256, pragmas=None,
+                 row_factory=sqlite3.Row):
+        """
+        Args:
+            path (str): Archivo de la base de datos
+            busy_timeout_ms (int): Espera máxima ante una base bloqueada
+            statement_cache (int): Sentencias preparadas guardadas por conexión
+            pragmas (dict, optional): PRAGMAs a aplicar (por defecto DEFAULT_PRAGMAS)
+            row_factory: Fábrica de filas de sqlite3
+        """
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.statement_cache = statement_cache
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.row_factory = row_factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._stats = {'connections_opened': 0, 'reuses': 0, 'rollbacks_on_release': 0,
+                       'lock_retries': 0, 'lock_failures': 0}
+        self._journal_mode = None
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _connect(self):
+        # isolation_level IMMEDIATE: las escrituras toman el bloqueo al empezar
+        # la transacción, así el busy timeout se aplica en lugar de fallar al
+        # pasar de lectura a escritura
+        raw = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            cached_statements=self.statement_cache,
+            isolation_level='IMMEDIATE'
+        )
+        raw.row_factory = self.row_factory
+        raw.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        for name, value in self.pragmas.items():
+            row = raw.execute(f"PRAGMA {name} = {value}").fetchone()
+            if name == 'journal_mode' and row:
+                self._journal_mode = row[0]
+        self._count('connections_opened')
+        return ThreadConnection(raw, self)
+
+    def get(self):
+        """
+        Devuelve la conexión del hilo actual (la crea la primera vez)
+
+        Returns:
+            ThreadConnection: Conexión lista para usar
+        """
+        if self._pid != os.getpid():
+            # Tras un fork las conexiones heredadas no se pueden usar
+            self._local = threading.local()
+            self._pid = os.getpid()
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+        else:
+            self._count('reuses')
+        return connection
+
+    def close(self):
+        """Cierra la conexión del hilo actual"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.raw.close()
+            self._local.connection = None
+
+    def run_write(self, func, retries=3):
+        """
+        Ejecuta func(connection) y confirma; si la base sigue bloqueada tras el
+        busy timeout, deshace y reintenta con espera creciente
+
+        Returns:
+            Lo que devuelva func
+
+        Raises:
+            sqlite3.OperationalError: Si se agotan los reintentos
+        """
+        connection = self.get()
+        for attempt in range(retries + 1):
+            try:
+                result = func(connection)
+                connection.commit()
+                return result
+            except sqlite3.OperationalError as e:
+                connection.rollback()
+                if not is_locked_error(e) or attempt == retries:
+                    if is_locked_error(e):
+                        self._count('lock_failures')
+                    raise
+                self._count('lock_retries')
+                time.sleep(0.05 * (2 ** attempt))
+
+    def stats(self):
+        """
+        Obtiene estadísticas y configuración efectiva
+
+        Returns:
+            dict: Conexiones abiertas, reutilizaciones, reintentos por bloqueo
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            'path': self.path,
+            'journal_mode': self._journal_mode,
+            'busy_timeout_ms': self.busy_timeout_ms,
+            'statement_cache': self.statement_cache,
+            'pragmas': dict(self.pragmas)
+        })
+        return stats
@@ -0,0 +1,105 @@
+"""
+Sincronización incremental de la biblioteca
+Cada escritura de un documento toma el siguiente número del contador del
+usuario (Usuarios.version_biblioteca) y lo guarda en Documentos.version_sync.
+El contador se incrementa dentro de la transacción de la escritura, así que
+el bloqueo de la fila del usuario hace que los números se confirmen en
+orden y un cliente que pide "cambios desde N" no se salta ninguno. Los
+documentos borrados quedan como lápidas (eliminado_en) hasta que se purgan
+"""
+import base64
+
+DEFAULT_TOMBSTONE_DAYS = 30
+
+
+def encode_sync_cursor(version):
+    """Cursor opaco a partir de la última versión vista"""
+    return base64.urlsafe_b64encode(f's{int(version)}'.encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_sync_cursor(cursor):
+    """
+    Recupera la versión de un cursor de sincronización
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        if not raw.startswith('s'):
+            raise ValueError
+        version = int(raw[1:])
+        if version < 0:
+            raise ValueError
+        return version
+    except Exception:
+        raise ValueError('Cursor de sincronización inválido')
+
+
+def next_sync_version(cursor, user_id, dialect='mysql'):
+    """
+    Reserva el siguiente número de cambio del usuario. Debe llamarse dentro
+    de la transacción que escribe el documento
+
+    Returns:
+        int: Versión que se guarda en Documentos.version_sync
+    """
+    if dialect == 'mysql':
+        cursor.execute("""
+            UPDATE Usuarios SET version_biblioteca = LAST_INSERT_ID(version_biblioteca + 1),
+                                actualizado_en = actualizado_en
+            WHERE id = %s
+        """, (user_id,))
+        cursor.execute("SELECT LAST_INSERT_ID()")
+    else:
+        cursor.execute("UPDATE Usuarios SET version_biblioteca = version_biblioteca + 1 WHERE id = ?",
+                       (user_id,))
+        cursor.execute("SELECT version_biblioteca FROM Usuarios WHERE id = ?", (user_id,))
+    return int(cursor.fetchone()[0])
+
+
+def purge_tombstones(connection, dialect, retention_days=DEFAULT_TOMBSTONE_DAYS, batch_size=500):
+    """
+    Borra definitivamente las lápidas más antiguas que retention_days y
+    recuerda por usuario hasta qué versión se purgó: un cliente con un
+    cursor anterior tiene que recargar la biblioteca completa
+
+    Returns:
+        int: Lápidas borradas
+    """
+    if dialect == 'mysql':
+        p = '%s'
+        keep_timestamp = ', actualizado_en = actualizado_en'
+        older_than = 'eliminado_en < NOW() - INTERVAL %s DAY'
+        greatest = 'GREATEST'
+        params = (int(retention_days),)
+    else:
+        p = '?'
+        keep_timestamp = ''
+        older_than = "eliminado_en < datetime('now', ?)"
+        greatest = 'MAX'
+        params = (f'-{int(retention_days)} days',)
+    purged = 0
+    cursor = connection.cursor()
+    try:
+        while True:
+            cursor.execute(f"""
+                SELECT id, usuario_id, version_sync FROM Documentos
+                WHERE eliminado_en IS NOT NULL AND {older_than}
+                LIMIT {int(batch_size)}
+            """, params)
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            watermarks = {}
+            for _, usuario_id, version_sync in rows:
+                watermarks[usuario_id] = max(watermarks.get(usuario_id, 0), version_sync)
+            cursor.executemany(
+                f"UPDATE Usuarios SET sync_purgado = {greatest}(sync_purgado, {p}){keep_timestamp} WHERE id = {p}",
+                [(version, usuario_id) for usuario_id, version in watermarks.items()])
+            cursor.executemany(f"DELETE FROM Documentos WHERE id = {p}", [(row[0],) for row in rows])
+            connection.commit()
+            purged += len(rows)
+        return purged
+    finally:
+        cursor.close()
@@ -0,0 +1,231 @@
+"""
+Caché de audio sintetizado direccionada por contenido
+La clave es el hash del texto normalizado, el proveedor, la voz y la
+velocidad: el mismo texto con la misma voz se sintetiza una sola vez y las
+siguientes peticiones reciben el archivo ya generado sin llamar al
+servicio. Los archivos viven en un directorio compartido por los workers;
+la fecha de modificación marca el último uso y, al superar el presupuesto
+de disco, se borran los menos usados (LRU)
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+import uuid
+
+# Cambiar si cambia la forma de generar el audio: invalida la caché entera
+CACHE_FORMAT_VERSION = 1
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Un archivo usado hace menos de esto no se borra aunque sea el más
+# antiguo: puede que un cliente esté a punto de pedirlo
+DEFAULT_MIN_AGE = 60
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """Texto en forma NFC y con los espacios colapsados"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+
+class TTSCache:
+    """Archivos de audio por clave de contenido, con presupuesto de disco"""
+
+    def __init__(self, directory, url_prefix, max_bytes=DEFAULT_MAX_BYTES, min_age=DEFAULT_MIN_AGE,
+                 extension='.mp3'):
+        """
+        Args:
+            directory (str): Directorio de los archivos (compartido por los workers)
+            url_prefix (str): URL pública del directorio
+            max_bytes (int): Presupuesto de disco
+            min_age (float): Segundos desde el último uso antes de poder borrar
+            extension (str): Extensión de los archivos
+        """
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip('/')
+        self.max_bytes = max_bytes
+        self.min_age = min_age
+        self.extension = extension
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._evicting = False
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'bytes_saved': 0, 'evictions': 0,
+                       'bytes_evicted': 0, 'errors': 0}
+        # Tamaño estimado del directorio: el del último recorrido más lo que
+        # ha escrito este proceso desde entonces
+        self._estimated_bytes = self._scan()[1]
+
+    def key(self, text, provider, voice, rate):
+        """Clave de caché de una síntesis"""
+        raw = json.dumps([CACHE_FORMAT_VERSION, provider, voice, str(rate), normalize_text(text)],
+                         ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.extension)
+
+    def url(self, key):
+        return f'{self.url_prefix}/{key}{self.extension}'
+
+    def _count(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                self._stats[name] += value
+
+    def get(self, key):
+        """
+        Busca un audio en la caché y lo marca como usado
+
+        Returns:
+            dict: path, url y size, o None si no está
+        """
+        path = self.path(key)
+        try:
+            os.utime(path)
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            self._count(misses=1)
+            return None
+        except OSError:
+            self._count(misses=1, errors=1)
+            return None
+        self._count(hits=1, bytes_saved=size)
+        return {'path': path, 'url': self.url(key), 'size': size}
+
+    def temp_path(self, key):
+        """Ruta temporal donde escribir un audio antes de guardarlo con commit()"""
+        return os.path.join(self.directory, f'.{key}.{uuid.uuid4().hex[:8]}.tmp')
+
+    def commit(self, key, temp_path):
+        """
+        Guarda en la caché un audio escrito en temp_path (reemplazo atómico).
+        Se llama desde el bucle de TTS: si se supera el presupuesto, la
+        limpieza se hace en un hilo aparte para no parar las demás síntesis
+
+        Returns:
+            dict: path, url y size
+        """
+        path = self.path(key)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._stats['stores'] += 1
+            self._estimated_bytes += size
+            over_budget = self._estimated_bytes > self.max_bytes
+        if over_budget:
+            self._evict_in_background()
+        return {'path': path, 'url': self.url(key), 'size': size}
+
+    def put(self, key, data):
+        """Guarda bytes de audio en la caché"""
+        temp_path = self.temp_path(key)
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        return self.commit(key, temp_path)
+
+    def discard(self, temp_path):
+        """Borra un temporal de una síntesis fallida"""
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+    def _scan(self):
+        """
+        Recorre el directorio
+
+        Returns:
+            tuple: (lista de (mtime, tamaño, ruta), bytes totales)
+        """
+        entries = []
+        total = 0
+        now = time.time()
+        with os.scandir(self.directory) as iterator:
+            for entry in iterator:
+                if not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith('.tmp'):
+                    # Temporales de síntesis interrumpidas
+                    if now - stat.st_mtime > 3600:
+                        self.discard(entry.path)
+                    continue
+                if not entry.name.endswith(self.extension):
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        return entries, total
+
+    def _evict_in_background(self):
+        """Lanza evict() en un hilo, salvo que ya haya una limpieza en curso"""
+        with self._lock:
+            if self._evicting:
+                return
+            self._evicting = True
+        threading.Thread(target=self._run_eviction, name='tts-cache-evict', daemon=True).start()
+
+    def _run_eviction(self):
+        try:
+            self.evict()
+        except OSError as e:
+            self._count(errors=1)
+            print(f"⚠️ Error limpiando la caché de audio: {e}")
+        finally:
+            with self._lock:
+                self._evicting = False
+
+    def evict(self):
+        """
+        Borra los audios menos usados hasta quedar dentro del presupuesto.
+        Recorre el directorio, así que ve también lo que escribieron otros
+        workers
+
+        Returns:
+            int: Archivos borrados
+        """
+        entries, total = self._scan()
+        entries.sort()
+        now = time.time()
+        removed = freed = 0
+        for mtime, size, path in entries:
+            if total <= self.max_bytes or now - mtime < self.min_age:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                self._count(errors=1)
+                continue
+            total -= size
+            removed += 1
+            freed += size
+        with self._lock:
+            self._estimated_bytes = total
+            self._stats['evictions'] += removed
+            self._stats['bytes_evicted'] += freed
+        return removed
+
+    def stats(self):
+        """
+        Obtiene estadísticas de la caché
+
+        Returns:
+            dict: Aciertos, fallos, tasa de aciertos, bytes no sintetizados
+            gracias a la caché y ocupación estimada del disco
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['bytes'] = self._estimated_bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['max_bytes'] = self.max_bytes
+        return stats
@@ -0,0 +1,269 @@
+"""
+Configuraciones de usuario: validación, documento JSON por usuario y caché en memoria
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Configuraciones admitidas: tipo, valores válidos y valor por defecto.
+# Las claves que no aparecen aquí se rechazan al guardar
+SETTINGS_SCHEMA = {
+    'tipo_voz': {'type': str, 'choices': ('mujer', 'hombre'), 'default': 'mujer'},
+    'velocidad_lectura': {'type': float, 'min': 0.25, 'max': 4.0, 'default': 1.0},
+    'tamaño_fuente': {'type': str, 'choices': ('small', 'medium', 'large', 'extra-large', 'x-large'),
+                      'default': 'medium'},
+    'contraste_alto': {'type': bool, 'default': False},
+    'retroalimentacion_audio': {'type': bool, 'default': True}
+}
+
+DEFAULT_SETTINGS = {key: spec['default'] for key, spec in SETTINGS_SCHEMA.items()}
+
+
+def coerce_setting(key, value):
+    """
+    Convierte el valor almacenado de una configuración a su tipo
+
+    Args:
+        key (str): Nombre de la configuración
+        value (str): Valor almacenado
+
+    Returns:
+        Valor convertido (bool, float o str)
+    """
+    setting_type = SETTINGS_SCHEMA.get(key, {}).get('type', str)
+    if value is None:
+        return None
+    if setting_type is bool:
+        return str(value).lower() == 'true'
+    if setting_type is float:
+        return float(value)
+    return value
+
+
+def validate_settings(data):
+    """
+    Valida un conjunto de configuraciones contra SETTINGS_SCHEMA
+
+    Args:
+        data (dict): Configuraciones recibidas
+
+    Returns:
+        dict: Configuraciones con sus valores convertidos
+
+    Raises:
+        ValueError: Si hay claves desconocidas o valores inválidos
+    """
+    if not isinstance(data, dict) or not data:
+        raise ValueError('No se proporcionaron configuraciones')
+
+    unknown = [key for key in data if key not in SETTINGS_SCHEMA]
+    if unknown:
+        raise ValueError(f"Configuraciones desconocidas: {', '.join(unknown)}")
+
+    validated = {}
+    for key, value in data.items():
+        spec = SETTINGS_SCHEMA[key]
+        setting_type = spec['type']
+
+        if setting_type is bool:
+            if not isinstance(value, bool):
+                raise ValueError(f'{key} debe ser verdadero o falso')
+        elif setting_type is float:
+            if isinstance(value, bool):
+                raise ValueError(f'{key} debe ser numérico')
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f'{key} debe ser numérico')
+            if not spec['min'] <= value <= spec['max']:
+                raise ValueError(f"{key} debe estar entre {spec['min']} y {spec['max']}")
+        elif not isinstance(value, str) or value not in spec['choices']:
+            raise ValueError(f"{key} debe ser uno de: {', '.join(spec['choices'])}")
+
+        validated[key] = value
+    return validated
+
+
+# Versión del formato del documento guardado en Preferencias_Usuario.datos
+SETTINGS_DOCUMENT_VERSION = 1
+
+
+def encode_settings_document(settings):
+    """
+    Serializa las configuraciones al documento JSON que se guarda por usuario
+
+    Args:
+        settings (dict): Configuraciones tipadas
+
+    Returns:
+        str: JSON compacto
+    """
+    return json.dumps(settings, ensure_ascii=False, separators=(',', ':'))
+
+
+def decode_settings_document(version, datos):
+    """
+    Decodifica el documento de configuraciones de un usuario
+
+    Args:
+        version (int): Versión del formato con la que se guardó
+        datos (str|bytes|dict): Documento JSON
+
+    Returns:
+        dict: Configuraciones con los valores por defecto para las claves ausentes
+    """
+    if isinstance(datos, (bytes, bytearray)):
+        datos = datos.decode('utf-8')
+    if isinstance(datos, str):
+        datos = json.loads(datos) if datos else {}
+    # Aquí se convertirían documentos de versiones anteriores a la actual
+    return {**DEFAULT_SETTINGS, **(datos or {})}
+
+
+def migrate_legacy_settings(connection, dialect):
+    """
+    Copia a Preferencias_Usuario las configuraciones de la tabla antigua
+    Configuraciones_Usuario, ya sea en formato de una fila por clave (MySQL)
+    o de una columna por configuración (SQLite de server.py). Solo migra
+    usuarios que aún no tienen documento, así que puede ejecutarse varias veces.
+
+    Args:
+        connection: Conexión abierta a la base de datos
+        dialect (str): 'mysql' o 'sqlite'
+
+    Returns:
+        int: Número de usuarios migrados
+    """
+    cursor = connection.cursor()
+    try:
+        if dialect == 'mysql':
+            cursor.execute("""
+                SELECT COLUMN_NAME FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Configuraciones_Usuario'
+            """)
+            columns = {row[0] for row in cursor.fetchall()}
+        else:
+            cursor.execute("PRAGMA table_info(Configuraciones_Usuario)")
+            columns = {row[1] for row in cursor.fetchall()}
+
+        if not columns:
+            return 0
+
+        cursor.execute("SELECT usuario_id FROM Preferencias_Usuario")
+        migrated = {row[0] for row in cursor.fetchall()}
+
+        documents = {}
+        if 'nombre_configuracion' in columns:
+            cursor.execute("""
+                SELECT usuario_id, nombre_configuracion, valor_configuracion
+                FROM Configuraciones_Usuario ORDER BY id
+            """)
+            for usuario_id, key, value in cursor.fetchall():
+                if usuario_id is None or usuario_id in migrated or key not in SETTINGS_SCHEMA:
+                    continue
+                try:
+                    documents.setdefault(usuario_id, {})[key] = coerce_setting(key, value)
+                except ValueError:
+                    continue
+        else:
+            keys = [key for key in SETTINGS_SCHEMA if key in columns]
+            if not keys:
+                return 0
+            cursor.execute(f"SELECT usuario_id, {', '.join(keys)} FROM Configuraciones_Usuario ORDER BY id")
+            for row in cursor.fetchall():
+                usuario_id = row[0]
+                if usuario_id is None or usuario_id in migrated:
+                    continue
+                document = {}
+                for key, value in zip(keys, row[1:]):
+                    if value is None:
+                        continue
+                    setting_type = SETTINGS_SCHEMA[key]['type']
+                    document[key] = bool(value) if setting_type is bool else setting_type(value)
+                documents[usuario_id] = document
+
+        if not documents:
+            return 0
+
+        if dialect == 'mysql':
+            sql = "INSERT IGNORE INTO Preferencias_Usuario (usuario_id, version, datos) VALUES (%s, %s, %s)"
+        else:
+            sql = "INSERT OR IGNORE INTO Preferencias_Usuario (usuario_id, version, datos) VALUES (?, ?, ?)"
+        cursor.executemany(sql, [
+            (usuario_id, SETTINGS_DOCUMENT_VERSION, encode_settings_document({**DEFAULT_SETTINGS, **document}))
+            for usuario_id, document in documents.items()
+        ])
+        connection.commit()
+        return len(documents)
+    finally:
+        cursor.close()
+
+
+class SettingsCache:
+    """Caché LRU con expiración de las configuraciones por user_id"""
+
+    def __init__(self, max_entries=1024, ttl=300):
+        """
+        Args:
+            max_entries (int): Número máximo de usuarios en caché
+            ttl (float): Segundos de validez de cada entrada
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, user_id):
+        """
+        Obtiene las configuraciones en caché de un usuario
+
+        Returns:
+            dict: Copia de las configuraciones o None si no están en caché
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            settings, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self._stats['hits'] += 1
+            return dict(settings)
+
+    def set(self, user_id, settings):
+        """Guarda las configuraciones de un usuario"""
+        with self._lock:
+            self._entries[user_id] = (dict(settings), time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, user_id):
+        """Elimina de la caché las configuraciones de un usuario"""
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self._stats['invalidations'] += 1
+
+    def stats(self):
+        """
+        Obtiene estadísticas de la caché
+
+        Returns:
+            dict: Aciertos, fallos, tasa de aciertos y tamaño actual
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['ttl'] = self.ttl
+        return stats
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark de lectura/escritura concurrente sobre SQLite
+Compara el modo anterior de server.py (sqlite3.connect en cada operación,
+journal por defecto) con el modo producción (WAL, conexión por hilo, mmap,
+busy timeout) usando las mismas consultas del repositorio compartido.
+
+Uso:
+    python benchmark_sqlite.py                       # 4 procesos x 4 hilos, 10 s por modo
+    python benchmark_sqlite.py --workers 8 --threads 2 --seconds 20 --write-ratio 0.3
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from backend.utils.migrations import run_migrations
+from backend.utils.repository import Repository, SQLiteDriver
+from backend.utils.sqlite_db import SQLiteManager
+
+USERS = 200
+
+
+def prepare_database(path):
+    connection = sqlite3.connect(path)
+    try:
+        run_migrations(connection, 'sqlite')
+        repository = Repository(SQLiteDriver())
+        for i in range(USERS):
+            user_id = repository.create_user(connection, f'usuario{i}', f'usuario{i}@auris.test', 'x' * 60)
+            repository.save_settings(connection, user_id, {'tipo_voz': 'mujer'})
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def legacy_connection(path):
+    """Lo que hacía server.py: abrir la base en cada petición"""
+    def acquire():
+        connection = sqlite3.connect(path)
+        connection.row_factory = sqlite3.Row
+        return connection, connection.close
+    return acquire
+
+
+def tuned_connection(path):
+    manager = SQLiteManager(path)
+
+    def acquire():
+        connection = manager.get()
+        return connection, connection.close
+    return acquire
+
+
+def run_thread(acquire, deadline, write_ratio, results):
+    repository = Repository(SQLiteDriver())
+    latencies = []
+    reads = writes = errors = 0
+    while time.perf_counter() < deadline:
+        user_id = random.randint(1, USERS)
+        write = random.random() < write_ratio
+        started = time.perf_counter()
+        connection, release = acquire()
+        try:
+            if write:
+                repository.save_settings(connection, user_id,
+                                         {'velocidad_lectura': round(random.uniform(0.5, 2.0), 2)})
+                connection.commit()
+                writes += 1
+            else:
+                repository.get_user_profile(connection, user_id)
+                repository.load_settings(connection, user_id)
+                reads += 1
+            latencies.append(time.perf_counter() - started)
+        except sqlite3.OperationalError:
+            errors += 1
+            try:
+                connection.rollback()
+            except sqlite3.Error:
+                pass
+        finally:
+            release()
+    results.append((reads, writes, errors, latencies))
+
+
+def run_worker(mode, path, threads, seconds, write_ratio, queue):
+    acquire = legacy_connection(path) if mode == 'legacy' else tuned_connection(path)
+    deadline = time.perf_counter() + seconds
+    results = []
+    pool = [threading.Thread(target=run_thread, args=(acquire, deadline, write_ratio, results))
+            for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    queue.put(results)
+
+
+def benchmark(mode, workers, threads, seconds, write_ratio):
+    directory = tempfile.mkdtemp(prefix='auris-bench-')
+    path = os.path.join(directory, 'bench.db')
+    prepare_database(path)
+
+    queue = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=run_worker,
+                                         args=(mode, path, threads, seconds, write_ratio, queue))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    results = []
+    for _ in processes:
+        results.extend(queue.get())
+    for process in processes:
+        process.join()
+
+    reads = sum(r[0] for r in results)
+    writes = sum(r[1] for r in results)
+    errors = sum(r[2] for r in results)
+    latencies = sorted(latency for r in results for latency in r[3])
+
+    def percentile(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        'mode': mode,
+        'ops_s': (reads + writes) / seconds,
+        'reads_s': reads / seconds,
+        'writes_s': writes / seconds,
+        'errors': errors,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de SQLite para server.py')
+    parser.add_argument('--workers', type=int, default=4, help='Procesos (como workers de gunicorn)')
+    parser.add_argument('--threads', type=int, default=4, help='Hilos por proceso')
+    parser.add_argument('--seconds', type=float, default=10, help='Duración de cada modo')
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='Proporción de escrituras')
+    parser.add_argument('--modes', default='legacy,tuned', help='Modos a medir')
+    args = parser.parse_args(argv)
+
+    print(f"🔍 {args.workers} procesos x {args.threads} hilos, {args.seconds:.0f} s por modo, "
+          f"{args.write_ratio:.0%} escrituras")
+    print(f"{'modo':<8} {'ops/s':>9} {'lect/s':>9} {'escr/s':>9} {'errores':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for mode in args.modes.split(','):
+        r = benchmark(mode, args.workers, args.threads, args.seconds, args.write_ratio)
+        print(f"{r['mode']:<8} {r['ops_s']:>9.0f} {r['reads_s']:>9.0f} {r['writes_s']:>9.0f} "
+              f"{r['errors']:>8} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
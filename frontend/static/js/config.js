@@ -144,10 +144,40 @@ function setupEventListeners() {
     document.getElementById('save-config').addEventListener('click', saveConfiguration);
     document.getElementById('cancel-config').addEventListener('click', cancelConfiguration);
     
-    // Botón de cambiar foto (placeholder)
-    document.querySelector('.btn-change-photo').addEventListener('click', () => {
-        showNotification('Funcionalidad de cambio de foto próximamente', 'info');
+    // Botón de cambiar foto: el servidor genera las miniaturas al subirla
+    const photoInput = document.createElement('input');
+    photoInput.type = 'file';
+    photoInput.accept = 'image/*';
+    photoInput.addEventListener('change', () => {
+        if (photoInput.files[0]) uploadProfilePhoto(photoInput.files[0]);
+        photoInput.value = '';
     });
+    document.querySelector('.btn-change-photo').addEventListener('click', () => photoInput.click());
+}
+
+/**
+ * Subir una foto de perfil nueva
+ */
+async function uploadProfilePhoto(file) {
+    try {
+        const response = await authAPI.authenticatedFetch('/api/user/photo', {
+            method: 'PUT',
+            headers: { 'Content-Type': file.type || 'application/octet-stream' },
+            body: file
+        });
+        const data = await response.json();
+        if (!response.ok) throw new Error(data.error || 'Error al subir la foto');
+        
+        fillProfileData({
+            nombre_usuario: document.getElementById('username').value,
+            correo_electronico: document.getElementById('email').value,
+            foto_perfil: data.foto_perfil
+        });
+        showNotification('Foto de perfil actualizada', 'success');
+    } catch (error) {
+        console.error('Error subiendo foto:', error);
+        showNotification(error.message, 'error');
+    }
 }
 
 /**
@@ -271,29 +301,16 @@ async function testVoice() {
         : "Hola, soy la voz masculina de OpenAI integrada en Auris. Así es como sueno cuando leo tus documentos.";
     
     try {
-        // Intentar usar OpenAI TTS primero
-        const response = await fetch('/api/synthesize-speech', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                text: testText,
-                voice_type: voiceType,
-                speed: speed
-            })
+        // Audio transmitido por trozos: empieza a sonar antes de que
+        // termine la síntesis
+        const params = new URLSearchParams({
+            text: testText,
+            voice_type: voiceType,
+            speed: speed
         });
-
-        const data = await response.json();
-
-        if (data.success) {
-            // Reproducir audio de OpenAI
-            const audio = new Audio(data.audio_url);
-            audio.play();
-            showNotification(`Reproduciendo voz de prueba con ${data.provider === 'edge-tts' ? 'Edge TTS' : 'TTS local'}...`, 'info');
-        } else {
-            throw new Error(data.error || 'Error en síntesis de voz');
-        }
+        const audio = new Audio(`/api/synthesize-speech/stream?${params}`);
+        await audio.play();
+        showNotification('Reproduciendo voz de prueba con Edge TTS...', 'info');
         
     } catch (error) {
         console.error('Error al probar voz:', error);
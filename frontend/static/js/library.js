@@ -5,6 +5,13 @@
 let currentDocuments = [];
 let currentFilter = 'todos';
 let currentDocumentId = null;
+let nextDocumentsCursor = null;
+// Cursor de /api/documents/sync: los cambios posteriores se piden como delta
+let syncCursor = null;
+
+// Campos que necesita el listado (el contenido completo se pide al abrir un documento)
+const LIST_FIELDS = 'id,titulo,extracto,has_audio,nombre_archivo,creado_en,actualizado_en';
+const PAGE_SIZE = 50;
 
 // Inicializar página de biblioteca
 document.addEventListener('DOMContentLoaded', async () => {
@@ -25,6 +32,11 @@ document.addEventListener('DOMContentLoaded', async () => {
     setupLibraryEventListeners();
     setupNavigationListeners();
     setupModals();
+    
+    // Al volver a la pestaña, traer lo que cambió desde otro dispositivo
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'visible') syncDocuments();
+    });
 });
 
 /**
@@ -39,11 +51,12 @@ async function loadDocuments() {
     if (noDocumentsElement) noDocumentsElement.style.display = 'none';
 
     try {
-        const response = await authAPI.authenticatedFetch('/api/documents');
+        const data = await fetchDocumentsPage(null);
         
-        if (response.ok) {
-            const data = await response.json();
+        if (data) {
             currentDocuments = data.documents || [];
+            nextDocumentsCursor = data.next_cursor || null;
+            syncCursor = data.sync_cursor || null;
             
             console.log(`📄 Cargados ${currentDocuments.length} documentos`);
             renderDocuments();
@@ -63,6 +76,85 @@ async function loadDocuments() {
     }
 }
 
+/**
+ * Pedir una página del listado de documentos
+ */
+async function fetchDocumentsPage(cursor) {
+    const params = new URLSearchParams({ fields: LIST_FIELDS, limit: PAGE_SIZE });
+    if (cursor) params.set('cursor', cursor);
+    
+    const response = await authAPI.authenticatedFetch(`/api/documents?${params}`);
+    return response.ok ? response.json() : null;
+}
+
+/**
+ * Cargar la siguiente página de documentos
+ */
+async function loadMoreDocuments() {
+    if (!nextDocumentsCursor) return;
+    
+    try {
+        const data = await fetchDocumentsPage(nextDocumentsCursor);
+        if (!data) throw new Error('Error al cargar documentos');
+        
+        // Un documento editado tras cargar la primera página puede reaparecer
+        const loaded = new Set(currentDocuments.map(doc => doc.id));
+        currentDocuments = currentDocuments.concat((data.documents || []).filter(doc => !loaded.has(doc.id)));
+        nextDocumentsCursor = data.next_cursor || null;
+        renderDocuments();
+    } catch (error) {
+        console.error('Error cargando más documentos:', error);
+        showNotification('Error al cargar más documentos', 'error');
+    }
+}
+
+/**
+ * Aplicar los cambios de la biblioteca desde la última sincronización
+ * (creados, editados y borrados) sin volver a descargar el listado
+ */
+async function syncDocuments() {
+    if (!syncCursor) return loadDocuments();
+    
+    try {
+        let hasMore = true;
+        while (hasMore) {
+            const params = new URLSearchParams({ fields: LIST_FIELDS, limit: PAGE_SIZE, since: syncCursor });
+            const response = await authAPI.authenticatedFetch(`/api/documents/sync?${params}`);
+            if (!response.ok) throw new Error('Error al sincronizar documentos');
+            
+            const data = await response.json();
+            if (data.reset) return loadDocuments();
+            
+            const changed = new Map((data.changes || []).map(doc => [doc.id, doc]));
+            const deleted = new Set((data.deleted || []).map(doc => doc.id));
+            currentDocuments = currentDocuments.filter(doc => !changed.has(doc.id) && !deleted.has(doc.id));
+            // Creados y editados van arriba: el listado se ordena por actualizado_en
+            currentDocuments = [...changed.values()].reverse().concat(currentDocuments);
+            
+            syncCursor = data.cursor;
+            hasMore = data.has_more;
+        }
+        renderDocuments();
+    } catch (error) {
+        console.error('Error sincronizando documentos:', error);
+        await loadDocuments();
+    }
+}
+
+/**
+ * Obtener el contenido completo de un documento (el listado solo trae el extracto)
+ */
+async function ensureDocumentContent(doc) {
+    if (doc.contenido !== undefined) return doc;
+    
+    const response = await authAPI.authenticatedFetch(`/api/documents/${doc.id}`);
+    if (!response.ok) throw new Error('Error al cargar el documento');
+    
+    const data = await response.json();
+    doc.contenido = data.document ? data.document.contenido : '';
+    return doc;
+}
+
 /**
  * Renderizar documentos en la interfaz
  */
@@ -90,7 +182,7 @@ function renderDocuments() {
     // Generar HTML para cada documento
     const documentsHTML = filteredDocuments.map(doc => {
         const createdDate = new Date(doc.creado_en).toLocaleDateString('es-ES');
-        const preview = doc.contenido ? doc.contenido.substring(0, 100) + '...' : 'Sin contenido';
+        const preview = doc.extracto ? doc.extracto.substring(0, 100) + '...' : 'Sin contenido';
         const hasAudio = doc.has_audio || doc.nombre_archivo;
         const audioFileName = doc.nombre_archivo ? doc.nombre_archivo.replace(/\.[^/.]+$/, "") : null;
         
@@ -118,6 +210,15 @@ function renderDocuments() {
 
     libraryItems.innerHTML = documentsHTML;
 
+    // Botón para pedir la siguiente página
+    if (nextDocumentsCursor) {
+        const loadMoreBtn = document.createElement('button');
+        loadMoreBtn.className = 'btn-item-action load-more-documents';
+        loadMoreBtn.textContent = 'Cargar más';
+        loadMoreBtn.addEventListener('click', loadMoreDocuments);
+        libraryItems.appendChild(loadMoreBtn);
+    }
+
     // Configurar event listeners para los botones
     setupDocumentButtons();
 }
@@ -146,10 +247,17 @@ function setupDocumentButtons() {
 /**
  * Ver documento en modal
  */
-function viewDocument(documentId) {
+async function viewDocument(documentId) {
     const doc = currentDocuments.find(d => d.id === documentId);
     if (!doc) return;
 
+    try {
+        await ensureDocumentContent(doc);
+    } catch (error) {
+        showNotification(error.message, 'error');
+        return;
+    }
+
     const modal = document.getElementById('view-document-modal');
     const overlay = document.getElementById('document-modal-overlay');
     const titleElement = document.getElementById('view-document-title');
@@ -224,10 +332,17 @@ function setupAudioControls(audioPath) {
 /**
  * Editar documento en modal
  */
-function editDocument(documentId) {
+async function editDocument(documentId) {
     const doc = currentDocuments.find(d => d.id === documentId);
     if (!doc) return;
 
+    try {
+        await ensureDocumentContent(doc);
+    } catch (error) {
+        showNotification(error.message, 'error');
+        return;
+    }
+
     const modal = document.getElementById('edit-document-modal');
     const overlay = document.getElementById('document-modal-overlay');
     const titleInput = document.getElementById('edit-document-title');
@@ -313,8 +428,8 @@ async function saveDocumentChanges() {
             // Cerrar modal
             closeEditModal();
             
-            // Recargar documentos
-            await loadDocuments();
+            // Aplicar el cambio sin recargar el listado
+            await syncDocuments();
             
         } else {
             throw new Error(data.error || 'Error al actualizar el documento');
@@ -361,8 +476,8 @@ async function deleteDocument() {
                 // Cerrar modal
                 closeEditModal();
                 
-                // Recargar documentos
-                await loadDocuments();
+                // Aplicar el cambio sin recargar el listado
+                await syncDocuments();
                 
             } else {
                 throw new Error(data.error || 'Error al eliminar el documento');
@@ -636,20 +751,29 @@ function setupLibraryEventListeners() {
     const searchBtn = document.querySelector('.btn-search');
     
     if (searchInput && searchBtn) {
-        const performSearch = () => {
-            const searchTerm = searchInput.value.toLowerCase().trim();
+        const performSearch = async () => {
+            const query = searchInput.value.trim();
+            
+            if (!query) {
+                renderDocuments();
+                return;
+            }
             
-            if (searchTerm) {
+            // Búsqueda en el servidor sobre el título y el contenido completo
+            // (el listado solo trae el extracto de las páginas cargadas)
+            try {
+                const results = await searchDocuments(query);
+                renderFilteredDocuments(results, `Resultados para: "${query}"`);
+            } catch (error) {
+                console.error('Error en la búsqueda:', error);
+                const searchTerm = query.toLowerCase();
                 const filteredDocuments = currentDocuments.filter(doc => 
                     doc.titulo.toLowerCase().includes(searchTerm) ||
-                    (doc.contenido && doc.contenido.toLowerCase().includes(searchTerm)) ||
+                    (doc.extracto && doc.extracto.toLowerCase().includes(searchTerm)) ||
                     (doc.nombre_archivo && doc.nombre_archivo.toLowerCase().includes(searchTerm))
                 );
-                
-                // Renderizar resultados de búsqueda
-                renderFilteredDocuments(filteredDocuments, `Resultados para: "${searchTerm}"`);
-            } else {
-                renderDocuments();
+                showNotification('No se pudo buscar en el contenido; se muestran coincidencias del listado', 'error');
+                renderFilteredDocuments(filteredDocuments, `Resultados para: "${query}"`);
             }
         };
         
@@ -662,6 +786,26 @@ function setupLibraryEventListeners() {
     }
 }
 
+/**
+ * Buscar en el título y el contenido de todos los documentos del usuario
+ * (GET /api/documents/search, ordenados por relevancia)
+ */
+async function searchDocuments(query) {
+    const params = new URLSearchParams({ q: query, limit: PAGE_SIZE });
+    const response = await authAPI.authenticatedFetch(`/api/documents/search?${params}`);
+    if (!response.ok) throw new Error(`Error ${response.status} en la búsqueda`);
+    
+    const data = await response.json();
+    return (data.results || []).map(result => ({
+        id: result.id,
+        titulo: result.titulo,
+        has_audio: result.has_audio,
+        creado_en: result.actualizado_en,
+        // Fragmento ya escapado por el servidor, con las coincidencias en <mark>
+        snippet: result.snippet
+    }));
+}
+
 /**
  * Renderizar documentos filtrados
  */
@@ -682,7 +826,7 @@ function renderFilteredDocuments(documents, title) {
     // Generar HTML para documentos filtrados
     const documentsHTML = documents.map(doc => {
         const createdDate = new Date(doc.creado_en).toLocaleDateString('es-ES');
-        const preview = doc.contenido ? doc.contenido.substring(0, 100) + '...' : 'Sin contenido';
+        const preview = doc.extracto ? doc.extracto.substring(0, 100) + '...' : 'Sin contenido';
         const hasAudio = doc.has_audio || doc.nombre_archivo;
         const documentType = hasAudio ? 'Documento con Audio' : 'Transcripción';
         const iconType = hasAudio ? 'audio_icon.png' : 'document_icon.png';
@@ -695,7 +839,7 @@ function renderFilteredDocuments(documents, title) {
                 <div class="item-info">
                     <h3>${escapeHtml(doc.titulo)}</h3>
                     <p>${createdDate} · ${documentType}</p>
-                    <small class="document-preview">${escapeHtml(preview)}</small>
+                    <small class="document-preview">${doc.snippet || escapeHtml(preview)}</small>
                 </div>
                 <div class="item-actions">
                     <button class="btn-item-action view-document" data-document-id="${doc.id}">Ver</button>
@@ -381,6 +381,8 @@ function openSaveDocumentModal() {
 
 // Variable global para almacenar la ruta del archivo de audio generado
 let currentAudioFilePath = null;
+// Páginas del último PDF cargado (se envían al guardar para conservarlas)
+let paginasArchivo = null;
 let allGeneratedAudioPaths = [];
 
 /**
@@ -433,7 +435,8 @@ async function saveDocument() {
             },
             body: JSON.stringify({
                 titulo: title,
-                contenido: content
+                contenido: content,
+                ...(paginasArchivo ? { paginas: paginasArchivo } : {})
             })
         });
         
@@ -499,6 +502,7 @@ async function handleFileSelection(event) {
         if (data.texto || data.status === 'success') {
             const texto = data.texto || data.contenido || '';
             mostrarTexto(texto);
+            paginasArchivo = Array.isArray(data.paginas) ? data.paginas : null;
             showNotification('Archivo cargado correctamente', 'success');
         } else {
             throw new Error(data.error || 'No se pudo leer el archivo');
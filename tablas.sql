@@ -6,7 +6,10 @@ CREATE TABLE Usuarios (
     nombre_usuario VARCHAR(50) NOT NULL UNIQUE,
     correo_electronico VARCHAR(50) NOT NULL UNIQUE,
     contraseña VARCHAR(255) NOT NULL,
-    foto_perfil BLOB,  
+    foto_perfil BLOB,  -- Obsoleto: la foto vive en Fotos_Perfil
+    foto_hash CHAR(64),  -- SHA-256 de la foto original (versión de la URL)
+    version_biblioteca BIGINT NOT NULL DEFAULT 0,  -- Último número de cambio de la biblioteca (sync)
+    sync_purgado BIGINT NOT NULL DEFAULT 0,  -- Versión hasta la que se purgaron lápidas
     creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 );
@@ -15,15 +18,90 @@ CREATE TABLE Documentos (
     id INT PRIMARY KEY AUTO_INCREMENT,
     usuario_id INT,
     titulo VARCHAR(50) NOT NULL,
-    contenido TEXT,
-    archivo_audio LONGBLOB,  -- Cambiado a LONGBLOB (hasta 4GB)
+    contenido TEXT,  -- NULL si el texto está comprimido
+    formato_contenido VARCHAR(10) NOT NULL DEFAULT 'texto',  -- texto, zlib, zstd o fragmentos
+    contenido_comprimido LONGBLOB,  -- Texto comprimido (documentos grandes)
+    total_fragmentos INT NOT NULL DEFAULT 0,  -- Fragmentos en Fragmentos_Documento
+    total_paginas INT,  -- Páginas del archivo original (PDF)
+    extracto VARCHAR(255),  -- Primeros caracteres del contenido para el listado
+    tamano_contenido INT NOT NULL DEFAULT 0,  -- Longitud del contenido en caracteres
+    hash_contenido CHAR(64),  -- SHA-256 de título y contenido (ETag)
+    archivo_audio LONGBLOB,  -- Obsoleto: el audio vive en el almacén de audio
+    tiene_audio TINYINT(1) NOT NULL DEFAULT 0,  -- Indica si hay fila en Audios_Documento
     nombre_archivo VARCHAR(255),  -- Nombre original del archivo
     tipo_mime VARCHAR(100) DEFAULT 'audio/mpeg',  -- Tipo MIME 
+    version_sync BIGINT NOT NULL DEFAULT 0,  -- Número de cambio de la última escritura (sync)
+    eliminado_en TIMESTAMP NULL DEFAULT NULL,  -- Lápida: documento borrado
     creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE,
+    INDEX idx_documentos_usuario_actualizado (usuario_id, actualizado_en),
+    INDEX idx_documentos_usuario_sync (usuario_id, version_sync),
+    INDEX idx_documentos_id_usuario (id, usuario_id)
+);
+
+-- Metadatos del audio de cada documento; los bytes están en el almacén
+-- indicado (sistema de archivos o Audio_Blobs)
+CREATE TABLE Audios_Documento (
+    documento_id INT PRIMARY KEY,
+    almacen VARCHAR(20) NOT NULL,
+    ubicacion VARCHAR(255) NOT NULL,
+    tipo_mime VARCHAR(100) DEFAULT 'audio/mpeg',
+    tamano_bytes BIGINT NOT NULL,
+    duracion_ms INT,
+    hash_sha256 CHAR(64) NOT NULL,
+    creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (documento_id) REFERENCES Documentos(id) ON DELETE CASCADE
+);
+
+CREATE TABLE Audio_Blobs (
+    clave VARCHAR(255) PRIMARY KEY,
+    datos LONGBLOB NOT NULL
+);
+
+-- Miniaturas de la foto de perfil (small, medium, large), generadas al subirla
+CREATE TABLE Fotos_Perfil (
+    usuario_id INT NOT NULL,
+    variante VARCHAR(10) NOT NULL,  -- small, medium o large
+    tipo_mime VARCHAR(50) NOT NULL,
+    ancho INT NOT NULL,
+    alto INT NOT NULL,
+    tamano_bytes INT NOT NULL,
+    hash_sha256 CHAR(64) NOT NULL,  -- ETag de la variante
+    datos MEDIUMBLOB NOT NULL,
+    creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (usuario_id, variante),
     FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
 );
 
+-- Texto de documentos largos, por páginas o grupos de párrafos
+CREATE TABLE Fragmentos_Documento (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    documento_id INT NOT NULL,
+    posicion INT NOT NULL,  -- Orden del fragmento (0, 1, 2...)
+    pagina INT,  -- Página del archivo original
+    inicio INT NOT NULL,  -- Desplazamiento en el texto completo
+    longitud INT NOT NULL,
+    hash_sha256 CHAR(64) NOT NULL,
+    formato VARCHAR(10) NOT NULL DEFAULT 'texto',  -- texto, zlib o zstd
+    texto MEDIUMTEXT,
+    datos MEDIUMBLOB,  -- Texto comprimido
+    INDEX idx_fragmentos_documento_posicion (documento_id, posicion),
+    FOREIGN KEY (documento_id) REFERENCES Documentos(id) ON DELETE CASCADE
+);
+
+-- Índice de texto completo de /api/documents/search
+CREATE TABLE Busqueda_Documentos (
+    documento_id INT PRIMARY KEY,
+    usuario_id INT NOT NULL,
+    titulo VARCHAR(50) NOT NULL,
+    contenido MEDIUMTEXT NOT NULL,
+    INDEX idx_busqueda_usuario (usuario_id),
+    FULLTEXT INDEX ft_busqueda_titulo (titulo),
+    FULLTEXT INDEX ft_busqueda_texto (titulo, contenido),
+    FOREIGN KEY (documento_id) REFERENCES Documentos(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
 CREATE TABLE Audio_a_Texto (
     id INT PRIMARY KEY AUTO_INCREMENT,
     usuario_id INT,
@@ -34,11 +112,11 @@ CREATE TABLE Audio_a_Texto (
     FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
 );
 
-CREATE TABLE Configuraciones_Usuario (
-    id INT PRIMARY KEY AUTO_INCREMENT,
-    usuario_id INT,
-    nombre_configuracion VARCHAR(50) NOT NULL,
-    valor_configuracion TEXT,
+-- Preferencias del usuario: un documento JSON versionado por usuario
+CREATE TABLE Preferencias_Usuario (
+    usuario_id INT PRIMARY KEY,
+    version SMALLINT NOT NULL DEFAULT 1,
+    datos JSON NOT NULL,
     actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
 );
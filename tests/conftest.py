@@ -0,0 +1,75 @@
+"""
+Fixtures compartidas de las pruebas
+Las pruebas de SQLite usan una base en memoria con el esquema de
+migrations.py. Las de las vistas de app.py necesitan un MySQL de pruebas
+(variables DB_*, como .env.example) y se omiten si no está disponible
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.utils.migrations import run_migrations  # noqa: E402
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+@pytest.fixture
+def sqlite_db():
+    """Base SQLite en memoria migrada a la última versión"""
+    connection = sqlite3.connect(':memory:')
+    run_migrations(connection, 'sqlite')
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def sqlite_dict_db(sqlite_db):
+    """La misma base, con filas como diccionarios (igual que cursor(dictionary=True) de MySQL)"""
+    sqlite_db.row_factory = _dict_row
+    return sqlite_db
+
+
+@pytest.fixture(scope='session')
+def mysql_app():
+    """
+    La aplicación de app.py sobre un MySQL de pruebas, migrado. Se omite
+    si no hay servidor (DB_HOST, DB_USER, DB_PASSWORD, DB_NAME)
+    """
+    os.environ.setdefault('CONTENT_COMPRESSION_JOB', 'false')
+    os.environ.setdefault('LIST_CACHE_BACKEND', 'memory')
+    os.environ.setdefault('DB_POOL_TIMEOUT', '2')
+    from backend import app as app_module
+    connection = app_module.get_db_connection()
+    if connection is None:
+        pytest.skip('MySQL de pruebas no disponible')
+    connection.close()
+    assert app_module.init_database()
+    app_module.app.config['TESTING'] = True
+    return app_module
+
+
+@pytest.fixture
+def mysql_user(mysql_app):
+    """Usuario nuevo en el MySQL de pruebas y cabeceras con su token"""
+    import uuid
+    import jwt
+    from datetime import datetime, timedelta
+
+    client = mysql_app.app.test_client()
+    suffix = uuid.uuid4().hex[:10]
+    response = client.post('/api/register', json={
+        'nombre_usuario': f'prueba_{suffix}',
+        'correo_electronico': f'prueba_{suffix}@example.com',
+        'contraseña': 'secreto123'
+    })
+    assert response.status_code == 201, response.get_json()
+    user_id = response.get_json()['user_id']
+    token = jwt.encode({'user_id': user_id, 'exp': datetime.utcnow() + timedelta(hours=1)},
+                       mysql_app.JWT_SECRET_KEY, algorithm='HS256')
+    return client, {'Authorization': f'Bearer {token}'}
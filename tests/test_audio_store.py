@@ -0,0 +1,106 @@
+"""
+Pruebas de los almacenes de audio de documentos
+"""
+import sqlite3
+
+import pytest
+
+from backend.services.audio_store import DatabaseAudioStore, FilesystemAudioStore, new_audio_key
+
+AUDIO = bytes(range(256)) * 40
+
+
+class _Shared:
+    """Conexión compartida cuyo close() no la cierra, solo anota que se devolvió (como un pool)"""
+
+    def __init__(self, connection, store=None):
+        self._connection = connection
+        self._store = store
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def close(self):
+        if self._store is not None:
+            self._store.released = True
+
+
+@pytest.fixture
+def database_store(sqlite_db):
+    acquired = []
+
+    def acquire():
+        acquired.append(1)
+        store.released = False
+        return _Shared(sqlite_db, store)
+
+    store = DatabaseAudioStore(acquire, placeholder='?')
+    store.acquired = acquired
+    store.released = True
+    return store
+
+
+def test_database_put_replaces_audio(database_store):
+    database_store.put('a.mp3', b'viejo')
+    database_store.put('a.mp3', AUDIO)
+
+    assert database_store.size('a.mp3') == len(AUDIO)
+    assert database_store.read('a.mp3') == AUDIO
+    assert database_store.read('a.mp3', 10, 5) == AUDIO[10:15]
+
+
+def test_database_put_failure_keeps_previous_audio(database_store):
+    database_store.put('a.mp3', AUDIO)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        # datos es NOT NULL: el INSERT falla después del DELETE
+        database_store.put('a.mp3', None)
+
+    assert database_store.read('a.mp3') == AUDIO
+
+
+def test_database_iter_range_reads_bounded_windows(database_store):
+    database_store.put('a.mp3', AUDIO)
+    database_store.window_chunks = 2
+    database_store.acquired.clear()
+    reads = []
+    read = database_store.read
+    database_store.read = lambda key, start, length: reads.append(length) or read(key, start, length)
+
+    chunks = []
+    for chunk in database_store.iter_range('a.mp3', 100, 9099, 1024):
+        # Cada ventana devuelve su conexión antes de entregar los bloques
+        assert database_store.released
+        chunks.append(chunk)
+
+    assert b''.join(chunks) == AUDIO[100:9100]
+    assert [len(chunk) for chunk in chunks] == [1024] * 8 + [808]
+    assert max(reads) <= 2 * 1024
+    assert len(database_store.acquired) == len(reads) == 5
+
+
+def test_database_missing_key(database_store):
+    assert not database_store.exists('nada.mp3')
+    with pytest.raises(FileNotFoundError):
+        database_store.size('nada.mp3')
+    with pytest.raises(FileNotFoundError):
+        list(database_store.iter_range('nada.mp3', 0, 10, 4))
+
+
+def test_filesystem_iter_range(tmp_path):
+    store = FilesystemAudioStore(str(tmp_path))
+    store.put('docs/a.mp3', AUDIO)
+
+    chunks = list(store.iter_range('docs/a.mp3', 0, len(AUDIO) - 1, 4096))
+
+    assert b''.join(chunks) == AUDIO
+    assert store.read('docs/a.mp3', 5, 3) == AUDIO[5:8]
+    with pytest.raises(ValueError):
+        store.path('../fuera.mp3')
+
+
+def test_new_audio_key_is_unique_per_call():
+    keys = {new_audio_key('informe') for _ in range(50)}
+
+    assert len(keys) == 50
+    assert all(key.startswith('informe_') and key.endswith('.mp3') for key in keys)
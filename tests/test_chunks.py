@@ -0,0 +1,105 @@
+"""
+Documentos guardados en fragmentos: escritura, lectura por ventanas y
+lectura a través de las vistas de app.py
+"""
+import random
+
+import pytest
+
+from backend.utils.chunks import (FORMAT_CHUNKS, CHUNK_MAX_CHARS, split_chunks, write_chunks, read_window,
+                                  load_text, prepare_body)
+from backend.utils.compression import BodyCodec
+
+
+def _long_text(paragraphs=400, seed=7):
+    rng = random.Random(seed)
+    words = ['lectura', 'accesible', 'documento', 'página', 'Auris', 'voz', 'texto', 'ñandú', 'árbol']
+    return '\n\n'.join(' '.join(rng.choice(words) for _ in range(rng.randint(20, 120)))
+                       for _ in range(paragraphs))
+
+
+def _insert_document(connection):
+    cursor = connection.cursor()
+    cursor.execute("INSERT INTO Usuarios (nombre_usuario, correo_electronico, contraseña) VALUES ('a', 'a@a', 'x')")
+    cursor.execute("INSERT INTO Documentos (usuario_id, titulo, formato_contenido) VALUES (?, 't', ?)",
+                   (cursor.lastrowid, FORMAT_CHUNKS))
+    return cursor.lastrowid
+
+
+def test_split_chunks_covers_text_exactly():
+    text = _long_text()
+    chunks = split_chunks(text)
+    assert len(chunks) > 1
+    assert ''.join(chunk['texto'] for chunk in chunks) == text
+    assert all(len(chunk['texto']) <= CHUNK_MAX_CHARS for chunk in chunks)
+    assert [chunk['inicio'] for chunk in chunks] == [sum(len(c['texto']) for c in chunks[:i])
+                                                     for i in range(len(chunks))]
+
+
+def test_pages_start_new_chunks():
+    chunks = split_chunks(None, ['primera página', 'segunda página'])
+    assert [chunk['pagina'] for chunk in chunks] == [1, 2]
+    assert ''.join(chunk['texto'] for chunk in chunks) == 'primera página\n\nsegunda página'
+
+
+@pytest.mark.parametrize('fixture', ['sqlite_db', 'sqlite_dict_db'])
+def test_round_trip_with_tuple_and_dict_cursors(request, fixture):
+    connection = request.getfixturevalue(fixture)
+    codec = BodyCodec('zlib', threshold=64)
+    document_id = _insert_document(connection)
+    text = _long_text()
+    formato, _, _, chunks = prepare_body(text, None, codec)
+    assert formato == FORMAT_CHUNKS
+
+    cursor = connection.cursor()
+    result = write_chunks(cursor, document_id, chunks, codec, '?')
+    assert result['inserted'] == len(chunks)
+
+    assert load_text(cursor, document_id, FORMAT_CHUNKS, None, None, codec, '?') == text
+    window = read_window(cursor, document_id, codec, 1, 2, '?')
+    assert [chunk['posicion'] for chunk in window] == [1, 2]
+    assert [chunk['texto'] for chunk in window] == [chunk['texto'] for chunk in chunks[1:3]]
+
+
+def test_rewrite_only_touches_changed_chunks(sqlite_dict_db):
+    codec = BodyCodec('texto')
+    document_id = _insert_document(sqlite_dict_db)
+    cursor = sqlite_dict_db.cursor()
+    text = _long_text()
+    write_chunks(cursor, document_id, split_chunks(text), codec, '?')
+
+    edited = 'Un párrafo nuevo al principio.\n\n' + text
+    chunks = split_chunks(edited)
+    result = write_chunks(cursor, document_id, chunks, codec, '?')
+    assert result['inserted'] < len(chunks)
+    assert result['unchanged'] + result['moved'] > 0
+    assert load_text(cursor, document_id, FORMAT_CHUNKS, None, None, codec, '?') == edited
+
+
+def test_chunked_document_through_views(mysql_user, monkeypatch):
+    """Un documento en fragmentos se guarda y se lee por las vistas (MySQL)"""
+    from backend import app as app_module
+
+    def no_audio(*args, **kwargs):
+        raise RuntimeError('sin síntesis en las pruebas')
+    monkeypatch.setattr(app_module.tts_loop, 'run', no_audio)
+
+    client, headers = mysql_user
+    text = _long_text()
+    response = client.post('/api/documents', json={'titulo': 'Largo', 'contenido': text}, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    document_id = response.get_json()['document_id']
+
+    response = client.get(f'/api/documents/{document_id}', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['document']['contenido'] == text
+
+    response = client.get(f'/api/documents/{document_id}/chunks?offset=0&limit=2', headers=headers)
+    assert response.status_code == 200, response.get_json()
+
+    for url in ('/api/documents?fields=id,contenido', '/api/documents/sync?fields=id,contenido'):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        data = response.get_json()
+        docs = data.get('documents', data.get('changes'))
+        assert [doc['contenido'] for doc in docs if doc['id'] == document_id] == [text]
@@ -0,0 +1,177 @@
+"""
+Pruebas del pool de conexiones
+"""
+import threading
+import time
+
+import pytest
+
+from backend.utils.db_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    """Conexión del driver con lo mínimo que usa el pool"""
+
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.resets = 0
+
+    def cursor(self):
+        return FakeCursor()
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+    def execute(self, query, params=None):
+        if query == 'CAE':
+            raise ConnectionError('conexión perdida')
+        if query == 'FALLA':
+            raise ValueError('error de SQL')
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def factory():
+        created.append(FakeConnection(len(created)))
+        return created[-1]
+
+    kwargs.setdefault('timeout', 0.2)
+    pool = ConnectionPool(factory, is_fatal_error=lambda e: isinstance(e, ConnectionError), **kwargs)
+    return pool, created
+
+
+def test_checkout_and_release_reuses_connection():
+    pool, created = make_pool(size=2)
+
+    first = pool.acquire()
+    assert pool.stats()['in_use'] == 1
+    first.close()
+    second = pool.acquire()
+
+    assert second.raw is first.raw
+    assert len(created) == 1
+    assert second.uses == 2
+    second.close()
+    stats = pool.stats()
+    assert stats['in_use'] == 0
+    assert stats['idle'] == 1
+    assert stats['open'] == 1
+    assert stats['acquired'] == 2
+
+
+def test_double_close_releases_once():
+    pool, _ = make_pool(size=1)
+
+    conn = pool.acquire()
+    conn.close()
+    conn.close()
+
+    assert pool.stats()['in_use'] == 0
+    assert pool.stats()['idle'] == 1
+
+
+def test_exhausted_pool_times_out():
+    pool, _ = make_pool(size=1, timeout=0.05)
+
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+    assert pool.stats()['timeouts'] == 1
+    conn.close()
+    pool.acquire().close()
+
+
+def test_waiter_gets_released_connection():
+    pool, created = make_pool(size=1, timeout=2)
+    conn = pool.acquire()
+    got = []
+
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    time.sleep(0.05)
+    assert pool.stats()['waiting'] == 1
+    conn.close()
+    waiter.join(2)
+
+    assert got and got[0].raw is conn.raw
+    assert len(created) == 1
+    assert pool.stats()['wait_time_max_ms'] > 0
+    got[0].close()
+
+
+def test_connection_error_discards_connection():
+    pool, created = make_pool(size=1)
+
+    conn = pool.acquire()
+    with pytest.raises(ValueError):
+        conn.cursor().execute('FALLA')
+    assert not conn.broken
+    with pytest.raises(ConnectionError):
+        conn.cursor().execute('CAE')
+    conn.close()
+
+    assert created[0].closed
+    assert pool.stats()['discarded_broken'] == 1
+    assert pool.acquire().raw is created[1]
+
+
+def test_recycles_after_max_uses():
+    pool, created = make_pool(size=1, max_uses=2)
+
+    for _ in range(3):
+        pool.acquire().close()
+
+    assert len(created) == 2
+    assert created[0].closed
+    assert pool.stats()['recycled'] == 1
+
+
+def test_failed_ping_replaces_idle_connection():
+    pool, created = make_pool(size=1, ping_after=0, ping=lambda raw: raw.number > 0)
+
+    pool.acquire().close()
+    conn = pool.acquire()
+
+    assert conn.raw is created[1]
+    assert created[0].closed
+    assert pool.stats()['failed_health_checks'] == 1
+    conn.close()
+
+
+def test_reset_failure_discards_connection():
+    def reset(raw):
+        raw.resets += 1
+        if raw.resets > 1:
+            raise RuntimeError('no se pudo limpiar')
+
+    pool, created = make_pool(size=1, reset=reset)
+    pool.acquire().close()
+    pool.acquire().close()
+
+    assert created[0].resets == 2
+    assert created[0].closed
+    assert pool.stats()['open'] == 0
+
+
+def test_factory_error_frees_the_slot():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError('servidor caído')
+        return FakeConnection(len(calls))
+
+    pool = ConnectionPool(factory, size=1, timeout=0.05)
+    with pytest.raises(ConnectionError):
+        pool.acquire()
+
+    stats = pool.stats()
+    assert stats['open'] == 0
+    assert stats['in_use'] == 0
+    pool.acquire().close()
@@ -0,0 +1,131 @@
+"""
+Pruebas de Range: interpretación de la cabecera y respuestas 200, 206 y 416
+"""
+import pytest
+from flask import Flask, request
+
+from backend.utils.http_cache import if_range_matches, validator_headers
+from backend.utils.http_range import MAX_RANGES, RangeNotSatisfiable, parse_range_header, range_response
+
+DATA = bytes(range(256)) * 4
+ETAG = 'abc123'
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-99', [(0, 99)]),
+    ('bytes=100-', [(100, 1023)]),
+    ('bytes=-24', [(1000, 1023)]),
+    ('bytes=-5000', [(0, 1023)]),
+    ('bytes=1000-5000', [(1000, 1023)]),
+    ('bytes=0-9, 5-19, 20-29', [(0, 29)]),
+    ('bytes=500-599,0-9', [(0, 9), (500, 599)]),
+    ('bytes=0-9,2000-3000', [(0, 9)]),
+])
+def test_parse_valid_ranges(header, expected):
+    assert parse_range_header(header, len(DATA)) == expected
+
+
+@pytest.mark.parametrize('header', [
+    None, '', 'items=0-9', 'bytes=', 'bytes=abc', 'bytes=10', 'bytes=9-0', 'bytes=-x',
+    'bytes=' + ','.join(['0-1'] * (MAX_RANGES + 1)),
+])
+def test_parse_ignores_invalid_header(header):
+    assert parse_range_header(header, len(DATA)) is None
+
+
+@pytest.mark.parametrize('header', ['bytes=1024-', 'bytes=5000-6000', 'bytes=-0'])
+def test_parse_unsatisfiable(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header(header, len(DATA))
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    reads = []
+
+    def reader(start, end, chunk_size):
+        reads.append((start, end))
+        for position in range(start, end + 1, chunk_size):
+            yield DATA[position:min(position + chunk_size, end + 1)]
+
+    @app.route('/audio', methods=['GET', 'HEAD'])
+    def audio():
+        return range_response(request, len(DATA), reader, 'audio/mpeg', headers=validator_headers(ETAG),
+                              chunk_size=100, allow_ranges=if_range_matches(request, ETAG))
+
+    client = app.test_client()
+    client.reads = reads
+    return client
+
+
+def test_full_response(client):
+    response = client.get('/audio')
+
+    assert response.status_code == 200
+    assert response.data == DATA
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.headers['Content-Length'] == str(len(DATA))
+
+
+def test_single_range(client):
+    response = client.get('/audio', headers={'Range': 'bytes=10-309'})
+
+    assert response.status_code == 206
+    assert response.data == DATA[10:310]
+    assert response.headers['Content-Range'] == f'bytes 10-309/{len(DATA)}'
+    assert response.headers['Content-Length'] == '300'
+    assert client.reads == [(10, 309)]
+
+
+def test_multiple_ranges(client):
+    response = client.get('/audio', headers={'Range': 'bytes=0-9,-10'})
+
+    assert response.status_code == 206
+    assert response.mimetype == 'multipart/byteranges'
+    boundary = response.mimetype_params['boundary'].encode('ascii')
+    body = response.data
+    assert int(response.headers['Content-Length']) == len(body)
+    assert body.endswith(b'\r\n--' + boundary + b'--\r\n')
+    parts = body.split(b'--' + boundary)[1:-1]
+    assert len(parts) == 2
+    head, _, payload = parts[0].partition(b'\r\n\r\n')
+    assert b'Content-Range: bytes 0-9/1024' in head
+    assert payload == DATA[:10] + b'\r\n'
+    head, _, payload = parts[1].partition(b'\r\n\r\n')
+    assert b'Content-Range: bytes 1014-1023/1024' in head
+    assert payload == DATA[-10:] + b'\r\n'
+
+
+def test_unsatisfiable_range(client):
+    response = client.get('/audio', headers={'Range': f'bytes={len(DATA)}-'})
+
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == f'bytes */{len(DATA)}'
+    assert response.data == b''
+    assert client.reads == []
+
+
+def test_invalid_range_returns_full_resource(client):
+    response = client.get('/audio', headers={'Range': 'bytes=9-0'})
+
+    assert response.status_code == 200
+    assert response.data == DATA
+
+
+def test_head_does_not_read(client):
+    response = client.head('/audio', headers={'Range': 'bytes=0-9'})
+
+    assert response.status_code == 200
+    assert response.headers['Content-Length'] == str(len(DATA))
+    assert client.reads == []
+
+
+def test_if_range(client):
+    matching = client.get('/audio', headers={'Range': 'bytes=0-9', 'If-Range': f'"{ETAG}"'})
+    stale = client.get('/audio', headers={'Range': 'bytes=0-9', 'If-Range': '"otro"'})
+
+    assert matching.status_code == 206
+    assert matching.data == DATA[:10]
+    assert stale.status_code == 200
+    assert stale.data == DATA
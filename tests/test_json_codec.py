@@ -0,0 +1,34 @@
+"""
+Codificación de respuestas: tipos especiales y listas por partes
+"""
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from flask import Flask
+
+from backend.utils import json_codec
+
+
+def test_dumps_special_types():
+    data = json.loads(json_codec.dumps({'fecha': datetime(2025, 1, 2, 3, 4, 5), 'n': Decimal('1.5'),
+                                        'b': b'\x00\x01', 's': {1}}))
+    assert data == {'fecha': '2025-01-02T03:04:05', 'n': 1.5, 'b': 'AAE=', 's': [1]}
+
+
+def test_iter_json_object_matches_full_encoding():
+    items = [{'id': i, 'texto': 'x' * 1000} for i in range(200)]
+    body = b''.join(json_codec.iter_json_object({'status': 'success'}, 'documents', iter(items),
+                                                lambda: {'has_more': False}))
+    assert json.loads(body) == {'status': 'success', 'documents': items, 'has_more': False}
+
+
+def test_chunked_response_outlives_request_context():
+    app = Flask(__name__)
+    items = [{'id': 1}, {'id': 2}]
+    with app.test_request_context(headers={'Accept': 'application/json'}):
+        response = json_codec.chunked_response({'status': 'success'}, 'changes', items,
+                                               lambda: {'cursor': 'c'})
+    # El cuerpo se recorre fuera del contexto de la petición, como al enviarlo
+    assert json.loads(b''.join(response.response)) == {'status': 'success', 'changes': items, 'cursor': 'c'}
+    assert 'Accept' in response.headers['Vary']
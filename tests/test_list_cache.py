@@ -0,0 +1,50 @@
+"""
+Pruebas del almacén de archivos de la caché del listado
+"""
+import os
+import stat
+
+import pytest
+
+from backend.utils.list_cache import FileVersionStore
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'geteuid'), reason='Permisos POSIX')
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_pages_are_private(tmp_path):
+    root = tmp_path / 'cache'
+    store = FileVersionStore(str(root))
+    version = store.version(7)
+    store.set_page(7, version, 'pagina', b'{"documentos":[]}', ttl=60)
+
+    assert _mode(root) == 0o700
+    assert _mode(root / 'paginas' / '7') == 0o700
+    assert _mode(root / 'versiones' / '7') == 0o600
+    assert _mode(root / 'paginas' / '7' / f'{version}-pagina') == 0o600
+    assert store.get_page(7, version, 'pagina') == b'{"documentos":[]}'
+
+
+def test_existing_directory_is_tightened(tmp_path):
+    root = tmp_path / 'cache'
+    root.mkdir(mode=0o777)
+    os.chmod(root, 0o777)
+
+    FileVersionStore(str(root))
+
+    assert _mode(root) == 0o700
+
+
+def test_bump_drops_old_pages(tmp_path):
+    store = FileVersionStore(str(tmp_path / 'cache'))
+    version = store.version(3)
+    store.set_page(3, version, 'a', b'viejo', ttl=60)
+
+    new_version = store.bump(3)
+
+    assert new_version == version + 1
+    assert store.get_page(3, version, 'a') is None
+    assert store.version(3) == new_version
@@ -0,0 +1,37 @@
+"""
+Pruebas del registro de métricas y de su token de acceso
+"""
+from flask import Flask, request
+
+from backend.utils import metrics
+
+
+def _authorized(headers):
+    with Flask(__name__).test_request_context('/api/metrics', headers=headers):
+        return metrics.is_authorized(request)
+
+
+def test_collect_reports_failing_sources():
+    metrics.register_source('prueba_ok', lambda: {'hits': 1})
+    metrics.register_source('prueba_error', lambda: 1 / 0)
+
+    result = metrics.collect()
+
+    assert result['prueba_ok'] == {'hits': 1}
+    assert 'error' in result['prueba_error']
+
+
+def test_metrics_disabled_without_token(monkeypatch):
+    monkeypatch.delenv('METRICS_TOKEN', raising=False)
+
+    assert not metrics.is_enabled()
+    assert not _authorized({metrics.TOKEN_HEADER: ''})
+
+
+def test_metrics_token(monkeypatch):
+    monkeypatch.setenv('METRICS_TOKEN', 'secreto')
+
+    assert metrics.is_enabled()
+    assert _authorized({metrics.TOKEN_HEADER: 'secreto'})
+    assert not _authorized({metrics.TOKEN_HEADER: 'otro'})
+    assert not _authorized({})
@@ -0,0 +1,43 @@
+"""
+Pruebas de la capa de repositorio sobre SQLite
+"""
+from backend.utils.migrations import run_migrations
+from backend.utils.repository import Repository, SQLiteDriver
+from backend.utils.sqlite_db import SQLiteManager
+from backend.utils.user_settings import DEFAULT_SETTINGS
+
+
+def test_users_and_settings_round_trip(tmp_path):
+    manager = SQLiteManager(str(tmp_path / 'auris.db'))
+    connection = manager.get()
+    run_migrations(connection, 'sqlite')
+    repository = Repository(SQLiteDriver())
+
+    user_id = manager.run_write(lambda c: repository.create_user(c, 'lectora', 'lectora@example.com', 'hash'))
+    manager.run_write(lambda c: repository.save_settings(c, user_id, DEFAULT_SETTINGS))
+
+    assert repository.user_exists(connection, 'lectora@example.com', 'otra')
+    assert not repository.user_exists(connection, 'nadie@example.com', 'nadie')
+    assert repository.find_user_by_email(connection, 'lectora@example.com')['id'] == user_id
+    assert repository.load_settings(connection, user_id) == DEFAULT_SETTINGS
+    manager.close()
+
+
+def test_sqlite_statement_counters(tmp_path):
+    manager = SQLiteManager(str(tmp_path / 'auris.db'))
+    connection = manager.get()
+    run_migrations(connection, 'sqlite')
+    driver = SQLiteDriver()
+    repository = Repository(driver)
+
+    for _ in range(3):
+        repository.user_exists(connection, 'a@example.com', 'a')
+    stats = driver.stats()
+    assert (stats['prepared'], stats['reused']) == (1, 2)
+
+    # Otra conexión prepara de nuevo la sentencia
+    manager.close()
+    repository.user_exists(manager.get(), 'a@example.com', 'a')
+    stats = driver.stats()
+    assert (stats['prepared'], stats['reused'], stats['executions']) == (2, 2, 4)
+    manager.close()
@@ -0,0 +1,171 @@
+"""
+SingleFlight: agrupación de peticiones, errores compartidos y cancelación
+"""
+import asyncio
+import os
+import time
+
+import pytest
+
+from backend.utils.single_flight import SingleFlight, SingleFlightError, _FileLock
+
+KEY = 'a' * 64
+OTHER_KEY = 'b' * 64
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_identical_requests_share_one_call(tmp_path):
+    flight = SingleFlight(str(tmp_path))
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'audio'
+
+    async def main():
+        return await asyncio.gather(*(flight.run(KEY, work) for _ in range(5)))
+
+    assert _run(main()) == ['audio'] * 5
+    assert len(calls) == 1
+    stats = flight.stats()
+    assert stats['calls'] == 1 and stats['coalesced'] == 4 and stats['in_flight'] == 0
+
+
+def test_error_is_shared_with_waiters(tmp_path):
+    flight = SingleFlight(str(tmp_path))
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError('proveedor caído')
+
+    async def main():
+        return await asyncio.gather(*(flight.run(KEY, work) for _ in range(3)), return_exceptions=True)
+
+    results = _run(main())
+    assert len(calls) == 1
+    assert all(isinstance(e, RuntimeError) and str(e) == 'proveedor caído' for e in results)
+
+
+def test_error_from_other_worker_is_reused(tmp_path):
+    async def fail():
+        raise RuntimeError('proveedor caído')
+
+    with pytest.raises(RuntimeError):
+        _run(SingleFlight(str(tmp_path)).run(KEY, fail))
+
+    # Otro proceso: simular su pid para que el error no se tome por propio
+    other = SingleFlight(str(tmp_path))
+    path = os.path.join(str(tmp_path), 'errores', KEY)
+    with open(path) as f:
+        data = f.read().replace(f'"pid": {os.getpid()}', '"pid": -1')
+    with open(path, 'w') as f:
+        f.write(data)
+
+    async def never():
+        raise AssertionError('no debe llamar al proveedor')
+
+    with pytest.raises(SingleFlightError, match='proveedor caído'):
+        _run(other.run(KEY, never))
+
+
+def test_retry_in_same_process_reaches_provider(tmp_path):
+    flight = SingleFlight(str(tmp_path))
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError('transitorio')
+        return 'ok'
+
+    with pytest.raises(RuntimeError):
+        _run(flight.run(KEY, flaky))
+    assert _run(flight.run(KEY, flaky)) == 'ok'
+
+
+def test_check_finds_result_of_other_worker(tmp_path):
+    flight = SingleFlight(str(tmp_path))
+
+    async def never():
+        raise AssertionError('no debe llamar al proveedor')
+
+    assert _run(flight.run(KEY, never, check=lambda: 'en caché')) == 'en caché'
+    assert flight.stats()['worker_coalesced'] == 1
+
+
+def test_different_keys_do_not_serialize(tmp_path):
+    flight = SingleFlight(str(tmp_path))
+
+    async def work():
+        await asyncio.sleep(0.3)
+        return 'ok'
+
+    async def main():
+        keys = [f'{i:x}' * 64 for i in range(4)]
+        return await asyncio.gather(*(flight.run(key[:64], work) for key in keys))
+
+    start = time.monotonic()
+    assert _run(main()) == ['ok'] * 4
+    assert time.monotonic() - start < 0.9
+
+
+def test_lock_file_removed_after_release(tmp_path):
+    async def work():
+        return 'ok'
+
+    _run(SingleFlight(str(tmp_path)).run(KEY, work))
+    assert not os.path.exists(os.path.join(str(tmp_path), f'{KEY}.lock'))
+
+
+def test_cancel_while_waiting_for_lock_does_not_leak_it(tmp_path):
+    flight = SingleFlight(str(tmp_path), timeout=5)
+    # Otro worker tiene el bloqueo de la clave
+    other = _FileLock(os.path.join(str(tmp_path), f'{KEY}.lock'))
+    other.acquire(1)
+
+    async def work():
+        return 'ok'
+
+    async def main():
+        task = asyncio.ensure_future(flight.run(KEY, work))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        other.release()
+        # El hilo que esperaba consigue el bloqueo y lo suelta enseguida
+        await asyncio.sleep(0.3)
+        return await asyncio.wait_for(flight.run(KEY, work), 2)
+
+    assert _run(main()) == 'ok'
+    probe = _FileLock(os.path.join(str(tmp_path), f'{KEY}.lock'))
+    probe.acquire(0.5)
+    probe.release()
+
+
+def test_cancelled_leader_fails_waiters_and_releases_lock(tmp_path):
+    flight = SingleFlight(str(tmp_path))
+
+    async def slow():
+        await asyncio.sleep(5)
+
+    async def fast():
+        return 'ok'
+
+    async def main():
+        leader = asyncio.ensure_future(flight.run(KEY, slow))
+        await asyncio.sleep(0.1)
+        follower = asyncio.ensure_future(flight.run(KEY, slow))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        with pytest.raises(SingleFlightError):
+            await follower
+        return await asyncio.wait_for(flight.run(KEY, fast), 2)
+
+    assert _run(main()) == 'ok'
@@ -0,0 +1,78 @@
+"""
+Pruebas de las conexiones SQLite por hilo y de run_write
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from backend.utils.sqlite_db import SQLiteManager, is_locked_error
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = SQLiteManager(str(tmp_path / 'auris.db'), busy_timeout_ms=50)
+    manager.get().execute("CREATE TABLE t (v INTEGER)")
+    yield manager
+    manager.close()
+
+
+def _values(manager):
+    return [row[0] for row in manager.get().execute("SELECT v FROM t ORDER BY v")]
+
+
+def test_connection_reused_per_thread(manager):
+    assert manager.get() is manager.get()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(manager.get()))
+    thread.start()
+    thread.join()
+    assert other[0] is not manager.get()
+    assert manager.stats()['journal_mode'] == 'wal'
+
+
+def test_run_write_commits(manager):
+    result = manager.run_write(lambda connection: connection.execute("INSERT INTO t VALUES (1)").rowcount)
+
+    assert result == 1
+    assert not manager.get().in_transaction
+    assert _values(manager) == [1]
+
+
+def test_run_write_retries_locked_database(manager):
+    attempts = []
+
+    def write(connection):
+        connection.execute("INSERT INTO t VALUES (?)", (len(attempts),))
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise sqlite3.OperationalError('database is locked')
+
+    manager.run_write(write)
+
+    # El primer intento se deshizo; solo queda el segundo
+    assert _values(manager) == [1]
+    assert manager.stats()['lock_retries'] == 1
+
+
+def test_run_write_gives_up_while_another_writer_holds_the_lock(manager):
+    blocker = sqlite3.connect(manager.path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(sqlite3.OperationalError) as error:
+            manager.run_write(lambda connection: connection.execute("INSERT INTO t VALUES (1)"), retries=1)
+        assert is_locked_error(error.value)
+    finally:
+        blocker.rollback()
+        blocker.close()
+
+    stats = manager.stats()
+    assert stats['lock_retries'] == 1
+    assert stats['lock_failures'] == 1
+    assert _values(manager) == []
+
+
+def test_run_write_does_not_retry_other_errors(manager):
+    with pytest.raises(sqlite3.OperationalError):
+        manager.run_write(lambda connection: connection.execute("INSERT INTO nada VALUES (1)"))
+    assert manager.stats()['lock_retries'] == 0
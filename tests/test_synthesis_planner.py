@@ -0,0 +1,121 @@
+"""
+Síntesis por fragmentos: división del texto, concurrencia, reintentos y
+unión del audio
+"""
+import asyncio
+import random
+
+import pytest
+
+from backend.services import synthesis_planner
+from backend.services.synthesis_planner import SynthesisPlanner, split_text
+from backend.utils.mp3 import iter_frames
+
+
+def _frame(marker):
+    """Un frame MPEG-2 Layer III de 144 bytes (48 kbps, 24 kHz) marcado"""
+    return b'\xff\xf3\x64\xc4' + bytes([marker % 256]) * 140
+
+
+class FakeService:
+    """Servicio con la interfaz de EdgeTTSService que no llama a la red"""
+
+    def __init__(self, delay=0.05, failures=None):
+        self.delay = delay
+        self.failures = dict(failures or {})
+        self.active = 0
+        self.max_active = 0
+        self.calls = []
+
+    def voice_and_rate(self, voice_type='mujer', speed=1.0):
+        return 'es-ES-ElviraNeural', '+0%'
+
+    async def synthesize_audio(self, text, voice, rate, use_cache=True):
+        self.calls.append((text, use_cache))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures.get(text):
+                self.failures[text] -= 1
+                raise RuntimeError('fallo transitorio')
+            return b'ID3\x03\x00\x00\x00\x00\x00\x00' + _frame(len(text))
+        finally:
+            self.active -= 1
+
+
+def _text(paragraphs=30, seed=3):
+    rng = random.Random(seed)
+    sentences = ['Hola mundo.', '¿Qué tal estás?', '¡Muy bien!', 'Esto es «una cita.»',
+                 'Una frase algo más larga, con comas, pausas; y punto y coma.']
+    return '\n\n'.join(' '.join(rng.choice(sentences) for _ in range(rng.randint(1, 25)))
+                       for _ in range(paragraphs))
+
+
+@pytest.mark.parametrize('max_chars', [40, 100, 500, 2000])
+def test_split_text_respects_limit_and_keeps_words(max_chars):
+    text = _text()
+    chunks = split_text(text, max_chars)
+    assert chunks and all(0 < len(chunk) <= max_chars for chunk in chunks)
+    assert ' '.join(' '.join(chunks).split()) == ' '.join(text.split())
+
+
+def test_split_text_prefers_paragraph_and_sentence_boundaries():
+    text = 'Primer párrafo corto.\n\nSegundo párrafo. Con dos frases.'
+    assert split_text(text, 2000) == ['Primer párrafo corto.\n\nSegundo párrafo. Con dos frases.']
+    assert split_text(text, 35) == ['Primer párrafo corto.', 'Segundo párrafo. Con dos frases.']
+    assert split_text(text, 20) == ['Primer párrafo', 'corto.', 'Segundo párrafo.', 'Con dos frases.']
+
+
+def test_split_text_cuts_words_longer_than_limit():
+    assert split_text('a' * 25, 10) == ['a' * 10, 'a' * 10, 'a' * 5]
+    assert split_text('  \n\n  ') == []
+
+
+def test_chunks_are_joined_in_order_without_cache():
+    service = FakeService()
+    planner = SynthesisPlanner(service, concurrency=3, max_chars=100)
+    text = _text()
+    audio = asyncio.run(planner.synthesize(text))
+    chunks = split_text(text, 100)
+    markers = [audio[start + 4] for start, *_ in iter_frames(audio)]
+    assert markers == [len(chunk) % 256 for chunk in chunks]
+    assert service.max_active <= 3
+    assert all(use_cache is False for _, use_cache in service.calls)
+
+
+def test_failed_chunk_is_retried_without_holding_a_slot(monkeypatch):
+    monkeypatch.setattr(synthesis_planner, 'RETRY_BACKOFF', 0.3)
+    text = 'Uno.\n\nDos.\n\nTres.'
+    service = FakeService(delay=0.05, failures={'Uno.': 1})
+    planner = SynthesisPlanner(service, concurrency=1, max_chars=5)
+
+    async def main():
+        start = asyncio.get_running_loop().time()
+        audio = await planner.synthesize(text)
+        return audio, asyncio.get_running_loop().time() - start
+
+    audio, elapsed = asyncio.run(main())
+    assert len(list(iter_frames(audio))) == 3
+    assert planner.stats()['retries'] == 1
+    # Mientras 'Uno.' espera su reintento, los otros dos usan el único hueco
+    order = [text for text, _ in service.calls]
+    assert order[:3] == ['Uno.', 'Dos.', 'Tres.'] and order[3] == 'Uno.'
+    assert elapsed < 0.3 + 4 * 0.05 + 0.15
+
+
+def test_permanent_failure_cancels_the_document():
+    service = FakeService(failures={'Dos.': 10})
+    planner = SynthesisPlanner(service, concurrency=2, max_chars=5, retries=1)
+    synthesis_planner.RETRY_BACKOFF, backoff = 0.01, synthesis_planner.RETRY_BACKOFF
+    try:
+        with pytest.raises(RuntimeError):
+            asyncio.run(planner.synthesize('Uno.\n\nDos.\n\nTres.'))
+    finally:
+        synthesis_planner.RETRY_BACKOFF = backoff
+    assert planner.stats()['failed_documents'] == 1
+
+
+def test_empty_text_is_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(SynthesisPlanner(FakeService()).synthesize('   '))
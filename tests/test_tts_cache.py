@@ -0,0 +1,71 @@
+"""
+Pruebas de la caché de audio sintetizado
+"""
+import os
+import threading
+import time
+
+from backend.utils.tts_cache import TTSCache
+
+
+def _wait(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'La condición no se cumplió a tiempo'
+        time.sleep(0.01)
+
+
+def test_key_normalizes_text(tmp_path):
+    cache = TTSCache(str(tmp_path), '/audio')
+
+    assert cache.key('Hola   mundo ', 'edge-tts', 'v', '+0%') == cache.key('Hola mundo', 'edge-tts', 'v', '+0%')
+    assert cache.key('Hola mundo', 'edge-tts', 'v', '+0%') != cache.key('Hola mundo', 'edge-tts', 'v', '+10%')
+
+
+def test_put_and_get(tmp_path):
+    cache = TTSCache(str(tmp_path), '/audio/')
+
+    assert cache.get('a') is None
+    entry = cache.put('a', b'mp3')
+
+    assert entry == {'path': cache.path('a'), 'url': '/audio/a.mp3', 'size': 3}
+    assert cache.get('a') == entry
+    assert cache.stats()['hit_rate'] == 0.5
+
+
+def test_commit_over_budget_evicts_without_blocking(tmp_path):
+    cache = TTSCache(str(tmp_path), '/audio', max_bytes=250, min_age=0)
+    for index, key in enumerate(['viejo', 'medio']):
+        cache.put(key, b'x' * 100)
+        os.utime(cache.path(key), (1000 + index, 1000 + index))
+
+    scanning = threading.Event()
+    release = threading.Event()
+    scan = cache._scan
+
+    def slow_scan():
+        scanning.set()
+        release.wait(2)
+        return scan()
+
+    cache._scan = slow_scan
+    # commit() vuelve aunque la limpieza esté parada recorriendo el directorio
+    entry = cache.put('nuevo', b'x' * 100)
+    assert entry['size'] == 100
+    assert scanning.wait(2)
+    assert os.path.exists(cache.path('viejo'))
+
+    release.set()
+    _wait(lambda: cache.stats()['evictions'] == 1)
+    assert not os.path.exists(cache.path('viejo'))
+    assert os.path.exists(cache.path('medio'))
+    assert os.path.exists(cache.path('nuevo'))
+    assert cache.stats()['bytes'] == 200
+
+
+def test_recently_used_files_are_kept(tmp_path):
+    cache = TTSCache(str(tmp_path), '/audio', max_bytes=50, min_age=60)
+    cache.put('a', b'x' * 100)
+
+    assert cache.evict() == 0
+    assert cache.get('a') is not None